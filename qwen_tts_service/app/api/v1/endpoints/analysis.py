@@ -0,0 +1,216 @@
+from fastapi import APIRouter, HTTPException, File, UploadFile, Depends
+from typing import List, Optional, Dict, Any
+import json
+import time
+import os
+import logging
+from app.models.analysis_models import (
+    AnalyzeBatchRequest, AnalyzeBatchResponse, AnalyzeSingleResponse, AnalyzeResultItem,
+    AlignmentStrategyEnum, AlignRequest, AlignResponse, AnalyzeModeEnum
+)
+from app.models.asr_models import ASRLanguageEnum
+from app.services.gpu_worker import gpu_worker
+from app.services.worker_registry import WorkerUnavailableError
+from app.services.file_store import file_store
+from app.services.inference_executor import inference_executor
+from app.services.alignment import build_turns
+from app.core.security import get_api_key
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+async def _analyze(file_paths: List[str], language: ASRLanguageEnum, long_form: Optional[bool],
+                   num_speakers: List[Optional[int]], min_speakers: List[Optional[int]],
+                   max_speakers: List[Optional[int]],
+                   alignment: AlignmentStrategyEnum = AlignmentStrategyEnum.MIDPOINT,
+                   mode: AnalyzeModeEnum = AnalyzeModeEnum.TIMESTAMPS, item_errors: bool = False) -> List[dict]:
+    """
+    ASR + diarization + alignment as one GPU worker operation (shared batches and decode).
+    With item_errors a failed file comes back as {"error": ...} instead of failing the request.
+    """
+    return await gpu_worker.run_sync(
+        "analyze",
+        item_errors=item_errors,
+        ref_audio=file_paths,
+        language=language.value,
+        long_form=long_form,
+        num_speakers=num_speakers,
+        min_speakers=min_speakers,
+        max_speakers=max_speakers,
+        alignment=alignment.value,
+        analyze_mode=mode.value
+    )
+
+@router.post("/analyze", response_model=AnalyzeBatchResponse, dependencies=[Depends(get_api_key)])
+async def analyze_batch(request: AnalyzeBatchRequest):
+    """
+    Smart transcript for multiple files: transcription with timestamps,
+    speaker diarization, and punctuation / speaker alignment in one request.
+    Accepts a list of file_ids (from /upload) or local paths.
+    """
+    if not request.files:
+        raise HTTPException(status_code=400, detail="Files list cannot be empty")
+
+    try:
+        start_time = time.perf_counter()
+
+        file_paths = []
+        for item in request.files:
+            path = file_store.get_path(item.file_id)
+            if not path:
+                if os.path.exists(item.file_id):
+                    path = item.file_id
+                else:
+                    raise HTTPException(status_code=404, detail=f"File ID or path not found: {item.file_id}")
+            file_paths.append(str(path))
+
+        results = await _analyze(
+            file_paths, request.language, request.long_form,
+            [item.num_speakers for item in request.files],
+            [item.min_speakers for item in request.files],
+            [item.max_speakers for item in request.files],
+            request.alignment,
+            request.mode,
+            item_errors=True
+        )
+
+        items = []
+        for item, res in zip(request.files, results):
+            if "error" in res:
+                # Handle error per item (like /diarize): the other files keep their results
+                items.append(AnalyzeResultItem(
+                    file_id=item.file_id,
+                    custom_id=item.custom_id,
+                    text="",
+                    language=res.get("language") or "",
+                    num_speakers=0,
+                    turns=[],
+                    error=res["error"]
+                ))
+                continue
+
+            items.append(AnalyzeResultItem(
+                file_id=item.file_id,
+                custom_id=item.custom_id,
+                text=res["text"],
+                language=res["language"],
+                num_speakers=res["num_speakers"],
+                turns=res["turns"]
+            ))
+
+        execution_time = time.perf_counter() - start_time
+        return AnalyzeBatchResponse(items=items, performance=execution_time)
+
+    except HTTPException:
+        raise
+    except WorkerUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        logger.error(f"Analysis batch failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/analyze/file", response_model=AnalyzeSingleResponse, dependencies=[Depends(get_api_key)])
+async def analyze_file(
+    audio: UploadFile = File(...),
+    language: ASRLanguageEnum = ASRLanguageEnum.AUTO,
+    long_form: Optional[bool] = None,
+    num_speakers: Optional[int] = None,
+    min_speakers: Optional[int] = None,
+    max_speakers: Optional[int] = None,
+    alignment: AlignmentStrategyEnum = AlignmentStrategyEnum.MIDPOINT,
+    mode: AnalyzeModeEnum = AnalyzeModeEnum.TIMESTAMPS
+):
+    """
+    Smart transcript for a single uploaded audio file.
+    """
+    try:
+        start_time = time.perf_counter()
+
+        content = await audio.read()
+        file_id = file_store.save(content, audio.filename)
+        path = file_store.get_path(file_id)
+
+        results = await _analyze([str(path)], language, long_form, [num_speakers], [min_speakers], [max_speakers], alignment, mode)
+
+        res = results[0]
+        if "error" in res:
+            raise HTTPException(status_code=500, detail=res["error"])
+
+        execution_time = time.perf_counter() - start_time
+        return AnalyzeSingleResponse(
+            text=res["text"],
+            language=res["language"],
+            num_speakers=res["num_speakers"],
+            turns=res["turns"],
+            performance=execution_time
+        )
+
+    except HTTPException:
+        raise
+    except WorkerUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        logger.error(f"Analysis file failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        await audio.close()
+
+def _read_result_json(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+async def _load_result_json(file_id: str) -> Dict[str, Any]:
+    """Parse a stored queue result (or uploaded JSON) off the event loop; malformed files are a 400."""
+    path = file_store.get_path(file_id)
+    if not path:
+        raise HTTPException(status_code=404, detail=f"File ID not found: {file_id}")
+    try:
+        result = await inference_executor.run(_read_result_json, str(path))
+    except (ValueError, UnicodeDecodeError) as e:  # json.JSONDecodeError is a ValueError
+        raise HTTPException(status_code=400, detail=f"File {file_id} is not a JSON result: {e}")
+    if not isinstance(result, dict):
+        raise HTTPException(status_code=400, detail=f"File {file_id} is not a JSON result object")
+    return result
+
+@router.post("/align", response_model=AlignResponse, dependencies=[Depends(get_api_key)])
+async def align(request: AlignRequest):
+    """
+    Align an existing timestamped transcript with diarization segments into
+    speaker turns (no GPU work). Inputs are inline or queue result file_ids.
+    """
+    try:
+        start_time = time.perf_counter()
+
+        if request.transcript_file_id:
+            transcript = await _load_result_json(request.transcript_file_id)
+        elif request.timestamps is not None:
+            transcript = {
+                "text": request.text if request.text is not None else " ".join(w.text for w in request.timestamps),
+                "timestamps": [w.model_dump() for w in request.timestamps]
+            }
+        else:
+            raise HTTPException(status_code=400, detail="Provide timestamps or transcript_file_id")
+
+        if request.diarization_file_id:
+            segments = (await _load_result_json(request.diarization_file_id)).get("segments", [])
+        elif request.segments is not None:
+            segments = [s.model_dump() for s in request.segments]
+        else:
+            raise HTTPException(status_code=400, detail="Provide segments or diarization_file_id")
+
+        if not transcript.get("timestamps"):
+            raise HTTPException(status_code=400, detail="Transcript has no word timestamps (use return_timestamps)")
+
+        turns = await inference_executor.run(build_turns, transcript, segments, request.alignment.value)
+
+        return AlignResponse(
+            num_speakers=len({s["speaker"] for s in segments}),
+            turns=turns,
+            performance=time.perf_counter() - start_time
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Alignment failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
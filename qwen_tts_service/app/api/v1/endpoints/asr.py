@@ -1,16 +1,25 @@
-from fastapi import APIRouter, HTTPException, File, UploadFile, Depends
+from fastapi import APIRouter, HTTPException, File, UploadFile, Depends, WebSocket, WebSocketDisconnect
 from typing import List, Optional
+import asyncio
+import json
 import time
 import os
+import logging
 from app.models.asr_models import (
     ASRBatchRequest, ASRBatchResponse, ASRSingleResponse, 
     ASRTranscriptItem, ASRTimestamp, ASRLanguageEnum
 )
-from app.services.asr_engine import asr_engine
+from app.services.gpu_worker import gpu_worker
+from app.services.worker_registry import WorkerUnavailableError
 from app.services.file_store import file_store
+from app.services.inference_executor import inference_executor
 from app.core.security import get_api_key
+from app.core.config import settings
 
+logger = logging.getLogger(__name__)
 router = APIRouter()
+# WebSocket routes check the API key themselves (header dependencies need an HTTP request)
+stream_router = APIRouter()
 
 ASR_LANGUAGE_MAP = {
     ASRLanguageEnum.ZH: "Chinese",
@@ -49,21 +58,35 @@ def _map_results(results, custom_ids=None, file_ids=None) -> List[ASRTranscriptI
     items = []
     for i, res in enumerate(results):
         timestamps = None
-        if hasattr(res, 'time_stamps') and res.time_stamps:
+        if res.get("timestamps"):
             timestamps = [
-                ASRTimestamp(start_time=ts.start_time, end_time=ts.end_time, text=ts.text)
-                for ts in res.time_stamps
+                ASRTimestamp(start_time=ts["start"], end_time=ts["end"], text=ts["text"])
+                for ts in res["timestamps"]
             ]
         
         items.append(ASRTranscriptItem(
             custom_id=custom_ids[i] if custom_ids else None,
-            text=res.text,
-            language=res.language or "",
+            text=res["text"],
+            language=res.get("language") or "",
             timestamps=timestamps,
             file_id=file_ids[i] if file_ids else None
         ))
     return items
 
+async def _transcribe(file_paths: List[str], language: ASRLanguageEnum, return_timestamps: bool,
+                      long_form: Optional[bool] = None) -> List[dict]:
+    """
+    Transcribe through the GPU worker so concurrent requests share a batch.
+    Result-cache hits are answered by the worker before they reach the model.
+    """
+    return await gpu_worker.run_sync(
+        "transcribe",
+        ref_audio=file_paths,
+        language=language.value,
+        return_timestamps=bool(return_timestamps),
+        long_form=long_form
+    )
+
 @router.post("/transcribe", response_model=ASRBatchResponse, dependencies=[Depends(get_api_key)])
 async def transcribe_batch(request: ASRBatchRequest):
     """
@@ -95,18 +118,15 @@ async def transcribe_batch(request: ASRBatchRequest):
             custom_ids.append(item.custom_id)
             
         # Transcribe
-        lang = ASR_LANGUAGE_MAP.get(request.language) if request.language != ASRLanguageEnum.AUTO else None
-        results = asr_engine.transcribe(
-            audio=file_paths,
-            language=lang,
-            return_timestamps=request.return_timestamps
-        )
+        results = await _transcribe(file_paths, request.language, request.return_timestamps, request.long_form)
         
         items = _map_results(results, custom_ids, file_ids)
         execution_time = time.perf_counter() - start_time
         
         return ASRBatchResponse(items=items, performance=execution_time)
         
+    except WorkerUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         import traceback
         logger_err = traceback.format_exc()
@@ -117,7 +137,8 @@ async def transcribe_batch(request: ASRBatchRequest):
 async def transcribe_file(
     audio: UploadFile = File(...),
     language: ASRLanguageEnum = ASRLanguageEnum.AUTO,
-    return_timestamps: bool = False
+    return_timestamps: bool = False,
+    long_form: Optional[bool] = None
 ):
     """
     Transcribe a single uploaded audio file directly.
@@ -131,32 +152,94 @@ async def transcribe_file(
         path = file_store.get_path(file_id)
         
         # Transcribe
-        lang = ASR_LANGUAGE_MAP.get(language) if language != ASRLanguageEnum.AUTO else None
-        results = asr_engine.transcribe(
-            audio=str(path),
-            language=lang,
-            return_timestamps=return_timestamps
-        )
+        results = await _transcribe([str(path)], language, return_timestamps, long_form)
         
         # Since it's a single file, results[0]
-        res = results[0]
-        timestamps = None
-        if hasattr(res, 'time_stamps') and res.time_stamps:
-            timestamps = [
-                ASRTimestamp(start_time=ts.start_time, end_time=ts.end_time, text=ts.text)
-                for ts in res.time_stamps
-            ]
-            
+        res = _map_results(results)[0]
         execution_time = time.perf_counter() - start_time
         
         return ASRSingleResponse(
             text=res.text,
-            language=res.language or "",
-            timestamps=timestamps,
+            language=res.language,
+            timestamps=res.timestamps,
             performance=execution_time
         )
         
+    except WorkerUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     finally:
         await audio.close()
+
+@stream_router.websocket("/transcribe/stream")
+async def transcribe_stream(
+    websocket: WebSocket,
+    language: ASRLanguageEnum = ASRLanguageEnum.AUTO,
+    sample_rate: int = 16000,
+    return_timestamps: bool = False
+):
+    """
+    Real-time transcription over WebSocket.
+    Send binary frames of mono little-endian PCM16 at `sample_rate`, then the text
+    frame {"event": "end"} to flush. The server sends JSON events:
+    {"type": "partial"|"final", "text", "language", "start", "end", ["timestamps"]}
+    and {"type": "end"} before closing. The API key goes in the x-api-key header
+    or the api_key query parameter.
+    """
+    api_key = websocket.headers.get("x-api-key") or websocket.query_params.get("api_key")
+    if settings.API_KEY and api_key != settings.API_KEY:
+        await websocket.close(code=1008)
+        return
+
+    await websocket.accept()
+    if not settings.RUN_GPU_WORKER_IN_API:
+        # Streaming state does not travel over the queue; loading ASR in every API process is worse
+        await websocket.send_json({"type": "error", "detail": "Streaming transcription needs RUN_GPU_WORKER_IN_API (standalone GPU workers are in use)"})
+        await websocket.close(code=1013)
+        return
+    from app.services.asr_stream import ASRStreamSession  # Pulls in the ASR engine module (torch)
+    lang = ASR_LANGUAGE_MAP.get(language) if language != ASRLanguageEnum.AUTO else None
+    session = ASRStreamSession(sample_rate, lang, return_timestamps)
+    step_task = None
+
+    async def run_step(final: bool = False):
+        for event in await inference_executor.run(session.step, final):
+            await websocket.send_json(event)
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+
+            if message.get("bytes") is not None:
+                session.feed(message["bytes"])
+            elif message.get("text"):
+                if json.loads(message["text"]).get("event") == "end":
+                    if step_task is not None:
+                        await step_task
+                    await run_step(final=True)
+                    await websocket.send_json({"type": "end"})
+                    await websocket.close()
+                    break
+
+            # At most one inference in flight per stream; frames keep buffering meanwhile
+            if step_task is not None and step_task.done():
+                step_task.result()
+                step_task = None
+            if step_task is None and session.ready():
+                step_task = asyncio.create_task(run_step())
+
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.error(f"ASR stream failed: {e}", exc_info=True)
+        try:
+            await websocket.send_json({"type": "error", "detail": str(e)})
+            await websocket.close(code=1011)
+        except Exception:
+            pass
+    finally:
+        if step_task is not None and not step_task.done():
+            step_task.cancel()
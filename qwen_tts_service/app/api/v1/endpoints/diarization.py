@@ -7,13 +7,56 @@ from app.models.diarization_models import (
     DiarizeBatchRequest, DiarizeBatchResponse, DiarizeSingleResponse, 
     DiarizeResultItem, DiarizationSegment
 )
-from app.services.diarization_engine import diarization_engine
 from app.services.file_store import file_store
+from app.services.result_cache import result_cache
+from app.services.inference_executor import inference_executor
+from app.services.worker_registry import WorkerUnavailableError
 from app.core.security import get_api_key
+from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+def _diarize_cached(file_paths: List[str], num_speakers: List[Optional[int]],
+                    min_speakers: List[Optional[int]], max_speakers: List[Optional[int]]) -> List[dict]:
+    """Serve what we can from the result cache and only send misses to the GPU."""
+    keys = [
+        result_cache.diarization_key(p, num_speakers[i], min_speakers[i], max_speakers[i])
+        for i, p in enumerate(file_paths)
+    ]
+    results = [result_cache.get(k) for k in keys]
+    missing = [i for i, res in enumerate(results) if res is None]
+
+    if missing:
+        from app.services.diarization_engine import diarization_engine, diarization_result_to_dict
+        fresh = diarization_engine.diarize(
+            audio_paths=[file_paths[i] for i in missing],
+            num_speakers=[num_speakers[i] for i in missing],
+            min_speakers=[min_speakers[i] for i in missing],
+            max_speakers=[max_speakers[i] for i in missing]
+        )
+        for i, res in zip(missing, fresh):
+            results[i] = diarization_result_to_dict(res)
+            result_cache.put(keys[i], results[i])
+
+    return results
+
+async def _diarize(file_paths: List[str], num_speakers: List[Optional[int]],
+                   min_speakers: List[Optional[int]], max_speakers: List[Optional[int]],
+                   item_errors: bool = False) -> List[dict]:
+    """
+    In this process, or in a standalone GPU worker when RUN_GPU_WORKER_IN_API is off
+    (where item_errors returns a failed file as {"error": ...}, like the engine does).
+    """
+    if settings.RUN_GPU_WORKER_IN_API:
+        return await inference_executor.run(_diarize_cached, file_paths, num_speakers, min_speakers, max_speakers)
+
+    from app.services.gpu_worker import gpu_worker
+    return await gpu_worker.run_sync(
+        "diarize", item_errors=item_errors, ref_audio=file_paths, num_speakers=num_speakers,
+        min_speakers=min_speakers, max_speakers=max_speakers
+    )
+
 @router.post("/diarize", response_model=DiarizeBatchResponse, dependencies=[Depends(get_api_key)])
 async def diarize_batch(request: DiarizeBatchRequest):
     """
@@ -49,12 +92,7 @@ async def diarize_batch(request: DiarizeBatchRequest):
             max_speakers.append(item.max_speakers)
             
         # Diarize
-        engine_results = diarization_engine.diarize(
-            audio_paths=file_paths,
-            num_speakers=num_speakers,
-            min_speakers=min_speakers,
-            max_speakers=max_speakers
-        )
+        engine_results = await _diarize(file_paths, num_speakers, min_speakers, max_speakers, item_errors=True)
         
         items = []
         for i, res in enumerate(engine_results):
@@ -64,7 +102,8 @@ async def diarize_batch(request: DiarizeBatchRequest):
                     file_id=file_ids[i],
                     custom_id=custom_ids[i],
                     segments=[],
-                    num_speakers=0
+                    num_speakers=0,
+                    error=res["error"]
                 ))
                 continue
                 
@@ -78,6 +117,8 @@ async def diarize_batch(request: DiarizeBatchRequest):
         execution_time = time.perf_counter() - start_time
         return DiarizeBatchResponse(items=items, performance=execution_time)
         
+    except WorkerUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error(f"Diarization batch failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -101,12 +142,7 @@ async def diarize_file(
         path = file_store.get_path(file_id)
         
         # Diarize
-        results = diarization_engine.diarize(
-            audio_paths=str(path),
-            num_speakers=num_speakers,
-            min_speakers=min_speakers,
-            max_speakers=max_speakers
-        )
+        results = await _diarize([str(path)], [num_speakers], [min_speakers], [max_speakers])
         
         res = results[0]
         if "error" in res:
@@ -122,6 +158,8 @@ async def diarize_file(
         
     except HTTPException:
         raise
+    except WorkerUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error(f"Diarization file failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -2,6 +2,7 @@ from app.core.security import get_api_key
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
 from fastapi.responses import FileResponse
 from app.services.file_store import file_store
+from app.services.audio_encoder import media_type_for
 import os
 
 router = APIRouter()
@@ -27,7 +28,7 @@ async def get_file(file_id: str):
     file_path = file_store.get_path(file_id)
     if not file_path or not file_path.exists():
         raise HTTPException(status_code=404, detail="File not found or expired")
-    media_type = "application/json" if file_path.suffix == ".json" else "audio/wav"
+    media_type = media_type_for(file_path)
         
     return FileResponse(
         path=file_path,
@@ -1,9 +1,10 @@
 from fastapi import APIRouter, HTTPException, Form, File, UploadFile
-from app.models.requests import VoiceCloneEnhancedRequest, LanguageEnum, LANGUAGE_MAP
-from app.models.responses import TTSResponse, TTSResponseItem
-from app.services.audio_pipeline import audio_pipeline
+from app.models.requests import VoiceCloneEnhancedRequest, LanguageEnum, ResponseFormatEnum, OutputFormatEnum
+from app.models.responses import TTSResponse
+from app.services.audio_response import build_tts_response
+from app.services.gpu_worker import gpu_worker
+from app.services.worker_registry import WorkerUnavailableError
 from app.services.file_store import file_store
-import base64
 import time
 import logging
 from typing import Optional
@@ -19,50 +20,25 @@ async def generate_voice_clone_enhanced(request: VoiceCloneEnhancedRequest):
     """
     try:
         start_time = time.perf_counter()
-        lang = request.language
-        if isinstance(lang, list):
-            lang = [LANGUAGE_MAP.get(l, "Auto") for l in lang]
-        elif isinstance(lang, LanguageEnum):
-            lang = LANGUAGE_MAP.get(lang, "Auto")
-
-        # Resolve file ID if provided
-        processed_ref_audio = request.ref_audio
-        if isinstance(processed_ref_audio, str):
-            path = file_store.get_path(processed_ref_audio)
-            if path:
-                processed_ref_audio = str(path)
-
-        audio_bytes_list = audio_pipeline.process_voice_clone_enhanced(
+        # The GPU worker (in this process or a standalone one) resolves file IDs and paths
+        audio_bytes_list = await gpu_worker.run_sync(
+            "voice_clone_enhanced",
             text=request.text,
-            ref_audio=processed_ref_audio,
+            ref_audio=request.ref_audio,
             ref_text=request.ref_text,
-            language=lang,
-            temperature=request.temperature
+            language=request.language,
+            temperature=request.temperature,
+            seed=request.seed
         )
         
-        items = []
-        custom_ids = request.custom_id
-        if custom_ids is None:
-            custom_ids = [None] * len(audio_bytes_list)
-        elif isinstance(custom_ids, str):
-            custom_ids = [custom_ids] * len(audio_bytes_list)
-        
-        if len(custom_ids) < len(audio_bytes_list):
-            custom_ids.extend([None] * (len(audio_bytes_list) - len(custom_ids)))
-            
-        for audio, cid in zip(audio_bytes_list, custom_ids):
-            file_id = file_store.save(audio, "voice_clone_enhanced.wav")
-            url = f"/api/v1/files/{file_id}"
-            
-            items.append(TTSResponseItem(
-                audio_base64=base64.b64encode(audio).decode('utf-8'),
-                url=url,
-                custom_id=cid
-            ))
-            
         execution_time = time.perf_counter() - start_time
-        return TTSResponse(items=items, performance=execution_time)
+        return await build_tts_response(
+            audio_bytes_list, request.response_format, "voice_clone_enhanced.wav", execution_time, request.custom_id,
+            output_format=request.output_format
+        )
         
+    except WorkerUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=f"Invalid Input: {str(e)}")
     except Exception as e:
@@ -76,7 +52,10 @@ async def generate_voice_clone_enhanced_file(
     ref_text: Optional[str] = Form(None),
     language: LanguageEnum = Form(LanguageEnum.AUTO),
     custom_id: Optional[str] = Form(None),
-    temperature: Optional[float] = Form(0.3)
+    temperature: Optional[float] = Form(0.3),
+    seed: Optional[int] = Form(None),
+    response_format: ResponseFormatEnum = Form(ResponseFormatEnum.JSON),
+    output_format: OutputFormatEnum = Form(OutputFormatEnum.WAV)
 ):
     """
     Clone a voice from an uploaded file with enhanced pre/post-processing.
@@ -84,33 +63,28 @@ async def generate_voice_clone_enhanced_file(
     try:
         start_time = time.perf_counter()
         audio_content = await ref_audio.read()
-        
-        # Convert Enum to string for internal engine
-        lang = LANGUAGE_MAP.get(language, "Auto")
+        # Through the file store so a standalone worker process can read it too
+        file_id = file_store.save(audio_content, ref_audio.filename or "ref_audio.wav")
         temp = float(temperature) if temperature is not None else 0.3
 
-        audio_bytes_list = audio_pipeline.process_voice_clone_enhanced(
+        audio_bytes_list = await gpu_worker.run_sync(
+            "voice_clone_enhanced",
             text=text,
-            ref_audio=audio_content,
+            ref_audio=file_id,
             ref_text=ref_text,
-            language=lang,
-            temperature=temp
+            language=language,
+            temperature=temp,
+            seed=seed
         )
         
-        items = []
-        for audio in audio_bytes_list:
-            file_id = file_store.save(audio, "voice_clone_enhanced.wav")
-            url = f"/api/v1/files/{file_id}"
-            
-            items.append(TTSResponseItem(
-                audio_base64=base64.b64encode(audio).decode('utf-8'),
-                url=url,
-                custom_id=custom_id
-            ))
-            
         execution_time = time.perf_counter() - start_time
-        return TTSResponse(items=items, performance=execution_time)
+        return await build_tts_response(
+            audio_bytes_list, response_format, "voice_clone_enhanced.wav", execution_time, custom_id,
+            output_format=output_format
+        )
         
+    except WorkerUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=f"Invalid Input: {str(e)}")
     except Exception as e:
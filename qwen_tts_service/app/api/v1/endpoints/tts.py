@@ -1,50 +1,42 @@
 from fastapi import APIRouter, HTTPException, File, UploadFile, Form
 from typing import List, Union, Optional
-from app.models.requests import VoiceDesignRequest, VoiceCloneRequest, CustomVoiceRequest, LanguageEnum, LANGUAGE_MAP
-from app.models.responses import TTSResponse, TTSResponseItem
-from app.services.tts_engine import tts_engine
-import base64
+from app.models.requests import VoiceDesignRequest, VoiceCloneRequest, CustomVoiceRequest, LanguageEnum, ResponseFormatEnum, OutputFormatEnum
+from app.models.responses import TTSResponse
+from app.services.audio_response import build_tts_response
+from app.services.tts_cache import tts_cache
+from app.services.gpu_worker import gpu_worker
+from app.services.worker_registry import WorkerUnavailableError
 import time
+import logging
 
 router = APIRouter()
-
-from app.services.file_store import file_store
+logger = logging.getLogger(__name__)
 
 @router.post("/voice-design", response_model=TTSResponse)
 async def generate_voice_design(request: VoiceDesignRequest):
     """
     Generate audio from text description (Voice Design).
-    Returns base64 encoded WAV audio list.
+    Returns base64 encoded WAV audio list, URLs only or raw audio (see response_format).
     """
     try:
         start_time = time.perf_counter()
-        # Convert Enum to string for internal engine
-        lang = request.language
-        if isinstance(lang, list):
-            lang = [LANGUAGE_MAP.get(l, "Auto") for l in lang]
-        elif isinstance(lang, LanguageEnum):
-            lang = LANGUAGE_MAP.get(lang, "Auto")
-            
-        audio_bytes_list = tts_engine.generate_voice_design(
+        # Joins concurrent requests in the GPU worker's next batch
+        audio_bytes_list = await gpu_worker.run_sync(
+            "voice_design",
             text=request.text,
             instruct=request.instruct,
-            language=lang,
-            temperature=request.temperature
+            language=request.language,
+            temperature=request.temperature,
+            seed=request.seed
         )
         
-        items = []
-        for audio in audio_bytes_list:
-            # Save to file store and get URL
-            file_id = file_store.save(audio, "voice_design.wav")
-            url = f"/api/v1/files/{file_id}"
-            
-            items.append(TTSResponseItem(
-                audio_base64=base64.b64encode(audio).decode('utf-8'),
-                url=url
-            ))
-            
         execution_time = time.perf_counter() - start_time
-        return TTSResponse(items=items, performance=execution_time)
+        return await build_tts_response(
+            audio_bytes_list, request.response_format, "voice_design.wav", execution_time, None,
+            output_format=request.output_format
+        )
+    except WorkerUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=f"Invalid Input: {str(e)}")
     except Exception as e:
@@ -54,38 +46,27 @@ async def generate_voice_design(request: VoiceDesignRequest):
 async def generate_custom_voice(request: CustomVoiceRequest):
     """
     Generate audio using a specific speaker (Custom Voice).
-    Returns base64 encoded WAV audio list.
+    Returns base64 encoded WAV audio list, URLs only or raw audio (see response_format).
     """
     try:
         start_time = time.perf_counter()
-        # Convert Enum to string for internal engine
-        lang = request.language
-        if isinstance(lang, list):
-            lang = [LANGUAGE_MAP.get(l, "Auto") for l in lang]
-        elif isinstance(lang, LanguageEnum):
-            lang = LANGUAGE_MAP.get(lang, "Auto")
-
-        audio_bytes_list = tts_engine.generate_custom_voice(
+        audio_bytes_list = await gpu_worker.run_sync(
+            "custom_voice",
             text=request.text,
             speaker=request.speaker,
-            language=lang,
+            language=request.language,
             instruct=request.instruct,
-            temperature=request.temperature
+            temperature=request.temperature,
+            seed=request.seed
         )
         
-        items = []
-        for audio in audio_bytes_list:
-            # Save to file store and get URL
-            file_id = file_store.save(audio, "custom_voice.wav")
-            url = f"/api/v1/files/{file_id}"
-            
-            items.append(TTSResponseItem(
-                audio_base64=base64.b64encode(audio).decode('utf-8'),
-                url=url
-            ))
-            
         execution_time = time.perf_counter() - start_time
-        return TTSResponse(items=items, performance=execution_time)
+        return await build_tts_response(
+            audio_bytes_list, request.response_format, "custom_voice.wav", execution_time, None,
+            output_format=request.output_format
+        )
+    except WorkerUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=f"Invalid Input: {str(e)}")
     except Exception as e:
@@ -98,45 +79,39 @@ async def generate_voice_clone_file(
     ref_text: Optional[str] = Form(None),
     language: LanguageEnum = Form(LanguageEnum.AUTO),
     custom_id: Optional[str] = Form(None),
-    temperature: Optional[float] = Form(0.3) # Added temperature parameter
+    temperature: Optional[float] = Form(0.3), # Added temperature parameter
+    seed: Optional[int] = Form(None),
+    response_format: ResponseFormatEnum = Form(ResponseFormatEnum.JSON),
+    output_format: OutputFormatEnum = Form(OutputFormatEnum.WAV)
 ):
     """
     Clone a voice from an uploaded reference audio file.
-    Returns base64 encoded WAV audio list.
+    Returns base64 encoded WAV audio list, URLs only or raw audio (see response_format).
     """
     try:
         start_time = time.perf_counter()
         audio_content = await ref_audio.read() # Renamed 'content' to 'audio_content' as per instruction
         
-        # Map language code to full name
-        engine_lang = LANGUAGE_MAP.get(language, "Auto")
-        
         # Pass temperature to engine (defaulting to 0.3 for this endpoint as it uses form fields)
         temp = float(temperature) if temperature is not None else 0.3
         
-        audio_bytes_list = tts_engine.generate_voice_clone(
+        audio_bytes_list = await gpu_worker.run_sync(
+            "voice_clone",
             text=text,
             ref_audio=audio_content, # Changed from 'content' to 'audio_content'
             ref_text=ref_text,
-            language=engine_lang, # Kept original 'engine_lang'
-            temperature=temp
+            language=language,
+            temperature=temp,
+            seed=seed
         )
         
-        items = []
-        # Single item response for file upload endpoint
-        for audio in audio_bytes_list:
-             # Save to file store and get URL
-             file_id = file_store.save(audio, "voice_clone.wav")
-             url = f"/api/v1/files/{file_id}"
-             
-             items.append(TTSResponseItem(
-                 audio_base64=base64.b64encode(audio).decode('utf-8'),
-                 url=url,
-                 custom_id=custom_id
-             ))
-             
         execution_time = time.perf_counter() - start_time
-        return TTSResponse(items=items, performance=execution_time)
+        return await build_tts_response(
+            audio_bytes_list, response_format, "voice_clone.wav", execution_time, custom_id,
+            output_format=output_format
+        )
+    except WorkerUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=f"Invalid Input: {str(e)}")
     except Exception as e:
@@ -148,59 +123,36 @@ async def generate_voice_clone_file(
 async def generate_voice_clone(request: VoiceCloneRequest):
     """
     Clone a voice from reference audio (path, URL, or File URI).
-    Returns base64 encoded WAV audio list with custom IDs if provided.
+    Returns base64 encoded WAV audio list with custom IDs if provided, URLs only or raw audio (see response_format).
     """
     try:
         start_time = time.perf_counter()
-        # Convert Enum to string for internal engine
-        lang = request.language
-        if isinstance(lang, list):
-            lang = [LANGUAGE_MAP.get(l, "Auto") for l in lang]
-        elif isinstance(lang, LanguageEnum):
-            lang = LANGUAGE_MAP.get(lang, "Auto")
-
-        audio_bytes_list = tts_engine.generate_voice_clone(
+        audio_bytes_list = await gpu_worker.run_sync(
+            "voice_clone",
             text=request.text,
             ref_audio=request.ref_audio, # Pass raw (ID or path), engine will resolve
             ref_text=request.ref_text,
-            language=lang,
-            temperature=request.temperature
+            language=request.language,
+            temperature=request.temperature,
+            seed=request.seed
         )
         
-        # Handle response mapping
-        items = []
-        
-        # Normalize custom_id to a list if it was a single string, or create list of None
-        custom_ids = request.custom_id
-        if custom_ids is None:
-            custom_ids = [None] * len(audio_bytes_list)
-        elif isinstance(custom_ids, str):
-             # If single string passed but multiple audios generated (batch text with single ID?), 
-             # usually likely means single mode, but good to be safe.
-             custom_ids = [custom_ids] * len(audio_bytes_list)
-        
-        # Ensure lengths match just in case
-        if len(custom_ids) < len(audio_bytes_list):
-            custom_ids.extend([None] * (len(audio_bytes_list) - len(custom_ids)))
-            
-        for audio, cid in zip(audio_bytes_list, custom_ids):
-            # Save to file store and get URL
-            file_id = file_store.save(audio, "voice_clone.wav")
-            url = f"/api/v1/files/{file_id}"
-            print(f"DEBUG: Generated batch item {cid or 'N/A'} -> {url}", flush=True)
-            
-            items.append(TTSResponseItem(
-                audio_base64=base64.b64encode(audio).decode('utf-8'),
-                url=url,
-                custom_id=cid
-            ))
-            
         execution_time = time.perf_counter() - start_time
-        return TTSResponse(items=items, performance=execution_time)
+        return await build_tts_response(
+            audio_bytes_list, request.response_format, "voice_clone.wav", execution_time, request.custom_id,
+            output_format=request.output_format
+        )
+    except WorkerUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=f"Invalid Input: {str(e)}")
     except Exception as e:
-        import traceback
-        err_trace = traceback.format_exc()
-        print(f"ERROR: {err_trace}", flush=True)
-        raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}\n{err_trace}")
+        logger.exception(f"Voice clone failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
+
+@router.get("/tts/cache")
+async def get_tts_cache_stats():
+    """
+    Hit-rate and size statistics for the deterministic TTS output cache.
+    """
+    return tts_cache.stats()
@@ -18,33 +18,120 @@ class Settings(BaseSettings):
     
     # Device Configuration
     DEVICE: str = "cuda:0"
+    # Multi-GPU: one GPU worker thread per device, e.g. "cuda:0,cuda:1" (empty = DEVICE only)
+    DEVICES: str = ""
+    # Engine placement, e.g. "tts=cuda:0,asr=cuda:1,diarization=cuda:1,denoiser=cpu,super_res=cpu".
+    # Operations of a GPU-pinned engine are queued for that device's worker; the rest go to any worker
+    DEVICE_AFFINITY: str = ""
+    CPU_STAGE_WORKERS: int = 4 # Threads per batch for CPU-placed denoise / upsample stages
+
+    # Engine Backends: "real" loads the models; "stub" serves deterministic synthetic audio /
+    # transcripts with tunable cost, for load-testing the queue, scheduler and API without models
+    ENGINE_BACKEND: str = "real"
+    ENGINE_BACKEND_OVERRIDES: str = "" # Per engine, e.g. "asr=stub,diarization=stub"
+    STUB_LOAD_MS: float = 0.0 # Simulated model load time
+    STUB_CALL_LATENCY_MS: float = 20.0 # Fixed cost of each engine call (one batch)
+    STUB_ITEM_LATENCY_MS: float = 5.0 # Added per item in the batch
+    STUB_REALTIME_FACTOR: float = 0.0 # Added seconds per second of audio in or out
+    STUB_MODEL_MB: int = 0 # Host memory each stub model holds while loaded
+
+    # Model Residency (VRAM budget shared by TTS variants, ASR, diarization, denoiser, upsampler)
+    MODEL_VRAM_BUDGET_GB: float = 0.0 # 0 = derive from device memory * MODEL_VRAM_BUDGET_FRACTION
+    MODEL_VRAM_BUDGET_FRACTION: float = 0.6 # Leaves headroom for activations / KV cache
+    MODEL_EVICTION_POLICY: str = "lru" # "lru" or "cost" (evict cheapest-to-reload first)
+    MODEL_WARM_TIER: str = "pinned" # "off", "pinned" (host RAM) or "mmap" (file-backed cache)
+    MODEL_HOST_CACHE_GB: float = 16.0 # Pinned host RAM available to the warm tier
+    MODEL_MMAP_CACHE_DIR: str = "/tmp/model_cache"
     
     # Audio Pipeline Configuration
     RESAMPLE_TARGET_SR: int = 48000
     RESAMPLE_MAX_WORKERS: int = 3
     NOISE_REMOVAL_MAX_WORKERS: int = 3
     TTS_MAX_NEW_TOKENS: int = 512 # Caps generation to prevent hallucinations
+
+    # TTS Output Cache (opt-in; only used when a seed is pinned or temperature is 0)
+    TTS_CACHE_ENABLED: bool = False
+    TTS_CACHE_MAX_MB: int = 512
     
     # Security
     API_KEY: Optional[str] = None
     
     # Async Queue Configuration
-    REDIS_URL: str = "redis://localhost:6379/0"
+    REDIS_URL: str = "redis://localhost:6379/0" # "memory://" = in-process stand-in (one process, no persistence)
     QUEUE_MAX_BATCH_SIZE: int = 8
     QUEUE_POLL_INTERVAL: float = 0.1
 
+    # Threads that run blocking engine calls for the synchronous endpoints
+    INFERENCE_MAX_WORKERS: int = 4
+
+    # Synchronous TTS/ASR requests join the GPU worker's batches; the oldest
+    # waiting request is held at most this long for others to coalesce with it
+    SYNC_COALESCE_ENABLED: bool = True
+    SYNC_COALESCE_MAX_WAIT_MS: int = 15
+
+    # GPU worker placement: False when workers run as separate `python -m app.worker`
+    # processes (one per GPU / node) and the API scales to several uvicorn workers.
+    # Synchronous requests then travel through the Redis queue and wait for a reply.
+    RUN_GPU_WORKER_IN_API: bool = True
+    WORKER_HEARTBEAT_INTERVAL_S: float = 5.0
+    WORKER_HEARTBEAT_TTL_S: float = 15.0 # Workers silent for longer count as gone
+    SYNC_REMOTE_POLL_MS: int = 10 # How often the API's reply thread checks for replies from worker processes
+    SYNC_REMOTE_TIMEOUT_S: float = 600.0
+
+    # Processes that transcode WAV output to flac/opus/mp3/pcm16
+    AUDIO_ENCODER_WORKERS: int = 2
+
+    # Shared decode/resample pool and its decoded-waveform cache
+    AUDIO_LOADER_WORKERS: int = 4
+    AUDIO_LOADER_CACHE_MB: int = 1024
+
+    # Observability: Prometheus text exposition at /metrics (unauthenticated, like /health)
+    METRICS_ENABLED: bool = True
+    # Tracing: spans for HTTP requests and each queue item (wait, load, inference, postprocess, persist)
+    TRACING_ENABLED: bool = False
+    TRACE_EXPORT_PATH: Optional[str] = "/tmp/traces.jsonl" # JSONL span file (None to disable)
+    TRACE_OTLP_ENDPOINT: Optional[str] = None # OTLP/HTTP JSON collector, e.g. http://localhost:4318/v1/traces
+    TRACE_SERVICE_NAME: str = "qwen-tts-api"
+
     # ASR Configuration
     # Mapping shared models volume
     ASR_MODEL_ROOT: str = "/app/models/Qwen3-ASR"
     ENABLE_ASR: bool = True
     ASR_MAX_BATCH_SIZE: int = 8 # Safe default for batching
+    # Long-form mode: files above this duration are split into VAD chunks (0 = only on request)
+    ASR_LONG_FORM_THRESHOLD_S: float = 180.0
+    ASR_CHUNK_MAX_SECONDS: float = 30.0
+    ASR_VAD_MIN_SILENCE_MS: int = 300
+    ASR_VAD_MIN_DB: float = -50.0 # Frames quieter than this (dBFS) are never speech, however quiet the floor
+    # WebSocket streaming: re-run VAD / emit partials after this much new audio
+    ASR_STREAM_STEP_MS: int = 500
 
     # Diarization Configuration
     ENABLE_DIARIZATION: bool = True
     DIARIZATION_MODEL: str = "pyannote/speaker-diarization-3.1"
-    DIARIZATION_MAX_BATCH_SIZE: int = 4
+    DIARIZATION_MAX_BATCH_SIZE: int = 4 # Files whose segmentation windows share GPU batches
+    DIARIZATION_WINDOW_BATCH_SIZE: int = 32 # Segmentation / embedding windows per forward pass
+    DIARIZATION_LONG_FORM_THRESHOLD_S: float = 1800.0 # Longer files are diarized in windows (0 disables)
+    DIARIZATION_CHUNK_SECONDS: float = 600.0 # Window length for long-form diarization
+    DIARIZATION_CHUNK_OVERLAP_SECONDS: float = 30.0 # Overlap between consecutive windows
+    DIARIZATION_SPEAKER_LINK_THRESHOLD: float = 0.6 # Min cosine similarity to link speakers across windows
+
+    # Smart transcript 'speaker_turns' mode: diarize first, then transcribe every turn in one batch
+    ANALYZE_TURN_MERGE_GAP_S: float = 1.0 # Same-speaker segments closer than this form one turn
+    ANALYZE_TURN_MIN_SECONDS: float = 0.3 # Shorter turns are dropped
     HF_TOKEN: Optional[str] = None
 
+    # Result Cache (ASR / Diarization outputs keyed on audio content)
+    RESULT_CACHE_ENABLED: bool = True
+    RESULT_CACHE_TTL: int = 24 * 60 * 60 # Seconds; refreshed on every hit
+
+    # Startup Preloading & Warm-up
+    # Comma-separated models to load at startup, e.g. "tts:VoiceClone,asr,diarization,denoiser,super_res"
+    PRELOAD_MODELS: str = ""
+    WARMUP_ENABLED: bool = True # Run a dummy inference per preloaded model
+    WARMUP_BATCH_SIZE: int = 1
+    WARMUP_TTS_SPEAKER: str = "Vivian" # Built-in CustomVoice speaker used for the dummy inference
+
     class Config:
         env_file = ".env"
 
@@ -1,9 +1,19 @@
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, Request
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
-from app.api.v1.endpoints import tts, files, pipeline, queue, asr, diarization
+from app.api.v1.endpoints import tts, files, pipeline, queue, asr, diarization, analysis
 from app.core.security import get_api_key
 from app.services.gpu_worker import gpu_worker
+from app.services.model_manager import model_manager
+from app.services.engine_registry import ENGINE_NAMES, backend_for
+from app.services.devices import device_for, affinity
+from app.services.warmup import warmup_service
+from app.services.worker_registry import worker_registry
+from app.services.inference_executor import inference_executor
+from app.services.audio_encoder import audio_encoder
+from app.services import metrics
+from app.services.tracing import tracer, parse_traceparent, format_traceparent, new_trace_id
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -20,6 +30,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """Root span per API request; honours an incoming W3C traceparent and returns ours."""
+    if not tracer.enabled or not request.url.path.startswith(settings.API_V1_STR):
+        return await call_next(request)
+
+    trace_id, parent_id = parse_traceparent(request.headers.get("traceparent")) or (new_trace_id(), None)
+    with tracer.span(f"{request.method} {request.url.path}", trace_id=trace_id, parent_id=parent_id,
+                     **{"http.method": request.method, "http.target": request.url.path}) as span:
+        response = await call_next(request)
+        span.attributes["http.status_code"] = response.status_code
+        response.headers["traceparent"] = format_traceparent(span.trace_id, span.span_id)
+        return response
+
 # Include Router with API Key security
 app.include_router(
     files.router,
@@ -62,23 +86,89 @@ app.include_router(
     dependencies=[Depends(get_api_key)]
 )
 
-from fastapi.staticfiles import StaticFiles
-import os
+app.include_router(
+    analysis.router,
+    prefix=settings.API_V1_STR,
+    tags=["Analysis"],
+    dependencies=[Depends(get_api_key)]
+)
 
-# Serve UI (Static Files)
-# Ensure the directory exists relative to this file
-ui_path = os.path.join(os.path.dirname(__file__), "..", "ui")
-if os.path.exists(ui_path):
-    app.mount("/", StaticFiles(directory=ui_path, html=True), name="ui")
+app.include_router(
+    asr.stream_router,
+    prefix=settings.API_V1_STR,
+    tags=["ASR"]
+)
 
 @app.on_event("startup")
 async def startup_event():
+    # A bad DEVICE_AFFINITY fails the boot instead of every later submit (it is parsed lazily)
+    affinity()
+    if not settings.RUN_GPU_WORKER_IN_API:
+        # Inference lives in `python -m app.worker` processes; this one only serves HTTP
+        return
     gpu_worker.start()
+    # Preload + warm-up runs in the background so /live answers immediately
+    warmup_service.start(gpu_worker.serves)
 
 @app.on_event("shutdown")
 async def shutdown_event():
     gpu_worker.stop()
+    inference_executor.shutdown()
+    audio_encoder.shutdown()
+    tracer.shutdown()
 
 @app.get("/health")
 def health_check():
     return {"status": "ok", "version": settings.VERSION}
+
+@app.get("/live")
+def liveness_probe():
+    """Process is up and the event loop is serving."""
+    return {"status": "alive", "version": settings.VERSION}
+
+@app.get("/ready")
+def readiness_probe():
+    """
+    503 until every model in PRELOAD_MODELS is loaded and warmed up, or, with
+    standalone workers, until at least one registered worker is ready.
+    """
+    if not settings.RUN_GPU_WORKER_IN_API:
+        workers = worker_registry.workers()
+        ready = any(w.get("ready") and w.get("alive") for w in workers)
+        return JSONResponse(status_code=200 if ready else 503, content={"ready": ready, "workers": workers})
+
+    report = warmup_service.report()
+    report["gpu_worker_alive"] = gpu_worker.is_alive()
+    status_code = 200 if report["ready"] and report["gpu_worker_alive"] else 503
+    return JSONResponse(status_code=status_code, content=report)
+
+@app.get("/models", dependencies=[Depends(get_api_key)])
+def model_residency():
+    """VRAM residency, warm-tier contents and swap timings from the ModelManager."""
+    stats = model_manager.stats()
+    stats["backends"] = {name: backend_for(name) for name in ENGINE_NAMES}
+    stats["placement"] = {name: device_for(name) for name in ENGINE_NAMES}
+    stats["lanes"] = gpu_worker.lanes()
+    return stats
+
+@app.get("/workers", dependencies=[Depends(get_api_key)])
+def gpu_workers():
+    """Standalone GPU worker processes with a live heartbeat."""
+    return {"in_api": settings.RUN_GPU_WORKER_IN_API, "workers": worker_registry.workers()}
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """Queue, batch, stage latency, model swap, GPU memory and file store metrics."""
+    if not settings.METRICS_ENABLED:
+        return JSONResponse(status_code=404, content={"detail": "Metrics disabled"})
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE_LATEST)
+
+from fastapi.staticfiles import StaticFiles
+import os
+
+# Serve UI (Static Files)
+# Mounted last: a mount at "/" matches every path and would shadow routes declared after it
+# Ensure the directory exists relative to this file
+ui_path = os.path.join(os.path.dirname(__file__), "..", "ui")
+if os.path.exists(ui_path):
+    app.mount("/", StaticFiles(directory=ui_path, html=True), name="ui")
@@ -0,0 +1,75 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from enum import Enum
+from .asr_models import ASRLanguageEnum
+from .diarization_models import DiarizationSegment
+
+class AlignmentStrategyEnum(str, Enum):
+    MIDPOINT = "midpoint"   # Segment holding the word midpoint
+    OVERLAP = "overlap"     # Speaker covering most of the word
+
+class AnalyzeModeEnum(str, Enum):
+    TIMESTAMPS = "timestamps"        # Whole-file ASR with word timestamps, aligned to diarization
+    SPEAKER_TURNS = "speaker_turns"  # Diarize first, then transcribe every speaker turn in one batch
+
+class AnalyzeFileItem(BaseModel):
+    file_id: str
+    custom_id: Optional[str] = None
+    num_speakers: Optional[int] = None
+    min_speakers: Optional[int] = None
+    max_speakers: Optional[int] = None
+
+class AnalyzeBatchRequest(BaseModel):
+    files: List[AnalyzeFileItem]
+    language: ASRLanguageEnum = ASRLanguageEnum.AUTO
+    long_form: Optional[bool] = None  # VAD-chunked transcription; None = auto by duration
+    alignment: AlignmentStrategyEnum = AlignmentStrategyEnum.MIDPOINT
+    mode: AnalyzeModeEnum = AnalyzeModeEnum.TIMESTAMPS
+
+class SpeakerTurn(BaseModel):
+    speaker: str
+    start: float
+    end: float
+    text: str
+
+class AnalyzeResultItem(BaseModel):
+    file_id: str
+    custom_id: Optional[str] = None
+    text: str
+    language: str
+    num_speakers: int
+    turns: List[SpeakerTurn]
+    error: Optional[str] = None           # Set when this file failed; the other items are unaffected
+
+class AnalyzeBatchResponse(BaseModel):
+    items: List[AnalyzeResultItem]
+    performance: float
+
+class AnalyzeSingleResponse(BaseModel):
+    text: str
+    language: str
+    num_speakers: int
+    turns: List[SpeakerTurn]
+    performance: float
+
+class AlignWord(BaseModel):
+    start: float
+    end: float
+    text: str
+
+class AlignRequest(BaseModel):
+    """
+    Transcript and diarization to align, inline or as file_ids of queue results
+    (the JSON written by 'transcribe' with return_timestamps and by 'diarize').
+    """
+    text: Optional[str] = None
+    timestamps: Optional[List[AlignWord]] = None
+    segments: Optional[List[DiarizationSegment]] = None
+    transcript_file_id: Optional[str] = None
+    diarization_file_id: Optional[str] = None
+    alignment: AlignmentStrategyEnum = AlignmentStrategyEnum.MIDPOINT
+
+class AlignResponse(BaseModel):
+    num_speakers: int
+    turns: List[SpeakerTurn]
+    performance: float
@@ -43,6 +43,7 @@ class ASRBatchRequest(BaseModel):
     files: List[ASRFileItem]
     language: ASRLanguageEnum = ASRLanguageEnum.AUTO
     return_timestamps: bool = False
+    long_form: Optional[bool] = None  # VAD-chunked transcription; None = auto by duration
 
 class ASRTimestamp(BaseModel):
     start_time: float
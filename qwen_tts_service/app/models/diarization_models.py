@@ -22,6 +22,7 @@ class DiarizeResultItem(BaseModel):
     custom_id: Optional[str] = None
     segments: List[DiarizationSegment]
     num_speakers: int
+    error: Optional[str] = None           # Set when this file failed; the other items are unaffected
 
 class DiarizeBatchResponse(BaseModel):
     items: List[DiarizeResultItem]
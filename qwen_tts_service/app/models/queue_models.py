@@ -1,10 +1,10 @@
 from pydantic import BaseModel, Field
 from typing import List, Optional, Union, Literal
-from .requests import LanguageEnum
+from .requests import LanguageEnum, OutputFormatEnum
 
 class QueueItemRequest(BaseModel):
     text: str
-    operation: Literal["voice_design", "voice_clone", "voice_clone_enhanced", "custom_voice", "transcribe", "diarize"]
+    operation: Literal["voice_design", "voice_clone", "voice_clone_enhanced", "custom_voice", "transcribe", "diarize", "analyze"]
     # Operation-specific fields
     ref_audio: Optional[str] = None       # file_id or path
     ref_text: Optional[str] = None
@@ -12,11 +12,16 @@ class QueueItemRequest(BaseModel):
     speaker: Optional[str] = None
     language: LanguageEnum = LanguageEnum.AUTO
     temperature: float = 1.0
+    seed: Optional[int] = None            # Pin for reproducible (and cacheable) TTS output
+    output_format: OutputFormatEnum = OutputFormatEnum.WAV  # Codec for TTS results
     num_speakers: Optional[int] = None
     min_speakers: Optional[int] = None
     max_speakers: Optional[int] = None
     custom_id: Optional[str] = None       # user-defined tracking ID
     return_timestamps: bool = False      # Whether to return word-level timestamps for ASR
+    long_form: Optional[bool] = None     # Chunked ASR for long recordings (None = auto by duration)
+    alignment: Literal["midpoint", "overlap"] = "midpoint"  # Speaker attribution for 'analyze'
+    analyze_mode: Literal["timestamps", "speaker_turns"] = "timestamps"  # 'analyze': align timestamps or transcribe per turn
 
 class QueueBatchSubmitRequest(BaseModel):
     items: List[QueueItemRequest]
@@ -34,6 +39,7 @@ class QueueItemStatus(BaseModel):
     status: Literal["queued", "processing", "done", "error"]
     url: Optional[str] = None
     error: Optional[str] = None
+    trace_id: Optional[str] = None        # Set when tracing is enabled (look up its spans)
 
 class QueueBatchStatusResponse(BaseModel):
     batch_id: str
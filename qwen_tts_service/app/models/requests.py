@@ -17,6 +17,18 @@ class LanguageEnum(str, Enum):
     IT = "it"
     NL = "nl"
 
+class ResponseFormatEnum(str, Enum):
+    JSON = "json"       # base64 audio + file URL (default)
+    URL = "url"         # file URL only
+    BINARY = "binary"   # raw audio/wav (single item) or multipart/mixed (batch)
+
+class OutputFormatEnum(str, Enum):
+    WAV = "wav"         # engine output, unchanged
+    PCM16 = "pcm16"     # 16-bit WAV
+    FLAC = "flac"
+    OPUS = "opus"       # Ogg/Opus
+    MP3 = "mp3"
+
 # Internal mapping for Qwen-TTS engine
 LANGUAGE_MAP = {
     LanguageEnum.AUTO: "Auto",
@@ -38,6 +50,9 @@ class VoiceDesignRequest(BaseModel):
     instruct: Union[str, List[str]]
     language: Union[LanguageEnum, List[LanguageEnum]] = LanguageEnum.AUTO
     temperature: float = 1.0
+    seed: Optional[int] = None # Pin for reproducible (and cacheable) output
+    response_format: ResponseFormatEnum = ResponseFormatEnum.JSON
+    output_format: OutputFormatEnum = OutputFormatEnum.WAV
     
     class Config:
         json_schema_extra = {
@@ -55,6 +70,9 @@ class CustomVoiceRequest(BaseModel):
     language: Union[LanguageEnum, List[LanguageEnum]] = LanguageEnum.AUTO
     instruct: Optional[Union[str, List[str]]] = None
     temperature: float = 1.0
+    seed: Optional[int] = None # Pin for reproducible (and cacheable) output
+    response_format: ResponseFormatEnum = ResponseFormatEnum.JSON
+    output_format: OutputFormatEnum = OutputFormatEnum.WAV
 
     class Config:
         json_schema_extra = {
@@ -74,6 +92,9 @@ class VoiceCloneRequest(BaseModel):
     language: Union[LanguageEnum, List[LanguageEnum]] = LanguageEnum.AUTO
     custom_id: Optional[Union[str, List[str]]] = None
     temperature: float = 1.0
+    seed: Optional[int] = None # Pin for reproducible (and cacheable) output
+    response_format: ResponseFormatEnum = ResponseFormatEnum.JSON
+    output_format: OutputFormatEnum = OutputFormatEnum.WAV
 
     class Config:
         json_schema_extra = {
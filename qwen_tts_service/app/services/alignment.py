@@ -0,0 +1,228 @@
+import re
+import bisect
+import numpy as np
+from typing import List, Dict, Any, Optional, Tuple
+
+# --- Alignment Tuning ---
+PUNCT_LOOKAHEAD = 50     # Max characters between two words in the full text
+PUNCT_BACKTRACK = 5      # Tolerated drift when a word is not found ahead
+UNKNOWN_SPEAKER = "Unknown"
+# ------------------------
+
+_SUFFIX_RE = re.compile(r"^.*?[.,!?;:\s]*")
+
+def _is_meta_token(text: str) -> bool:
+    """Language tags like <|en|> emitted by the aligner."""
+    return text.startswith("<|") and text.endswith("|")
+
+def align_punctuation(words: List[Dict[str, Any]], text: str) -> List[Dict[str, Any]]:
+    """
+    Attach the punctuation and spacing of the full transcript to timed words.
+    Each returned word gets a "punctuated" field holding the word plus everything
+    up to the next word in the full text (case-insensitive, forward scan).
+    """
+    lower = text.lower()
+    cleaned = [
+        (w, w["text"].lower().strip()) for w in words
+        if not _is_meta_token(w["text"]) and w["text"].strip()
+    ]
+
+    result = []
+    pos = 0
+    for i, (word, clean) in enumerate(cleaned):
+        start = lower.find(clean, pos)
+        if start == -1:
+            start = lower.find(clean, max(0, pos - PUNCT_BACKTRACK))
+        if start == -1:
+            result.append(dict(word, punctuated=word["text"] + " "))
+            continue
+
+        end = start + len(clean)
+        if i + 1 < len(cleaned):
+            next_start = lower.find(cleaned[i + 1][1], end)
+            if next_start != -1 and next_start - end < PUNCT_LOOKAHEAD:
+                punctuated = text[start:next_start]
+                pos = next_start
+            else:
+                # Next word missing or too far: the word plus its trailing punctuation
+                punctuated = _SUFFIX_RE.match(text[start:end + 5]).group(0)
+                if not punctuated.endswith(" "):
+                    punctuated += " "
+                pos = start + len(punctuated)
+        else:
+            punctuated = text[start:]
+            pos = len(text)
+
+        result.append(dict(word, punctuated=punctuated))
+    return result
+
+class SegmentIndex:
+    """
+    Point-in-interval lookup over diarization segments.
+    Segments are sorted by start; a running maximum of the end times bounds the
+    backwards scan, so a lookup is O(log n + k) for k overlapping segments
+    instead of a scan over every segment.
+    """
+    def __init__(self, segments: List[Dict[str, Any]]):
+        self.segments = sorted(segments, key=lambda s: (s["start"], s["end"]))
+        self.starts = [s["start"] for s in self.segments]
+        self.max_ends = []
+        running = float("-inf")
+        for s in self.segments:
+            running = max(running, s["end"])
+            self.max_ends.append(running)
+
+    def find(self, t: float) -> Optional[Dict[str, Any]]:
+        """The earliest-starting segment containing t, or None."""
+        i = bisect.bisect_right(self.starts, t) - 1
+        found = None
+        while i >= 0 and self.max_ends[i] >= t:
+            if self.segments[i]["end"] >= t:
+                found = self.segments[i]
+            i -= 1
+        return found
+
+def _locate(index: SegmentIndex, ends: np.ndarray, times: np.ndarray) -> np.ndarray:
+    """
+    Vectorized SegmentIndex.find: index of the earliest-starting segment holding
+    each time, -1 when none. The last segment starting before t answers most
+    lookups at once; only times also covered by an earlier segment (overlapping
+    speech) go through the scalar scan.
+    """
+    starts = np.asarray(index.starts, dtype=np.float64)
+    max_ends = np.asarray(index.max_ends, dtype=np.float64)
+    cand = np.searchsorted(starts, times, side="right") - 1
+    valid = cand >= 0
+    safe = np.where(valid, cand, 0)
+    hit = valid & (ends[safe] >= times)
+    prev_max = np.where(safe > 0, max_ends[np.maximum(safe - 1, 0)], -np.inf)
+    ambiguous = valid & (prev_max >= times)
+
+    out = np.where(hit, cand, -1)
+    position = {id(seg): k for k, seg in enumerate(index.segments)}
+    for w in np.flatnonzero(ambiguous):
+        segment = index.find(float(times[w]))
+        out[w] = position[id(segment)] if segment is not None else -1
+    return out
+
+def _word_times(words: List[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+    starts = np.fromiter((w["start"] for w in words), dtype=np.float64, count=len(words))
+    ends = np.fromiter((w["end"] for w in words), dtype=np.float64, count=len(words))
+    return starts, ends
+
+def _assign_midpoint(words: List[Dict[str, Any]], segments: List[Dict[str, Any]]) -> List[str]:
+    """Segment holding the word midpoint, else the word start, else Unknown."""
+    index = SegmentIndex(segments)
+    seg_ends = np.asarray([s["end"] for s in index.segments], dtype=np.float64)
+    w_start, w_end = _word_times(words)
+
+    owner = _locate(index, seg_ends, (w_start + w_end) / 2.0)
+    missing = owner < 0
+    if missing.any():
+        owner[missing] = _locate(index, seg_ends, w_start[missing])
+
+    labels = [s["speaker"] for s in index.segments] + [UNKNOWN_SPEAKER]
+    return [labels[k] for k in owner.tolist()]  # -1 picks UNKNOWN_SPEAKER
+
+def speaker_coverage(words: List[Dict[str, Any]], segments: List[Dict[str, Any]]) -> Tuple[List[str], np.ndarray]:
+    """
+    Seconds of each word covered by each speaker: (speakers, [n_words, n_speakers]).
+    A speaker's segments are merged into disjoint intervals with a cumulative
+    duration F(t); the coverage of [a, b] is F(b) - F(a), evaluated for all
+    words at once with searchsorted.
+    """
+    speakers = sorted({s["speaker"] for s in segments})
+    w_start, w_end = _word_times(words)
+    coverage = np.zeros((len(words), len(speakers)), dtype=np.float64)
+
+    for k, speaker in enumerate(speakers):
+        merged: List[List[float]] = []
+        for s in sorted((s for s in segments if s["speaker"] == speaker), key=lambda s: s["start"]):
+            if merged and s["start"] <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], s["end"])
+            else:
+                merged.append([s["start"], s["end"]])
+        iv = np.asarray(merged, dtype=np.float64)
+        lengths = iv[:, 1] - iv[:, 0]
+        cum = np.concatenate(([0.0], np.cumsum(lengths)))
+
+        def covered(t: np.ndarray) -> np.ndarray:
+            i = np.searchsorted(iv[:, 0], t, side="right") - 1
+            safe = np.maximum(i, 0)
+            inside = np.clip(t - iv[safe, 0], 0.0, lengths[safe])
+            return np.where(i >= 0, cum[safe] + inside, 0.0)
+
+        coverage[:, k] = covered(w_end) - covered(w_start)
+    return speakers, coverage
+
+def _assign_overlap(words: List[Dict[str, Any]], segments: List[Dict[str, Any]]) -> List[str]:
+    """Speaker covering most of each word; zero-length or uncovered words fall back to midpoint."""
+    speakers, coverage = speaker_coverage(words, segments)
+    best = coverage.argmax(axis=1)
+    best_cover = coverage[np.arange(len(words)), best]
+
+    result = [speakers[k] for k in best.tolist()]
+    fallback = np.flatnonzero(best_cover <= 0)
+    if fallback.size:
+        for w, speaker in zip(fallback.tolist(), _assign_midpoint([words[w] for w in fallback], segments)):
+            result[w] = speaker
+    return result
+
+STRATEGIES = {
+    "midpoint": _assign_midpoint,
+    "overlap": _assign_overlap,
+}
+
+def assign_speakers(words: List[Dict[str, Any]], segments: List[Dict[str, Any]],
+                    strategy: str = "midpoint") -> List[str]:
+    """
+    Speaker per word.
+    - midpoint: the segment holding the word midpoint, else its start time
+    - overlap: the speaker whose segments cover most of the word, so words
+      straddling a turn change or overlapping speech go to the dominant speaker
+    """
+    if not words:
+        return []
+    if not segments:
+        return [UNKNOWN_SPEAKER] * len(words)
+    return STRATEGIES[strategy](words, segments)
+
+def build_turns(asr_result: Dict[str, Any], segments: List[Dict[str, Any]],
+                strategy: str = "midpoint") -> List[Dict[str, Any]]:
+    """
+    Merge a timestamped transcript and diarization segments into speaker turns:
+    consecutive words of the same speaker form one {speaker, start, end, text}.
+    """
+    words = align_punctuation(asr_result.get("timestamps") or [], asr_result.get("text", ""))
+    speakers = assign_speakers(words, segments, strategy)
+
+    turns: List[Dict[str, Any]] = []
+    for word, speaker in zip(words, speakers):
+        if turns and turns[-1]["speaker"] == speaker:
+            turns[-1]["text"] += word["punctuated"]
+            turns[-1]["end"] = word["end"]
+        else:
+            turns.append({"speaker": speaker, "start": word["start"], "end": word["end"], "text": word["punctuated"]})
+
+    for turn in turns:
+        turn["text"] = turn["text"].strip()
+    return turns
+
+def speaker_turn_spans(segments: List[Dict[str, Any]], merge_gap: float, min_duration: float,
+                       max_duration: float) -> List[Dict[str, Any]]:
+    """
+    Turn diarization segments into ASR-sized speaker turns: consecutive segments
+    of the same speaker closer than merge_gap are joined while the turn stays
+    under max_duration. Turns shorter than min_duration are dropped; longer
+    single segments are kept whole and split later by the caller.
+    """
+    turns: List[Dict[str, Any]] = []
+    for s in sorted(segments, key=lambda s: (s["start"], s["end"])):
+        last = turns[-1] if turns else None
+        if (last is not None and last["speaker"] == s["speaker"]
+                and s["start"] - last["end"] <= merge_gap
+                and max(last["end"], s["end"]) - last["start"] <= max_duration):
+            last["end"] = max(last["end"], s["end"])
+        else:
+            turns.append({"speaker": s["speaker"], "start": s["start"], "end": s["end"]})
+    return [t for t in turns if t["end"] - t["start"] >= min_duration]
@@ -4,11 +4,16 @@ import gc
 import os
 import time
 import threading
-import soundfile as sf
-from pathlib import Path
-from typing import List, Union, Optional
-from qwen_asr import Qwen3ASRModel
+import numpy as np
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import List, Union, Optional, Tuple, Any
 from app.core.config import settings
+from app.services.model_manager import model_manager
+from app.services import metrics
+from app.services.engine_registry import create_engine
+from app.services.devices import device_for
+from app.services.audio_loader import audio_loader
 
 logger = logging.getLogger(__name__)
 
@@ -19,8 +24,34 @@ ASR_DTYPE = torch.bfloat16
 ASR_ATTN_IMPL = "flash_attention_2"
 ASR_MAX_NEW_TOKENS = 4096
 DENOISE_ASR_INPUT = True
+ASR_SR = 16000
+# Languages written without spaces between merged chunks
+UNSPACED_LANGUAGES = {"Chinese", "Cantonese", "Japanese", "Thai"}
 # -------------------
 
+@dataclass
+class ChunkTimestamp:
+    text: str
+    start_time: float
+    end_time: float
+
+@dataclass
+class LongFormResult:
+    """Merged result of a chunked transcription; same attributes as a Qwen3-ASR result."""
+    text: str
+    language: str
+    time_stamps: List[ChunkTimestamp] = field(default_factory=list)
+
+def asr_result_to_dict(res) -> dict:
+    """Convert a Qwen3-ASR result into the JSON shape used by the queue and the result cache."""
+    out = {"text": res.text, "language": res.language}
+    if hasattr(res, 'time_stamps') and res.time_stamps:
+        out["timestamps"] = [
+            {"start": ts.start_time, "end": ts.end_time, "text": ts.text}
+            for ts in res.time_stamps
+        ]
+    return out
+
 class ASREngine:
     _instance = None
     _lock = threading.Lock()
@@ -32,10 +63,9 @@ class ASREngine:
         return cls._instance
     
     def _initialize(self):
-        from app.services.model_manager import model_manager
         model_manager.register_engine("asr", self)
         
-        requested_device = settings.DEVICE
+        requested_device = device_for("asr")
         has_cuda = torch.cuda.is_available() and torch.cuda.device_count() > 0
         
         if requested_device.startswith("cuda") and not has_cuda:
@@ -45,10 +75,17 @@ class ASREngine:
             self.device = requested_device
             
         self.model = None
-        self._temp_dir = Path("/tmp/asr_denoised")
-        self._temp_dir.mkdir(parents=True, exist_ok=True)
 
     def unload(self):
+        self._release_model()
+        model_manager.unloaded("asr")
+
+    def load(self):
+        """Eagerly load the ASR model (used by startup preloading)."""
+        with self._lock, model_manager.using("asr"):
+            self._ensure_model_loaded()
+
+    def _release_model(self):
         if self.model is not None:
             logger.info("Unloading ASR model to free VRAM...")
             del self.model
@@ -60,9 +97,6 @@ class ASREngine:
 
     def _ensure_model_loaded(self):
         if self.model is None:
-            from app.services.model_manager import model_manager
-            model_manager.acquire("asr")
-            
             if not settings.ENABLE_ASR:
                 raise RuntimeError("ASR is disabled in configuration.")
                 
@@ -79,68 +113,145 @@ class ASREngine:
                 aligner_source = ASR_ALIGNER_ID
 
             logger.info(f"Loading ASR model from {model_source} with aligner {aligner_source}...")
-            self.model = Qwen3ASRModel.from_pretrained(
-                model_source,
-                dtype=ASR_DTYPE,
-                device_map=self.device,
-                attn_implementation=ASR_ATTN_IMPL,
-                max_inference_batch_size=settings.ASR_MAX_BATCH_SIZE,
-                max_new_tokens=ASR_MAX_NEW_TOKENS,
-                forced_aligner=aligner_source
-            )
+            from qwen_asr import Qwen3ASRModel
+            with model_manager.loading("asr", self._release_model, self.device, target=lambda: self.model):
+                self.model = Qwen3ASRModel.from_pretrained(
+                    model_source,
+                    dtype=ASR_DTYPE,
+                    device_map=self.device,
+                    attn_implementation=ASR_ATTN_IMPL,
+                    max_inference_batch_size=settings.ASR_MAX_BATCH_SIZE,
+                    max_new_tokens=ASR_MAX_NEW_TOKENS,
+                    forced_aligner=aligner_source
+                )
             logger.info("ASR model loaded successfully.")
 
-    def _denoise_inputs(self, audio_paths: List[str]) -> List[str]:
-        from app.services.fb_denoiser import fb_denoiser
-
+    def _load_inputs(self, audio_paths: List[str]) -> List[Tuple[np.ndarray, int]]:
+        """
+        Decode the inputs to 16 kHz mono in memory through the shared loader
+        (usually already prefetched by the GPU worker) and denoise them as one
+        GPU batch when enabled. The model receives (array, sr) tuples.
+        """
         t0 = time.perf_counter()
+        decoded = audio_loader.load_many(audio_paths, ASR_SR)
+        if not DENOISE_ASR_INPUT:
+            return decoded
+
         logger.info(f"ASR Pre-processing: Denoising {len(audio_paths)} inputs on GPU")
+        clean = [(w, ASR_SR) for w in self._denoise_waveforms([w for w, _ in decoded])]
+        logger.info(f"ASR Pre-processing: Denoised {len(audio_paths)} files in {time.perf_counter() - t0:.2f}s")
+        return clean
 
-        wav_tensors = []
-        sample_rates = []
-        for path in audio_paths:
-            data, sr = sf.read(path)
-            tensor = torch.from_numpy(data[None, :]).float() if data.ndim == 1 else torch.from_numpy(data.T).float().mean(dim=0, keepdim=True)
-            wav_tensors.append(tensor)
-            sample_rates.append(sr)
+    def _is_long_form(self, path: str, long_form: Optional[bool]) -> bool:
+        """Explicit flag wins; otherwise chunk files longer than ASR_LONG_FORM_THRESHOLD_S."""
+        if long_form is not None:
+            return long_form
+        return audio_loader.is_longer_than(path, settings.ASR_LONG_FORM_THRESHOLD_S)
 
-        clean_tensors = fb_denoiser.process_batch_tensors(wav_tensors, sample_rates[0])
+    def _chunk_inputs(self, path: str) -> Tuple[List[np.ndarray], List[float]]:
+        """Split a long recording into VAD-bounded chunks; returns waveforms and start offsets (s)."""
+        from app.services.vad import speech_chunks
 
-        clean_paths = []
-        for i, tensor in enumerate(clean_tensors):
-            out_path = str(self._temp_dir / f"asr_clean_{os.getpid()}_{int(time.time())}_{i}.wav")
-            sf.write(out_path, tensor.squeeze(0).numpy(), 16000)
-            clean_paths.append(out_path)
+        audio, _ = audio_loader.load(path, ASR_SR)
+        spans = speech_chunks(audio, ASR_SR, settings.ASR_CHUNK_MAX_SECONDS, settings.ASR_VAD_MIN_SILENCE_MS)
+        chunks = [audio[start:end] for start, end in spans]
+        offsets = [start / ASR_SR for start, _ in spans]
 
-        logger.info(f"ASR Pre-processing: Denoised {len(audio_paths)} files in {time.perf_counter() - t0:.2f}s")
-        return clean_paths
+        if chunks and DENOISE_ASR_INPUT:
+            chunks = self._denoise_waveforms(chunks)
+
+        logger.info(f"ASR Engine: Long-form {path} ({len(audio) / ASR_SR:.1f}s) -> {len(chunks)} chunks")
+        return chunks, offsets
 
-    def transcribe(self, audio: Union[str, List[str]], language: Optional[Union[str, List[str]]] = None, return_timestamps: bool = False) -> List[any]:
-        with self._lock:
+    def _denoise_waveforms(self, waveforms: List[np.ndarray]) -> List[np.ndarray]:
+        """Batched GPU denoise of mono 16 kHz waveforms, kept in memory."""
+        from app.services.fb_denoiser import fb_denoiser
+        tensors = [torch.from_numpy(np.ascontiguousarray(w, dtype=np.float32))[None, :] for w in waveforms]
+        return [t.squeeze(0).numpy() for t in fb_denoiser.process_batch_tensors(tensors, ASR_SR)]
+
+    def _merge_chunks(self, results: List[Any], offsets: List[float], language_hint: Optional[str]) -> LongFormResult:
+        """Concatenate chunk transcripts and shift their timestamps back onto the file timeline."""
+        languages = [r.language for r in results if getattr(r, "language", None)]
+        language = Counter(languages).most_common(1)[0][0] if languages else (language_hint or "")
+        sep = "" if language in UNSPACED_LANGUAGES else " "
+
+        text = sep.join(r.text.strip() for r in results if r.text and r.text.strip())
+        time_stamps = []
+        for res, offset in zip(results, offsets):
+            for ts in getattr(res, "time_stamps", None) or []:
+                time_stamps.append(ChunkTimestamp(ts.text, ts.start_time + offset, ts.end_time + offset))
+        return LongFormResult(text=text, language=language, time_stamps=time_stamps)
+
+    def transcribe(self, audio: Union[str, List[str]], language: Optional[Union[str, List[str]]] = None,
+                   return_timestamps: bool = False, long_form: Optional[bool] = None) -> List[any]:
+        """
+        Transcribe a batch of files.
+        Long recordings (long_form=True, or auto above ASR_LONG_FORM_THRESHOLD_S)
+        are cut into VAD chunks of at most ASR_CHUNK_MAX_SECONDS. The chunks share
+        the model batch with the short files and are merged back per file with
+        offset-corrected timestamps, so memory stays bounded by the chunk length.
+        """
+        with self._lock, model_manager.using("asr"), metrics.stage("asr"):
             self._ensure_model_loaded()
             
             if isinstance(audio, str):
                 audio = [audio]
-                if language and isinstance(language, str):
-                    language = [language]
+            languages = language if isinstance(language, list) else [language] * len(audio)
 
-            if DENOISE_ASR_INPUT:
-                audio = self._denoise_inputs(audio)
+            long_idx = [i for i, path in enumerate(audio) if self._is_long_form(path, long_form)]
+            long_set = set(long_idx)
+            short_idx = [i for i in range(len(audio)) if i not in long_set]
+
+            short_inputs = self._load_inputs([audio[i] for i in short_idx]) if short_idx else []
+
+            # One flat model batch: whole short files first, then every long-form chunk
+            inputs = list(short_inputs)
+            input_langs = [languages[i] for i in short_idx]
+            chunk_plan = []
+            for i in long_idx:
+                chunks, offsets = self._chunk_inputs(audio[i])
+                chunk_plan.append((i, len(inputs), offsets))
+                inputs.extend((chunk, ASR_SR) for chunk in chunks)
+                input_langs.extend([languages[i]] * len(chunks))
 
-            logger.info(f"ASR Engine: Transcribing batch of {len(audio)} items")
-            results = self.model.transcribe(
-                audio=audio,
-                language=language,
+            logger.info(f"ASR Engine: Transcribing batch of {len(audio)} items ({len(inputs)} model inputs)")
+            flat = self.model.transcribe(
+                audio=inputs,
+                language=input_langs if any(input_langs) else None,
                 return_time_stamps=return_timestamps
-            )
+            ) if inputs else []
+
+            results = [None] * len(audio)
+            for pos, i in enumerate(short_idx):
+                results[i] = flat[pos]
+            for i, start, offsets in chunk_plan:
+                results[i] = self._merge_chunks(flat[start:start + len(offsets)], offsets, languages[i])
+            return results
 
+    def transcribe_waveforms(self, waveforms: List[np.ndarray], language: Optional[Union[str, List[str]]] = None,
+                             return_timestamps: bool = False) -> List[any]:
+        """
+        Transcribe in-memory mono 16 kHz waveforms (streaming sessions, speaker
+        turns); no file I/O. Inputs are fed to the model longest first so each
+        padded sub-batch holds similar lengths; results come back in input order.
+        """
+        if not waveforms:
+            return []
+        with self._lock, model_manager.using("asr"), metrics.stage("asr"):
+            self._ensure_model_loaded()
             if DENOISE_ASR_INPUT:
-                for p in audio:
-                    try:
-                        os.remove(p)
-                    except OSError:
-                        pass
+                waveforms = self._denoise_waveforms(waveforms)
+            languages = language if isinstance(language, list) else [language] * len(waveforms)
 
+            order = sorted(range(len(waveforms)), key=lambda i: len(waveforms[i]), reverse=True)
+            flat = self.model.transcribe(
+                audio=[(waveforms[i], ASR_SR) for i in order],
+                language=[languages[i] for i in order] if any(languages) else None,
+                return_time_stamps=return_timestamps
+            )
+            results = [None] * len(waveforms)
+            for pos, i in enumerate(order):
+                results[i] = flat[pos]
             return results
 
-asr_engine = ASREngine()
+asr_engine = create_engine("asr", ASREngine)
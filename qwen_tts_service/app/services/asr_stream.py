@@ -0,0 +1,106 @@
+import logging
+import threading
+import numpy as np
+from typing import List, Dict, Any, Optional
+from app.core.config import settings
+from app.services.asr_engine import ASR_SR, asr_result_to_dict
+from app.services.vad import speech_segments
+
+# --- Streaming Tuning ---
+IDLE_KEEP_SECONDS = 1.0     # Audio kept when the buffer holds no speech
+IDLE_TRIM_SECONDS = 5.0     # Buffer length that triggers the idle trim
+# ------------------------
+
+logger = logging.getLogger(__name__)
+
+class ASRStreamSession:
+    """
+    Incremental VAD-segmented transcription for one WebSocket connection.
+    feed() appends PCM16 frames (resampled to 16 kHz); step() runs on the
+    inference executor and returns the events to send:
+    - final: a speech segment followed by ASR_VAD_MIN_SILENCE_MS of silence (or
+      longer than ASR_CHUNK_MAX_SECONDS) is transcribed and dropped from the buffer
+    - partial: the still-open segment is re-transcribed every ASR_STREAM_STEP_MS
+    Times are seconds from the start of the stream.
+    """
+    def __init__(self, sample_rate: int, language: Optional[str] = None, return_timestamps: bool = False):
+        self.sample_rate = sample_rate
+        self.language = language
+        self.return_timestamps = return_timestamps
+        self._resampler = None
+        if sample_rate != ASR_SR:
+            import soxr
+            self._resampler = soxr.ResampleStream(sample_rate, ASR_SR, 1, dtype="float32")
+
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._offset = 0.0          # Stream time (s) of buffer[0]
+        self._unprocessed = 0       # Samples fed since the last step
+        self._lock = threading.Lock()
+
+    def feed(self, pcm16: bytes):
+        frame = np.frombuffer(pcm16[:len(pcm16) // 2 * 2], dtype="<i2").astype(np.float32) / 32768.0
+        if self._resampler is not None:
+            frame = self._resampler.resample_chunk(frame)
+        self.feed_samples(frame)
+
+    def feed_samples(self, frame: np.ndarray):
+        with self._lock:
+            self._buffer = np.concatenate((self._buffer, frame))
+            self._unprocessed += len(frame)
+
+    def ready(self) -> bool:
+        return self._unprocessed >= settings.ASR_STREAM_STEP_MS * ASR_SR // 1000
+
+    def step(self, final: bool = False) -> List[Dict[str, Any]]:
+        from app.services.asr_engine import asr_engine
+
+        if final and self._resampler is not None:
+            self.feed_samples(self._resampler.resample_chunk(np.zeros(0, dtype=np.float32), last=True))
+
+        with self._lock:
+            audio = self._buffer
+            offset = self._offset
+            self._unprocessed = 0
+
+        segments = speech_segments(audio, ASR_SR, settings.ASR_VAD_MIN_SILENCE_MS)
+        silence = settings.ASR_VAD_MIN_SILENCE_MS * ASR_SR // 1000
+        max_len = int(settings.ASR_CHUNK_MAX_SECONDS * ASR_SR)
+
+        closed = [
+            (s, e) for s, e in segments
+            if final or len(audio) - e >= silence or e - s >= max_len
+        ]
+        open_segment = segments[len(closed)] if len(closed) < len(segments) else None
+
+        events = []
+        if closed:
+            results = asr_engine.transcribe_waveforms(
+                [audio[s:e] for s, e in closed], self.language, self.return_timestamps
+            )
+            for (s, e), res in zip(closed, results):
+                events.append(self._event("final", res, offset + s / ASR_SR, offset + e / ASR_SR))
+            self._consume(closed[-1][1])
+        elif open_segment is not None:
+            s, e = open_segment
+            res = asr_engine.transcribe_waveforms([audio[s:]], self.language, False)[0]
+            events.append(self._event("partial", res, offset + s / ASR_SR, offset + len(audio) / ASR_SR))
+        elif len(audio) > IDLE_TRIM_SECONDS * ASR_SR:
+            self._consume(len(audio) - int(IDLE_KEEP_SECONDS * ASR_SR))
+
+        return [event for event in events if event["text"]]
+
+    def _consume(self, samples: int):
+        """Drop transcribed audio from the front; frames fed meanwhile stay in place."""
+        with self._lock:
+            self._buffer = self._buffer[samples:]
+            self._offset += samples / ASR_SR
+
+    def _event(self, kind: str, res: Any, start: float, end: float) -> Dict[str, Any]:
+        out = asr_result_to_dict(res)
+        event = {"type": kind, "text": out["text"], "language": out.get("language") or "", "start": start, "end": end}
+        if kind == "final" and "timestamps" in out:
+            event["timestamps"] = [
+                {"start": ts["start"] + start, "end": ts["end"] + start, "text": ts["text"]}
+                for ts in out["timestamps"]
+            ]
+        return event
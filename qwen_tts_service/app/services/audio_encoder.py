@@ -0,0 +1,94 @@
+import io
+import asyncio
+import logging
+import threading
+import multiprocessing
+import concurrent.futures
+from pathlib import Path
+from typing import List, Dict, Tuple
+import numpy as np
+import soundfile as sf
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# format -> (soundfile format, subtype, file extension, media type)
+CODECS: Dict[str, Tuple[str, str, str, str]] = {
+    "wav": ("WAV", "PCM_16", ".wav", "audio/wav"), # engine output, passed through
+    "pcm16": ("WAV", "PCM_16", ".wav", "audio/wav"),
+    "flac": ("FLAC", "PCM_16", ".flac", "audio/flac"),
+    "opus": ("OGG", "OPUS", ".ogg", "audio/ogg"),
+    "mp3": ("MP3", "MPEG_LAYER_III", ".mp3", "audio/mpeg"),
+}
+
+# Media types served by /files, keyed on the stored file's suffix
+MEDIA_TYPES = {ext: media for _, _, ext, media in CODECS.values()}
+MEDIA_TYPES[".json"] = "application/json"
+
+# Opus only supports these rates; anything else is resampled to the next one up
+OPUS_RATES = (8000, 12000, 16000, 24000, 48000)
+
+def media_type_for(path: Path) -> str:
+    return MEDIA_TYPES.get(Path(path).suffix.lower(), "application/octet-stream")
+
+def with_extension(filename: str, fmt: str) -> str:
+    return str(Path(filename).with_suffix(CODECS[fmt][2]))
+
+def _encode(wav_bytes: bytes, fmt: str) -> bytes:
+    """Transcode a WAV clip. Runs inside the encoder process pool."""
+    sf_format, subtype, _, _ = CODECS[fmt]
+    data, sr = sf.read(io.BytesIO(wav_bytes), dtype="float32")
+
+    if fmt == "opus" and sr not in OPUS_RATES:
+        import soxr
+        target = next((r for r in OPUS_RATES if r >= sr), OPUS_RATES[-1])
+        data = soxr.resample(data, sr, target)
+        sr = target
+
+    buffer = io.BytesIO()
+    sf.write(buffer, np.clip(data, -1.0, 1.0), sr, format=sf_format, subtype=subtype)
+    return buffer.getvalue()
+
+class AudioEncoder:
+    """
+    Process pool that turns the engines' WAV output into the requested codec
+    (pcm16, flac, opus, mp3), so compression never runs on the GPU worker
+    thread or the event loop.
+    """
+    def __init__(self):
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> concurrent.futures.ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # spawn: forking a process that holds CUDA contexts is unsafe
+                self._pool = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=settings.AUDIO_ENCODER_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+                logger.info(f"AudioEncoder: Started pool with {settings.AUDIO_ENCODER_WORKERS} processes")
+            return self._pool
+
+    def submit(self, wav_bytes: bytes, fmt: str) -> concurrent.futures.Future:
+        if fmt not in CODECS:
+            raise ValueError(f"Unsupported output format: {fmt}")
+        if fmt == "wav":
+            future = concurrent.futures.Future()
+            future.set_result(wav_bytes)
+            return future
+        return self._get_pool().submit(_encode, wav_bytes, fmt)
+
+    async def encode_batch(self, wavs: List[bytes], fmt: str) -> List[bytes]:
+        if fmt == "wav":
+            return wavs
+        futures = [self.submit(wav, fmt) for wav in wavs]
+        return list(await asyncio.gather(*(asyncio.wrap_future(f) for f in futures)))
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+audio_encoder = AudioEncoder()
@@ -0,0 +1,162 @@
+import io
+import os
+import logging
+import threading
+import functools
+import concurrent.futures
+from collections import OrderedDict
+from typing import List, Optional, Tuple, Union, Dict, Any, Iterable
+import numpy as np
+import soundfile as sf
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+AudioSource = Union[str, bytes]
+
+@functools.lru_cache(maxsize=32)
+def _resampler(orig_sr: int, target_sr: int):
+    """CPU resample kernels are built once per rate pair and shared by all loader threads."""
+    import torchaudio.transforms as T
+    return T.Resample(orig_sr, target_sr)
+
+def _decode(source: AudioSource, target_sr: Optional[int]) -> Tuple[np.ndarray, int]:
+    """Decode to a mono float32 waveform, resampled to target_sr when given."""
+    data, sr = sf.read(io.BytesIO(source) if isinstance(source, bytes) else source, dtype="float32", always_2d=True)
+    mono = data.mean(axis=1) if data.shape[1] > 1 else data[:, 0]
+    if target_sr and sr != target_sr:
+        import torch
+        with torch.no_grad():
+            mono = _resampler(sr, target_sr)(torch.from_numpy(np.ascontiguousarray(mono))[None, :])[0].numpy()
+        sr = target_sr
+    return np.ascontiguousarray(mono, dtype=np.float32), sr
+
+class AudioLoader:
+    """
+    Shared decode -> downmix -> resample service for all engines.
+    Files are decoded on a thread pool (libsndfile and the resample kernels
+    release the GIL), so the GPU worker can prefetch the next batch while the
+    current one runs. Decoded file waveforms are kept in an LRU cache bounded by
+    AUDIO_LOADER_CACHE_MB and keyed on (path, mtime, size, target_sr);
+    concurrent requests for the same file share one decode. Returned arrays
+    are shared with the cache and must be treated as read-only.
+    """
+    def __init__(self):
+        self._pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=settings.AUDIO_LOADER_WORKERS,
+            thread_name_prefix="audio-loader"
+        )
+        self._cache: "OrderedDict[tuple, Tuple[np.ndarray, int]]" = OrderedDict()
+        self._cache_bytes = 0
+        self._inflight: Dict[tuple, concurrent.futures.Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def max_cache_bytes(self) -> int:
+        return settings.AUDIO_LOADER_CACHE_MB * 1024 * 1024
+
+    def _key(self, path: str, target_sr: Optional[int]) -> Optional[tuple]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (str(path), stat.st_mtime_ns, stat.st_size, target_sr)
+
+    def submit(self, source: AudioSource, target_sr: Optional[int] = None) -> concurrent.futures.Future:
+        """Start decoding a path or encoded bytes; cached and in-flight paths are reused."""
+        key = None if isinstance(source, bytes) else self._key(source, target_sr)
+        if key is None:
+            return self._pool.submit(_decode, source, target_sr)
+
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                future = concurrent.futures.Future()
+                future.set_result(cached)
+                return future
+            future = self._inflight.get(key)
+            if future is not None:
+                return future
+            self.misses += 1
+            future = self._pool.submit(_decode, source, target_sr)
+            self._inflight[key] = future
+
+        future.add_done_callback(lambda f: self._store(key, f))
+        return future
+
+    def _store(self, key: tuple, future: concurrent.futures.Future):
+        with self._lock:
+            self._inflight.pop(key, None)
+            if future.cancelled() or future.exception() is not None:
+                return
+            audio, sr = future.result()
+            if audio.nbytes > self.max_cache_bytes or key in self._cache:
+                return
+            self._cache[key] = (audio, sr)
+            self._cache_bytes += audio.nbytes
+            while self._cache_bytes > self.max_cache_bytes and self._cache:
+                _, (evicted, _) = self._cache.popitem(last=False)
+                self._cache_bytes -= evicted.nbytes
+
+    def load(self, source: AudioSource, target_sr: Optional[int] = None) -> Tuple[np.ndarray, int]:
+        return self.submit(source, target_sr).result()
+
+    def load_many(self, sources: List[AudioSource], target_sr: Optional[int] = None) -> List[Tuple[np.ndarray, int]]:
+        """Decode a batch in parallel, preserving order."""
+        futures = [self.submit(source, target_sr) for source in sources]
+        return [f.result() for f in futures]
+
+    def prefetch(self, paths: Iterable[Optional[str]], target_sr: Optional[int] = None):
+        """Warm the cache for upcoming work; errors surface later, on the real load."""
+        for path in paths:
+            if isinstance(path, str) and os.path.exists(path):
+                self.submit(path, target_sr)
+
+    def read_window(self, path: str, start_s: float, duration_s: float,
+                    target_sr: Optional[int] = None) -> Tuple[np.ndarray, int]:
+        """
+        Decode only [start_s, start_s + duration_s) of a file (seek + bounded read).
+        Used for recordings too long to hold in memory; bypasses the cache.
+        """
+        with sf.SoundFile(path) as f:
+            sr = f.samplerate
+            f.seek(min(int(start_s * sr), f.frames))
+            data = f.read(int(duration_s * sr), dtype="float32", always_2d=True)
+        mono = data.mean(axis=1) if data.shape[1] > 1 else data[:, 0]
+        if target_sr and sr != target_sr and mono.size:
+            import torch
+            with torch.no_grad():
+                mono = _resampler(sr, target_sr)(torch.from_numpy(np.ascontiguousarray(mono))[None, :])[0].numpy()
+            sr = target_sr
+        return np.ascontiguousarray(mono, dtype=np.float32), sr
+
+    def duration(self, path: str) -> Optional[float]:
+        """Duration in seconds from the file header, without decoding."""
+        try:
+            return sf.info(path).duration
+        except Exception:
+            return None
+
+    def is_longer_than(self, path: str, threshold_s: float) -> bool:
+        """Long-form check shared by the engines and the GPU worker (threshold <= 0 disables it)."""
+        if threshold_s <= 0:
+            return False
+        duration = self.duration(path)
+        return duration is not None and duration > threshold_s
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._cache),
+                "size_bytes": self._cache_bytes,
+                "max_bytes": self.max_cache_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "inflight": len(self._inflight)
+            }
+
+audio_loader = AudioLoader()
@@ -6,10 +6,8 @@ import concurrent.futures
 from typing import List, Optional, Union, Dict
 from pathlib import Path
 from app.core.config import settings
-from app.services.fb_denoiser import fb_denoiser
-from app.services.super_res import super_res
-from app.services.tts_engine import tts_engine
 from app.services.file_store import file_store
+from app.services.audio_loader import audio_loader
 
 # --- Pipeline Tuning ---
 # Set these to False to bypass specific stages of the enhancement pipeline
@@ -28,6 +26,7 @@ class AudioPipeline:
     def _pre_process_single_file(self, ref_path: str) -> str:
         """Runs pre-processing for a single file: Denoise + 16k Normalization."""
         # Use FBDenoiser for both cleaning and 16k normalization
+        from app.services.fb_denoiser import fb_denoiser
         results = fb_denoiser.process_files([ref_path])
         return results.get(ref_path, ref_path)
 
@@ -37,12 +36,18 @@ class AudioPipeline:
         ref_audio: Union[str, List[str]], 
         ref_text: Optional[Union[str, List[str]]] = None, 
         language: Union[str, List[str]] = "Auto", 
-        temperature: float = 0.3
+        temperature: float = 0.3,
+        seed: Optional[int] = None
     ) -> List[bytes]:
         """
         Runs the optimized enhanced voice cloning pipeline:
         [Parallel CPU Pre-processing] -> [Batched GPU TTS] -> [Batched GPU Post-processing]
         """
+        # Engines (and torch) load on first use, not with the API
+        from app.services.tts_engine import tts_engine
+        from app.services.fb_denoiser import fb_denoiser
+        from app.services.super_res import super_res
+
         # 1. Resolve ref_audio paths
         ref_paths = self._resolve_paths(ref_audio)
         
@@ -64,7 +69,8 @@ class AudioPipeline:
             ref_audio=clean_ref_paths if isinstance(ref_audio, list) else clean_ref_paths[0],
             ref_text=ref_text,
             language=language,
-            temperature=temperature
+            temperature=temperature,
+            seed=seed
         )
         t_tts = time.perf_counter() - t0
         logger.info(f"Pipeline: Stage 3 (TTS) complete in {t_tts:.2f}s")
@@ -80,12 +86,11 @@ class AudioPipeline:
         if RUN_POST_PROCESSING:
             logger.info(f"Pipeline: Batched GPU post-denoising {len(current_wav_bytes)} outputs")
             t_post_start = time.perf_counter()
-            wav_tensors = []
-            for wav_bytes in current_wav_bytes:
-                data, current_sr = sf.read(io.BytesIO(wav_bytes))
-                wav_tensors.append(torch.from_numpy(data[None, :]).float() if data.ndim == 1 else torch.from_numpy(data.T).float())
+            # Parallel decode + downmix on the shared loader pool
+            decoded = audio_loader.load_many(current_wav_bytes)
+            wav_tensors = [torch.from_numpy(data)[None, :] for data, _ in decoded]
 
-            clean_tensors = fb_denoiser.process_batch_tensors(wav_tensors, current_sr)
+            clean_tensors = fb_denoiser.process_batch_tensors(wav_tensors, [sr for _, sr in decoded])
             t_denoise = time.perf_counter() - t_post_start
             logger.info(f"Pipeline: Stage 4/5 (Denoise) complete in {t_denoise:.2f}s")
             
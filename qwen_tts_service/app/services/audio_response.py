@@ -0,0 +1,86 @@
+import uuid
+import base64
+import asyncio
+import logging
+from typing import List, Optional, Union
+from fastapi.responses import Response
+from app.models.requests import ResponseFormatEnum, OutputFormatEnum
+from app.models.responses import TTSResponse, TTSResponseItem
+from app.services.file_store import file_store
+from app.services.audio_encoder import audio_encoder, with_extension, CODECS
+
+logger = logging.getLogger(__name__)
+
+def _custom_id_list(custom_ids: Union[str, List[Optional[str]], None], count: int) -> List[Optional[str]]:
+    """Normalize custom_id (None, single string or list) to one entry per output."""
+    if custom_ids is None:
+        return [None] * count
+    if isinstance(custom_ids, str):
+        return [custom_ids] * count
+    return list(custom_ids) + [None] * (count - len(custom_ids))
+
+def _json_items(audio_list: List[bytes], custom_ids: List[Optional[str]], filename: str,
+                include_base64: bool) -> List[TTSResponseItem]:
+    items = []
+    for audio, cid in zip(audio_list, custom_ids):
+        # Save to file store and get URL
+        file_id = file_store.save(audio, filename)
+        items.append(TTSResponseItem(
+            audio_base64=base64.b64encode(audio).decode('utf-8') if include_base64 else None,
+            url=f"/api/v1/files/{file_id}",
+            custom_id=cid
+        ))
+    return items
+
+def _multipart_body(audio_list: List[bytes], custom_ids: List[Optional[str]], filename: str,
+                    media_type: str, boundary: str) -> bytes:
+    stem, _, ext = filename.rpartition(".")
+    parts = []
+    for i, (audio, cid) in enumerate(zip(audio_list, custom_ids)):
+        headers = [
+            f"--{boundary}",
+            f"Content-Type: {media_type}",
+            f'Content-Disposition: attachment; filename="{stem}_{i}.{ext}"',
+            f"Content-Length: {len(audio)}",
+        ]
+        if cid is not None:
+            headers.append(f"X-Custom-Id: {cid}")
+        parts.append("\r\n".join(headers).encode("utf-8") + b"\r\n\r\n" + audio + b"\r\n")
+    parts.append(f"--{boundary}--\r\n".encode("utf-8"))
+    return b"".join(parts)
+
+async def build_tts_response(audio_list: List[bytes], response_format: ResponseFormatEnum, filename: str,
+                             performance: float, custom_ids: Union[str, List[Optional[str]], None] = None,
+                             output_format: OutputFormatEnum = OutputFormatEnum.WAV):
+    """
+    Shape generated audio according to the requested response_format.
+    - json: base64 audio + file URL per item (default, backwards compatible)
+    - url: file URL per item only
+    - binary: raw audio body for one item, multipart/mixed for a batch;
+      nothing is written to the file store
+    Audio is transcoded to output_format in the encoder process pool; file
+    writes, base64 and multipart assembly run in the default thread pool so
+    large batches never block the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    ids = _custom_id_list(custom_ids, len(audio_list))
+
+    fmt = OutputFormatEnum(output_format).value
+    audio_list = await audio_encoder.encode_batch(audio_list, fmt)
+    filename = with_extension(filename, fmt)
+    media_type = CODECS[fmt][3]
+
+    if response_format == ResponseFormatEnum.BINARY:
+        headers = {"X-Performance": f"{performance:.4f}"}
+        if len(audio_list) == 1:
+            if ids[0] is not None:
+                headers["X-Custom-Id"] = ids[0]
+            return Response(content=audio_list[0], media_type=media_type, headers=headers)
+
+        boundary = uuid.uuid4().hex
+        body = await loop.run_in_executor(None, _multipart_body, audio_list, ids, filename, media_type, boundary)
+        return Response(content=body, media_type=f"multipart/mixed; boundary={boundary}", headers=headers)
+
+    include_base64 = response_format == ResponseFormatEnum.JSON
+    items = await loop.run_in_executor(None, _json_items, audio_list, ids, filename, include_base64)
+    return TTSResponse(items=items, performance=performance)
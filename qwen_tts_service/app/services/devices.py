@@ -0,0 +1,77 @@
+import logging
+import threading
+import functools
+import concurrent.futures
+from typing import Callable, Dict, List, Optional, Any
+from app.core.config import settings
+from app.services.engine_registry import ENGINE_NAMES
+
+logger = logging.getLogger(__name__)
+
+# Engine whose device decides where a queue operation runs
+OPERATION_ENGINES = {
+    "voice_design": "tts",
+    "custom_voice": "tts",
+    "voice_clone": "tts",
+    "voice_clone_enhanced": "tts",
+    "transcribe": "asr",
+    "diarize": "diarization",
+    "analyze": "asr",
+}
+
+@functools.lru_cache(maxsize=1)
+def device_pool() -> List[str]:
+    """Devices that get a GPU worker each (DEVICES, or just DEVICE)."""
+    return [d.strip() for d in settings.DEVICES.split(",") if d.strip()] or [settings.DEVICE]
+
+@functools.lru_cache(maxsize=1)
+def affinity() -> Dict[str, str]:
+    """DEVICE_AFFINITY ("tts=cuda:0,asr=cuda:1,denoiser=cpu") as engine -> device."""
+    pinned = {}
+    for entry in settings.DEVICE_AFFINITY.split(","):
+        engine, _, device = entry.partition("=")
+        engine, device = engine.strip(), device.strip()
+        if not engine:
+            continue
+        if engine not in ENGINE_NAMES or not device:
+            raise ValueError(f"Invalid DEVICE_AFFINITY entry: '{entry.strip()}'")
+        pinned[engine] = device
+    return pinned
+
+def device_for(engine: str) -> str:
+    """Device an engine is placed on: its affinity, otherwise this process's DEVICE."""
+    return affinity().get(engine, settings.DEVICE)
+
+def lane_for(operation: str) -> Optional[str]:
+    """
+    Queue lane of an operation: the device its engine is pinned to, or None
+    (the shared lane, served by every worker). Only GPU pins make lanes;
+    CPU-placed engines run wherever the operation is picked up.
+    """
+    device = affinity().get(OPERATION_ENGINES.get(operation, ""))
+    if device is None or not device.startswith("cuda"):
+        return None
+    return device
+
+def pinned_lanes() -> List[str]:
+    return sorted({lane for lane in (lane_for(op) for op in OPERATION_ENGINES) if lane})
+
+# --- CPU stage pool ---
+
+_cpu_pool: Optional[concurrent.futures.ThreadPoolExecutor] = None
+_cpu_pool_lock = threading.Lock()
+
+def cpu_map(fn: Callable[[Any], Any], items: List[Any]) -> List[Any]:
+    """
+    Per-item work of a CPU-placed stage (denoise / upsample) spread over
+    CPU_STAGE_WORKERS threads; torch kernels release the GIL.
+    """
+    global _cpu_pool
+    if len(items) <= 1 or settings.CPU_STAGE_WORKERS <= 1:
+        return [fn(item) for item in items]
+    with _cpu_pool_lock:
+        if _cpu_pool is None:
+            _cpu_pool = concurrent.futures.ThreadPoolExecutor(
+                max_workers=settings.CPU_STAGE_WORKERS, thread_name_prefix="cpu-stage"
+            )
+    return list(_cpu_pool.map(fn, items))
@@ -4,15 +4,31 @@ import gc
 import os
 import time
 import threading
-import torchaudio
 from pathlib import Path
-from typing import List, Union, Optional, Dict, Any
-from pyannote.audio import Pipeline
+from typing import List, Union, Optional, Dict, Any, Tuple
 from app.core.config import settings
+from app.services.model_manager import model_manager
+from app.services import metrics
+from app.services.engine_registry import create_engine
+from app.services.devices import device_for
+from app.services.audio_loader import audio_loader
 from app.models.diarization_models import DiarizationSegment
 
+# pyannote segmentation/embedding models run at 16 kHz
+DIARIZATION_SR = 16000
+
 logger = logging.getLogger(__name__)
 
+def diarization_result_to_dict(res: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert an engine result into the JSON shape used by the queue and the result cache."""
+    out = {
+        "segments": [s.model_dump() if hasattr(s, "model_dump") else s for s in res["segments"]],
+        "num_speakers": res["num_speakers"]
+    }
+    if "error" in res:
+        out["error"] = res["error"]
+    return out
+
 class DiarizationEngine:
     _instance = None
     _lock = threading.Lock()
@@ -24,11 +40,10 @@ class DiarizationEngine:
         return cls._instance
 
     def _initialize(self):
-        from app.services.model_manager import model_manager
         model_manager.register_engine("diarization", self)
         
         # Use settings device, fallback to CPU
-        requested_device = settings.DEVICE
+        requested_device = device_for("diarization")
         if torch.cuda.is_available():
             self.device = torch.device(requested_device)
         else:
@@ -39,6 +54,15 @@ class DiarizationEngine:
         logger.info(f"DiarizationEngine initialized on {self.device}")
 
     def unload(self):
+        self._release_pipeline()
+        model_manager.unloaded("diarization")
+
+    def load(self):
+        """Eagerly load the pyannote pipeline (used by startup preloading)."""
+        with self._lock, model_manager.using("diarization"):
+            self._ensure_model_loaded()
+
+    def _release_pipeline(self):
         # We don't use the lock here to avoid deadlock if acquire is waiting for another engine's unload
         # but ModelManager calls unload under its own lock. ASREngine/TTSEngine don't lock unload.
         if self.pipeline is not None:
@@ -52,10 +76,6 @@ class DiarizationEngine:
 
     def _ensure_model_loaded(self):
         if self.pipeline is None:
-            from app.services.model_manager import model_manager
-            # Coordinate with ModelManager to unload other models if needed
-            model_manager.acquire("diarization")
-            
             if not settings.ENABLE_DIARIZATION:
                 raise RuntimeError("Diarization is disabled in configuration.")
             
@@ -66,19 +86,26 @@ class DiarizationEngine:
             logger.info(f"Loading Diarization pipeline: {repo_id}...")
             t0 = time.perf_counter()
             
-            try:
-                self.pipeline = Pipeline.from_pretrained(
-                    repo_id,
-                    use_auth_token=settings.HF_TOKEN
-                )
-            except Exception as e:
-                logger.error(f"Error loading diarization pipeline: {e}")
-                raise RuntimeError(f"Failed to load diarization pipeline {repo_id}. Ensure HF_TOKEN is valid and you have accepted the model terms.")
-            
-            if self.pipeline is None:
-                raise RuntimeError(f"Failed to load diarization pipeline {repo_id}. Check HF_TOKEN and model gate access.")
+            # Coordinate with ModelManager to evict idle models if the budget requires it
+            with model_manager.loading("diarization", self._release_pipeline, self.device, target=lambda: self.pipeline):
+                try:
+                    from pyannote.audio import Pipeline
+                    self.pipeline = Pipeline.from_pretrained(
+                        repo_id,
+                        use_auth_token=settings.HF_TOKEN
+                    )
+                except Exception as e:
+                    logger.error(f"Error loading diarization pipeline: {e}")
+                    raise RuntimeError(f"Failed to load diarization pipeline {repo_id}. Ensure HF_TOKEN is valid and you have accepted the model terms.")
                 
-            self.pipeline.to(self.device)
+                if self.pipeline is None:
+                    raise RuntimeError(f"Failed to load diarization pipeline {repo_id}. Check HF_TOKEN and model gate access.")
+                    
+                self.pipeline.to(self.device)
+                # Embedding windows are batched inside pyannote; segmentation is batched across files here
+                self.pipeline.embedding_batch_size = settings.DIARIZATION_WINDOW_BATCH_SIZE
+                if hasattr(self.pipeline, "_segmentation"):
+                    self.pipeline._segmentation.batch_size = settings.DIARIZATION_WINDOW_BATCH_SIZE
             logger.info(f"Diarization pipeline loaded in {time.perf_counter() - t0:.2f}s")
 
     def diarize(self, 
@@ -87,7 +114,7 @@ class DiarizationEngine:
                 min_speakers: Optional[Union[int, List[Optional[int]]]] = None,
                 max_speakers: Optional[Union[int, List[Optional[int]]]] = None) -> List[Dict[str, Any]]:
         
-        with self._lock:
+        with self._lock, model_manager.using("diarization"), metrics.stage("diarize"):
             self._ensure_model_loaded()
             
             if isinstance(audio_paths, str):
@@ -104,61 +131,316 @@ class DiarizationEngine:
             if len(max_speakers) < len(audio_paths):
                 max_speakers = max_speakers + [None] * (len(audio_paths) - len(max_speakers))
 
-            all_results = []
-            
+            # Diarization parameters
+            params = []
+            for i in range(len(audio_paths)):
+                p = {}
+                if num_speakers[i] is not None:
+                    p["num_speakers"] = int(num_speakers[i])
+                if min_speakers[i] is not None:
+                    p["min_speakers"] = int(min_speakers[i])
+                if max_speakers[i] is not None:
+                    p["max_speakers"] = int(max_speakers[i])
+                params.append(p)
+
+            results: List[Optional[Dict[str, Any]]] = [None] * len(audio_paths)
+            valid = []
             for i, path in enumerate(audio_paths):
                 if not os.path.exists(path):
                     logger.error(f"Diarization: File not found: {path}")
-                    all_results.append({"segments": [], "num_speakers": 0, "error": "File not found"})
+                    results[i] = {"segments": [], "num_speakers": 0, "error": "File not found"}
+                elif self.is_long_form(path):
+                    # Multi-hour recordings: overlapping windows, bounded memory
+                    results[i] = self._diarize_chunked(path, params[i])
+                else:
+                    valid.append(i)
+
+            # Files are diarized DIARIZATION_MAX_BATCH_SIZE at a time: segmentation
+            # windows of the whole group share GPU batches, clustering stays per file
+            group_size = max(1, settings.DIARIZATION_MAX_BATCH_SIZE)
+            for g in range(0, len(valid), group_size):
+                group = valid[g:g + group_size]
+                waveforms = {}
+                for i in group:
+                    try:
+                        waveforms[i] = self._load_waveform(audio_paths[i])
+                    except Exception as e:
+                        logger.error(f"Error loading {audio_paths[i]}: {e}")
+                        results[i] = {"segments": [], "num_speakers": 0, "error": str(e)}
+
+                segmentations = {}
+                if len(waveforms) > 1:
+                    try:
+                        t0 = time.perf_counter()
+                        batched = self._batched_segmentations(list(waveforms.values()))
+                        segmentations = dict(zip(waveforms.keys(), batched))
+                        logger.info(f"Diarization: Batched segmentation of {len(waveforms)} files in {time.perf_counter() - t0:.2f}s")
+                    except Exception as e:
+                        # Private pyannote API changed or failed: fall back to per-file segmentation
+                        logger.warning(f"Diarization: Batched segmentation unavailable, running per file: {e}")
+
+                for i, waveform in waveforms.items():
+                    results[i] = self._diarize_waveform(audio_paths[i], waveform, params[i], segmentations.get(i))
+
+            return results
+
+    def is_long_form(self, path: str) -> bool:
+        return audio_loader.is_longer_than(path, settings.DIARIZATION_LONG_FORM_THRESHOLD_S)
+
+    def _diarize_chunked(self, path: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Diarize a long recording in overlapping windows of DIARIZATION_CHUNK_SECONDS.
+        Only one window is decoded and resident at a time. Each window is
+        diarized with return_embeddings=True; its local speakers are linked to
+        global speakers by cosine similarity of their centroids (greedy, best
+        pairs first, DIARIZATION_SPEAKER_LINK_THRESHOLD), and turns are kept only
+        inside the window's core (half the overlap is trimmed from inner edges).
+        """
+        import numpy as np
+
+        t_start = time.perf_counter()
+        try:
+            total = audio_loader.duration(path)
+            chunk = settings.DIARIZATION_CHUNK_SECONDS
+            overlap = min(settings.DIARIZATION_CHUNK_OVERLAP_SECONDS, chunk / 2)
+            step = chunk - overlap
+
+            # Per-window speaker counts are unknown; an exact count becomes an upper bound
+            # (the global count is enforced after linking, in _bound_speakers)
+            chunk_params = {}
+            if "num_speakers" in params or "max_speakers" in params:
+                chunk_params["max_speakers"] = params.get("num_speakers", params.get("max_speakers"))
+
+            centroids: List[np.ndarray] = []   # running mean embedding per global speaker
+            weights: List[float] = []
+            turns = []                         # (start, end, global speaker index)
+
+            start = 0.0
+            while start < total:
+                end = min(start + chunk, total)
+                data, _ = audio_loader.read_window(path, start, end - start, DIARIZATION_SR)
+                waveform = torch.from_numpy(data)[None, :].to(self.device)
+                diarization, embeddings = self.pipeline(
+                    {"waveform": waveform, "sample_rate": DIARIZATION_SR},
+                    return_embeddings=True, **chunk_params
+                )
+                del waveform
+
+                labels = diarization.labels()
+                durations = {label: diarization.label_duration(label) for label in labels}
+                mapping = self._link_speakers(labels, embeddings, durations, centroids, weights)
+
+                core_start = start + overlap / 2 if start > 0 else start
+                core_end = end - overlap / 2 if end < total else end
+                for turn, _, label in diarization.itertracks(yield_label=True):
+                    seg_start = max(turn.start + start, core_start)
+                    seg_end = min(turn.end + start, core_end)
+                    if seg_end > seg_start:
+                        turns.append((seg_start, seg_end, mapping[label]))
+
+                if end >= total:
+                    break
+                start += step
+
+            segments = []
+            for seg_start, seg_end, speaker in self._bound_speakers(turns, centroids, weights, params):
+                label = f"SPEAKER_{speaker:02d}"
+                # Re-join turns split at window boundaries
+                if segments and segments[-1].speaker == label and seg_start - segments[-1].end < 0.05:
+                    segments[-1].end = max(segments[-1].end, seg_end)
                     continue
+                segments.append(DiarizationSegment(speaker=label, start=seg_start, end=seg_end))
 
-                t_start = time.perf_counter()
-                
-                try:
-                    # Optimized Loading: Pre-load waveform to avoid pyannote's slow internal I/O
-                    waveform, sample_rate = torchaudio.load(path)
-                    
-                    # Ensure mono
-                    if waveform.shape[0] > 1:
-                        waveform = waveform.mean(dim=0, keepdim=True)
-                    
-                    # Move to device
-                    waveform = waveform.to(self.device)
-                    
-                    # Diarization parameters
-                    params = {}
-                    if num_speakers[i] is not None:
-                        params["num_speakers"] = int(num_speakers[i])
-                    if min_speakers[i] is not None:
-                        params["min_speakers"] = int(min_speakers[i])
-                    if max_speakers[i] is not None:
-                        params["max_speakers"] = int(max_speakers[i])
-
-                    # Run inference
-                    # Passing a dict with waveform and sample_rate is the standard way to optimize I/O in pyannote
-                    diarization = self.pipeline({"waveform": waveform, "sample_rate": sample_rate}, **params)
-                    
-                    segments = []
-                    unique_speakers = set()
-                    for turn, _, speaker in diarization.itertracks(yield_label=True):
-                        segments.append(DiarizationSegment(
-                            speaker=speaker,
-                            start=turn.start,
-                            end=turn.end
-                        ))
-                        unique_speakers.add(speaker)
-                    
-                    dur = time.perf_counter() - t_start
-                    logger.info(f"Diarized {path} ({len(segments)} segments, {len(unique_speakers)} speakers) in {dur:.2f}s")
-                    
-                    all_results.append({
-                        "segments": segments,
-                        "num_speakers": len(unique_speakers)
-                    })
-                except Exception as e:
-                    logger.error(f"Error diarizing {path}: {e}")
-                    all_results.append({"segments": [], "num_speakers": 0, "error": str(e)})
+            num_found = len({s.speaker for s in segments})
+            logger.info(
+                f"Diarized {path} in chunks ({total:.0f}s audio, {len(segments)} segments, "
+                f"{num_found} speakers) in {time.perf_counter() - t_start:.2f}s"
+            )
+            return {"segments": segments, "num_speakers": num_found}
+        except Exception as e:
+            logger.error(f"Error diarizing {path} in chunks: {e}")
+            return {"segments": [], "num_speakers": 0, "error": str(e)}
+
+    def _bound_speakers(self, turns: List[Tuple[float, float, int]], centroids: List[Any],
+                        weights: List[float], params: Dict[str, Any]) -> List[Tuple[float, float, int]]:
+        """
+        Linking can end with more global speakers than requested (windows only
+        get an upper bound). Merge the two most similar speakers, the lighter
+        into the heavier, until num_speakers / max_speakers holds; merging
+        never goes below min_speakers. Returns the turns sorted, with speakers
+        renumbered 0..n-1 in order of appearance.
+        """
+        import numpy as np
+        from itertools import combinations
+
+        limit = params.get("num_speakers", params.get("max_speakers"))
+        floor = params.get("num_speakers", params.get("min_speakers"))
+        parent = list(range(len(centroids)))   # merged speaker -> speaker it joined
+        alive = {speaker for _, _, speaker in turns}
+
+        def usable(g: int) -> bool:
+            return centroids[g].size > 1 and bool(np.linalg.norm(centroids[g]) > 0)
+
+        def similarity(pair: Tuple[int, int]) -> float:
+            a, b = pair
+            if not (usable(a) and usable(b)) or centroids[a].shape != centroids[b].shape:
+                return -2.0
+            return float(centroids[a] @ centroids[b] / (np.linalg.norm(centroids[a]) * np.linalg.norm(centroids[b])))
+
+        if limit is not None:
+            while len(alive) > max(limit, floor or 1):
+                known = [g for g in alive if usable(g)]
+                unknown = sorted(g for g in alive if not usable(g))
+                if unknown and known:
+                    # No embedding to compare: fold it into the dominant speaker first
+                    keep, drop = max(known, key=lambda g: weights[g]), unknown[0]
+                else:
+                    a, b = max(combinations(sorted(alive), 2), key=similarity)
+                    keep, drop = sorted((a, b), key=lambda g: weights[g], reverse=True)
+                total = weights[keep] + weights[drop]
+                if usable(drop) and centroids[keep].shape == centroids[drop].shape and total > 0:
+                    centroids[keep] = (centroids[keep] * weights[keep] + centroids[drop] * weights[drop]) / total
+                weights[keep] = total
+                parent[drop] = keep
+                alive.discard(drop)
+        if floor is not None and len(alive) < floor:
+            logger.warning(f"Diarization: Found {len(alive)} speakers across windows, fewer than the requested minimum {floor}")
+
+        def root(g: int) -> int:
+            while parent[g] != g:
+                g = parent[g]
+            return g
+
+        order: Dict[int, int] = {}
+        bounded = []
+        for seg_start, seg_end, speaker in sorted(turns):
+            speaker = order.setdefault(root(speaker), len(order))
+            bounded.append((seg_start, seg_end, speaker))
+        return bounded
+
+    def _link_speakers(self, labels: List[str], embeddings: Any, durations: Dict[str, float],
+                       centroids: List[Any], weights: List[float]) -> Dict[str, int]:
+        """Map a window's local labels to global speaker indices, updating the centroids in place."""
+        import numpy as np
+
+        mapping: Dict[str, int] = {}
+        local = {}
+        for k, label in enumerate(labels):
+            vec = np.asarray(embeddings[k], dtype=np.float32)
+            if np.all(np.isfinite(vec)) and np.linalg.norm(vec) > 0:
+                local[label] = vec / np.linalg.norm(vec)
+
+        pairs = []
+        for label, vec in local.items():
+            for g, centroid in enumerate(centroids):
+                pairs.append((float(vec @ (centroid / np.linalg.norm(centroid))), label, g))
+        taken = set()
+        for score, label, g in sorted(pairs, reverse=True):
+            if score < settings.DIARIZATION_SPEAKER_LINK_THRESHOLD:
+                break
+            if label in mapping or g in taken:
+                continue
+            mapping[label] = g
+            taken.add(g)
+
+        for label in labels:
+            if label not in mapping:
+                mapping[label] = len(centroids)
+                centroids.append(local.get(label, np.zeros(1, dtype=np.float32)))
+                weights.append(0.0)
+            g = mapping[label]
+            if label in local and centroids[g].shape == local[label].shape:
+                w = durations.get(label, 0.0)
+                total = weights[g] + w
+                if total > 0:
+                    centroids[g] = (centroids[g] * weights[g] + local[label] * w) / total
+                    weights[g] = total
+        return mapping
+
+    def _load_waveform(self, path: str) -> torch.Tensor:
+        # Optimized Loading: Pre-load waveform to avoid pyannote's slow internal I/O.
+        # The shared loader decodes to 16 kHz mono, usually prefetched by the GPU worker.
+        data, _ = audio_loader.load(path, DIARIZATION_SR)
+        return torch.from_numpy(data)[None, :].to(self.device)
+
+    def _batched_segmentations(self, waveforms: List[torch.Tensor]) -> List[Any]:
+        """
+        Run the segmentation model over the sliding windows of several files at once.
+        Mirrors pyannote's Inference.slide (same window/step, zero-padded last
+        window, powerset conversion in infer) but fills each GPU batch with
+        windows from any file. Windows are unfold() views, so only one batch of
+        windows is materialized at a time.
+        """
+        import numpy as np
+        import torch.nn.functional as F
+        from pyannote.core import SlidingWindow, SlidingWindowFeature
+
+        seg = self.pipeline._segmentation
+        window_size = seg.model.audio.get_num_samples(seg.duration)
+        step_size = round(seg.step * DIARIZATION_SR)
+
+        windows = []   # [1, window_size] tensor views, file by file
+        counts = []
+        for waveform in waveforms:
+            first = len(windows)
+            num_samples = waveform.shape[1]
+            num_full = 0
+            if num_samples >= window_size:
+                full = waveform.unfold(1, window_size, step_size)  # [1, chunks, window]
+                num_full = full.shape[1]
+                windows.extend(full[:, c] for c in range(num_full))
+            if num_samples < window_size or (num_samples - window_size) % step_size > 0:
+                last = waveform[:, num_full * step_size:]
+                windows.append(F.pad(last, (0, window_size - last.shape[1])))
+            counts.append(len(windows) - first)
+
+        batch_size = max(1, settings.DIARIZATION_WINDOW_BATCH_SIZE)
+        outputs = []
+        for b in range(0, len(windows), batch_size):
+            batch = torch.stack(windows[b:b + batch_size])  # [batch, 1, window]
+            outputs.append(seg.infer(batch))
+        outputs = np.vstack(outputs)
+
+        frames = SlidingWindow(start=0.0, duration=seg.duration, step=seg.step)
+        features = []
+        offset = 0
+        for count in counts:
+            features.append(SlidingWindowFeature(outputs[offset:offset + count], frames))
+            offset += count
+        return features
+
+    def _diarize_waveform(self, path: str, waveform: torch.Tensor, params: Dict[str, Any],
+                          segmentation: Optional[Any] = None) -> Dict[str, Any]:
+        t_start = time.perf_counter()
+        try:
+            if segmentation is not None:
+                # Inject the precomputed windows; embedding + clustering run as usual
+                self.pipeline.get_segmentations = lambda file, hook=None: segmentation
+            try:
+                # Passing a dict with waveform and sample_rate is the standard way to optimize I/O in pyannote
+                diarization = self.pipeline({"waveform": waveform, "sample_rate": DIARIZATION_SR}, **params)
+            finally:
+                self.pipeline.__dict__.pop("get_segmentations", None)
+
+            segments = []
+            unique_speakers = set()
+            for turn, _, speaker in diarization.itertracks(yield_label=True):
+                segments.append(DiarizationSegment(
+                    speaker=speaker,
+                    start=turn.start,
+                    end=turn.end
+                ))
+                unique_speakers.add(speaker)
+
+            dur = time.perf_counter() - t_start
+            logger.info(f"Diarized {path} ({len(segments)} segments, {len(unique_speakers)} speakers) in {dur:.2f}s")
 
-            return all_results
+            return {
+                "segments": segments,
+                "num_speakers": len(unique_speakers)
+            }
+        except Exception as e:
+            logger.error(f"Error diarizing {path}: {e}")
+            return {"segments": [], "num_speakers": 0, "error": str(e)}
 
-diarization_engine = DiarizationEngine()
+diarization_engine = create_engine("diarization", DiarizationEngine)
@@ -0,0 +1,85 @@
+import logging
+import importlib
+import threading
+from typing import Callable, Dict, Any
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+ENGINE_NAMES = ("tts", "asr", "diarization", "denoiser", "super_res")
+
+# backend -> engine name -> "module:Class" (constructed with no arguments)
+BACKENDS: Dict[str, Dict[str, str]] = {
+    "stub": {
+        "tts": "app.services.stub_engines:StubTTSEngine",
+        "asr": "app.services.stub_engines:StubASREngine",
+        "diarization": "app.services.stub_engines:StubDiarizationEngine",
+        "denoiser": "app.services.stub_engines:StubDenoiserService",
+        "super_res": "app.services.stub_engines:StubSuperResService",
+    },
+}
+
+def register_backend(backend: str, name: str, target: str):
+    """Add an alternative implementation ("module:Class") for an engine."""
+    if name not in ENGINE_NAMES:
+        raise ValueError(f"Unknown engine: {name}")
+    BACKENDS.setdefault(backend, {})[name] = target
+
+def backend_for(name: str) -> str:
+    """ENGINE_BACKEND, unless ENGINE_BACKEND_OVERRIDES names this engine ("asr=stub,tts=real")."""
+    for entry in settings.ENGINE_BACKEND_OVERRIDES.split(","):
+        engine, _, backend = entry.partition("=")
+        if engine.strip() == name and backend.strip():
+            return backend.strip()
+    return settings.ENGINE_BACKEND
+
+class LazyEngine:
+    """
+    Module-level engine handle that builds the engine on first attribute
+    access, so importing an engine module (for a constant or a helper) neither
+    probes CUDA nor registers the engine with the ModelManager.
+    """
+    def __init__(self, name: str, factory: Callable[[], Any]):
+        self._lazy_name = name
+        self._lazy_factory = factory
+        self._lazy_instance = None
+        self._lazy_lock = threading.Lock()
+
+    @property
+    def built(self) -> bool:
+        return self._lazy_instance is not None
+
+    def get(self) -> Any:
+        if self._lazy_instance is None:
+            with self._lazy_lock:
+                if self._lazy_instance is None:
+                    self._lazy_instance = self._lazy_factory()
+        return self._lazy_instance
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self.get(), attr)
+
+    def __repr__(self) -> str:
+        return f"<LazyEngine {self._lazy_name} ({'built' if self.built else 'not built'})>"
+
+def create_engine(name: str, real: Callable[[], Any]) -> LazyEngine:
+    """
+    Singleton handle for an engine module: `real()` for the "real" backend,
+    otherwise the registered class, built on first use. Engine modules call
+    this for their module-level instance, so every consumer picks up the
+    configured backend.
+    """
+    return LazyEngine(name, lambda: _build(name, real))
+
+def _build(name: str, real: Callable[[], Any]) -> Any:
+    backend = backend_for(name)
+    if backend == "real":
+        return real()
+
+    target = BACKENDS.get(backend, {}).get(name)
+    if target is None:
+        raise ValueError(f"No '{backend}' backend registered for engine '{name}'")
+    module_name, _, class_name = target.partition(":")
+    engine = getattr(importlib.import_module(module_name), class_name)()
+    logger.info(f"Engine '{name}' using '{backend}' backend ({target})")
+    return engine
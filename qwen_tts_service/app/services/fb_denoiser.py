@@ -7,8 +7,12 @@ import concurrent.futures
 from pathlib import Path
 from typing import List, Dict, Optional, Union
 import soundfile as sf
-from denoiser import pretrained
 from app.core.config import settings
+from app.services.model_manager import model_manager
+from app.services import metrics
+from app.services.engine_registry import create_engine
+from app.services.devices import device_for, cpu_map
+from app.services.audio_loader import audio_loader
 
 # --- Denoiser Tuning ---
 DEFAULT_MODEL = "dns48"
@@ -27,11 +31,13 @@ class FBDenoiserService:
         return cls._instance
     
     def _initialize(self):
+        model_manager.register_engine("denoiser", self)
         self.model = None
-        self.device = torch.device(settings.DEVICE if torch.cuda.is_available() else "cpu")
+        self.device = torch.device(device_for("denoiser") if torch.cuda.is_available() else "cpu")
         self.storage_dir = Path("/tmp/tts_files")
         self.storage_dir.mkdir(parents=True, exist_ok=True)
         self._lock = threading.Lock()
+        self._resamplers = {}
 
     def _ensure_model(self):
         """Lazy load the DNS48 model."""
@@ -45,13 +51,30 @@ class FBDenoiserService:
             logger.info(f"Initializing Facebook Denoiser ({DEFAULT_MODEL}) on {self.device}...")
             try:
                 # DNS48 is high quality, wideband (supports up to 48k, internal handling at 16k/48k)
-                self.model = pretrained.dns48().to(self.device)
-                self.model.eval()
+                with model_manager.loading("denoiser", self._release_model, self.device, target=lambda: self.model):
+                    from denoiser import pretrained
+                    self.model = pretrained.dns48().to(self.device)
+                    self.model.eval()
                 logger.info("Facebook Denoiser initialized successfully.")
             except Exception as e:
                 logger.error(f"Failed to initialize Facebook Denoiser: {e}")
                 raise e
 
+    def unload(self):
+        self._release_model()
+        model_manager.unloaded("denoiser")
+
+    def load(self):
+        """Eagerly load the model (used by startup preloading)."""
+        with model_manager.using("denoiser"):
+            self._ensure_model()
+
+    def _release_model(self):
+        if self.model is not None:
+            logger.info("Unloading Facebook Denoiser...")
+            self.model = None
+            self._resamplers.clear()
+
     def process_files(self, file_paths: List[str]) -> Dict[str, str]:
         """
         Process a list of files in parallel (Pre-processing stage).
@@ -61,10 +84,10 @@ class FBDenoiserService:
         if not file_paths:
             return results
 
-        self._ensure_model()
-        logger.info(f"Denoising {len(file_paths)} files with {MAX_WORKERS} workers")
+        with model_manager.using("denoiser"), metrics.stage("denoise"), concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            self._ensure_model()
+            logger.info(f"Denoising {len(file_paths)} files with {MAX_WORKERS} workers")
 
-        with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
             future_to_path = {executor.submit(self._denoise_single_file, path): path for path in file_paths}
             for future in concurrent.futures.as_completed(future_to_path):
                 old_path = future_to_path[future]
@@ -82,12 +105,9 @@ class FBDenoiserService:
     def _denoise_single_file(self, path: str) -> str:
         """Worker for single file denoising + 16k normalization."""
         try:
-            data, sr = sf.read(path)
-            # Load into tensor [1, T]
-            if data.ndim == 1:
-                wav = torch.from_numpy(data[None, :]).float().to(self.device)
-            else:
-                wav = torch.from_numpy(data.T).float().to(self.device).mean(dim=0, keepdim=True)
+            # Decoded, downmixed and resampled to the model rate by the shared loader
+            data, _ = audio_loader.load(path, 16000)
+            wav = torch.from_numpy(data)[None, :].to(self.device)
             
             # Denoise
             with torch.no_grad():
@@ -104,34 +124,61 @@ class FBDenoiserService:
             logger.error(f"Error in _denoise_single_file for {path}: {e}")
             raise e
 
-    def process_batch_tensors(self, wav_tensors: List[torch.Tensor], sr: int) -> List[torch.Tensor]:
+    def _resampler(self, sr: int):
+        """Resample kernels are built once per source rate and kept on the device."""
+        resampler = self._resamplers.get(sr)
+        if resampler is None:
+            import torchaudio.transforms as T
+            resampler = T.Resample(sr, 16000).to(self.device)
+            self._resamplers[sr] = resampler
+        return resampler
+
+    def _to_16k(self, wav_tensors: List[torch.Tensor], sample_rates: List[int]) -> List[torch.Tensor]:
+        """Resample [1, T] tensors to 16k, one padded batch per distinct source rate."""
+        out: List[Optional[torch.Tensor]] = [None] * len(wav_tensors)
+        for sr in set(sample_rates):
+            idx = [i for i, rate in enumerate(sample_rates) if rate == sr]
+            wavs = [wav_tensors[i].to(self.device) for i in idx]
+            if sr == 16000:
+                for i, wav in zip(idx, wavs):
+                    out[i] = wav
+                continue
+
+            lengths = [wav.shape[-1] for wav in wavs]
+            batch = torch.zeros(len(wavs), max(lengths), device=self.device)
+            for row, wav in enumerate(wavs):
+                batch[row, :wav.shape[-1]] = wav[0]
+            resampled = self._resampler(sr)(batch)
+            for row, (i, length) in enumerate(zip(idx, lengths)):
+                out_len = -(-length * 16000 // sr) # ceil, trims the padding
+                out[i] = resampled[row:row + 1, :out_len]
+        return out
+
+    def process_batch_tensors(self, wav_tensors: List[torch.Tensor], sr: Union[int, List[int]]) -> List[torch.Tensor]:
         """
         Batched GPU inference for post-processing.
-        Expects a list of [1, T] tensors at 'sr' sampling rate.
+        Expects a list of [1, T] tensors at 'sr' sampling rate (one rate, or one per tensor).
         Returns a list of [1, T] clean tensors at 16kHz.
         """
-        self._ensure_model()
+        sample_rates = sr if isinstance(sr, list) else [sr] * len(wav_tensors)
+        with model_manager.using("denoiser"), metrics.stage("denoise"):
+            self._ensure_model()
         
-        # 1. Gather & Normalize to 16k
-        processed_tensors = []
-        for wav in wav_tensors:
-            wav = wav.to(self.device)
-            if sr != 16000:
-                import torchaudio.transforms as T
-                wav = T.Resample(sr, 16000).to(self.device)(wav)
-            processed_tensors.append(wav)
+            # 1. Gather & Normalize to 16k
+            processed_tensors = self._to_16k(wav_tensors, sample_rates)
             
-        # 2. Batch Inference
-        # Note: denoiser model usually prefers single-batch or properly padded batch.
-        # For simplicity and robustness against varying lengths, we do a loop 
-        # but keep it all on GPU to avoid I/O.
-        final_tensors = []
-        with torch.no_grad():
-            for wav in processed_tensors:
-                # Add batch dim [1, 1, T] -> [1, T] result
-                clean = self.model(wav[None])[0]
-                final_tensors.append(clean.cpu())
-                
-        return final_tensors
-
-fb_denoiser = FBDenoiserService()
+            # 2. Batch Inference
+            # Note: denoiser model usually prefers single-batch or properly padded batch.
+            # For simplicity and robustness against varying lengths, we do a loop 
+            # but keep it all on GPU to avoid I/O.
+            def _denoise(wav: torch.Tensor) -> torch.Tensor:
+                with torch.no_grad():
+                    # Add batch dim [1, 1, T] -> [1, T] result
+                    return self.model(wav[None])[0].cpu()
+
+            if self.device.type == "cpu":
+                # CPU placement (DEVICE_AFFINITY): items run side by side on the CPU stage pool
+                return cpu_map(_denoise, processed_tensors)
+            return [_denoise(wav) for wav in processed_tensors]
+
+fb_denoiser = create_engine("denoiser", FBDenoiserService)
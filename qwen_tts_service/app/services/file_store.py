@@ -4,7 +4,7 @@ import uuid
 import threading
 import logging
 import shutil
-from typing import Optional, List
+from typing import Optional, List, Dict
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
@@ -59,6 +59,30 @@ class FileStore:
             pass
         return None
 
+    def delete(self, file_id: str) -> bool:
+        """Remove a stored file before it expires. Returns False if it was already gone."""
+        path = self.get_path(file_id)
+        if not path:
+            return False
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            return False
+        logger.info(f"Deleted file {file_id}")
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        """Number of stored files and their total size."""
+        files, size = 0, 0
+        try:
+            for entry in os.scandir(self.storage_dir):
+                if entry.is_file():
+                    files += 1
+                    size += entry.stat().st_size
+        except OSError:
+            pass
+        return {"files": files, "bytes": size}
+
     def _cleanup_loop(self):
         """Background loop to remove expired files."""
         while not self._stop_event.is_set():
@@ -1,102 +1,684 @@
 import time
+import uuid
+import asyncio
 import logging
 import threading
 import traceback
-from typing import List, Dict, Any
+import collections
+import concurrent.futures
+from typing import List, Dict, Any, Optional, Tuple
 from app.core.config import settings
 from app.models.requests import LANGUAGE_MAP
 from app.services.queue_service import queue_service
-from app.services.tts_engine import tts_engine
-from app.services.audio_pipeline import audio_pipeline
 from app.services.file_store import file_store
-from app.services.asr_engine import asr_engine
+from app.services.result_cache import result_cache
+from app.services.audio_encoder import audio_encoder, CODECS
+from app.services.audio_loader import audio_loader
+from app.services import metrics
+from app.services.tracing import tracer
+from app.services.devices import device_pool, lane_for, pinned_lanes
 import json
+import base64
 import os
 
 logger = logging.getLogger(__name__)
 
+# Model each queue operation runs on (ModelManager residency names)
+OPERATION_MODELS = {
+    "voice_design": "tts:VoiceDesign",
+    "custom_voice": "tts:CustomVoice",
+    "voice_clone": "tts:VoiceClone",
+    "voice_clone_enhanced": "tts:VoiceClone",
+    "transcribe": "asr",
+    "diarize": "diarization",
+    "analyze": "asr",
+}
+
+# Operations whose inputs are decoded by the shared audio loader (16 kHz mono)
+PREFETCH_OPERATIONS = {"transcribe", "diarize", "analyze"}
+PREFETCH_SR = 16000
+
+# Item fields that must match for items to share one model call
+BATCH_KEY_FIELDS = ("temperature", "seed", "return_timestamps", "long_form", "analyze_mode")
+# Seeded items always run as a batch of one: with company their output would depend on
+# what else was queued, so a fixed seed would not reproduce (nor be safe to cache)
+
+# Registry name of the lane shared by all workers (operations without a GPU pin)
+SHARED_LANE = "shared"
+
 class GPUWorker:
-    def __init__(self):
+    """
+    One scheduler thread. 'lanes' are the queue lanes it drains, in order:
+    its device's pinned lane first, then the shared lane (None).
+    """
+    def __init__(self, device: Optional[str] = None, lanes: Tuple[Optional[str], ...] = (None,)):
+        self.device = device
+        self.lanes = lanes
         self._stop_event = threading.Event()
         self._thread = None
+        # In-process items from the synchronous endpoints (never touch Redis)
+        self._local = collections.deque()
+        self._local_cond = threading.Condition()
+        # Reported in the worker heartbeat
+        self.batches_processed = 0
+        self.items_processed = 0
 
     def start(self):
         if self._thread and self._thread.is_alive():
             return
         self._stop_event.clear()
-        self._thread = threading.Thread(target=self._run_loop, name="GPUWorkerThread", daemon=True)
+        name = f"GPUWorkerThread-{self.device}" if self.device else "GPUWorkerThread"
+        self._thread = threading.Thread(target=self._run_loop, name=name, daemon=True)
         self._thread.start()
-        logger.info("GPU Worker Thread started.")
+        logger.info(f"GPU Worker Thread started (lanes: {[lane or SHARED_LANE for lane in self.lanes]}).")
+
+    def is_alive(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
 
     def stop(self):
         self._stop_event.set()
+        with self._local_cond:
+            self._local_cond.notify_all()
         if self._thread:
             self._thread.join(timeout=5)
+        with self._local_cond:
+            while self._local:
+                self._fail(self._local.popleft(), RuntimeError("GPU worker stopped"))
         logger.info("GPU Worker Thread stopped.")
 
+    async def run_sync(self, operation: str, item_errors: bool = False, **fields) -> List[Any]:
+        """
+        Run a synchronous request through the batch scheduler and await its results.
+        List-valued fields are per item (they must all have the same length), scalars
+        are shared. Returns WAV bytes for TTS operations and result dicts for
+        transcribe / diarize / analyze, in item order. The first failed item raises,
+        unless item_errors: then it comes back as {"error": message} in its place.
+        """
+        if not settings.RUN_GPU_WORKER_IN_API:
+            return await self._run_remote(operation, fields, item_errors)
+
+        items = self._expand(operation, fields)
+        futures = [item["_future"] for item in items]
+        if operation in PREFETCH_OPERATIONS:
+            # Hash the inputs for the result cache while the request waits to be batched
+            result_cache.prefetch_digests(self._resolve_audio(item.get("ref_audio")) for item in items)
+
+        if settings.SYNC_COALESCE_ENABLED and self.is_alive():
+            with self._local_cond:
+                self._local.extend(items)
+                self._local_cond.notify()
+        else:
+            # No scheduler thread: run the request as its own batch off the event loop
+            from app.services.inference_executor import inference_executor
+            await inference_executor.run(self._run_direct, operation, items)
+
+        results = await asyncio.gather(*(asyncio.wrap_future(f) for f in futures), return_exceptions=item_errors)
+        return [{"error": str(r)} if isinstance(r, Exception) else r for r in results]
+
+    async def _run_remote(self, operation: str, fields: Dict[str, Any], item_errors: bool = False) -> List[Any]:
+        """
+        Synchronous request served by a standalone worker process: the items go
+        through the Redis queue (joining its batches) and each one is answered
+        on its own reply key, collected by the remote_replies thread. Redis is
+        only touched from threads; on timeout the still-queued items are withdrawn.
+        """
+        from app.services.inference_executor import inference_executor
+        items = self._expand(operation, fields, local=False)
+        item_ids = [item["item_id"] for item in items]
+        futures = remote_replies.expect(item_ids)
+        saved = None
+        try:
+            saved = await inference_executor.run(self._submit_remote, operation, items)
+            replies = await asyncio.wait_for(
+                asyncio.gather(*(asyncio.wrap_future(f) for f in futures)), settings.SYNC_REMOTE_TIMEOUT_S
+            )
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"No reply from a GPU worker within {settings.SYNC_REMOTE_TIMEOUT_S}s")
+        finally:
+            remote_replies.forget(item_ids)
+            if saved is not None:  # Queued (a failed submit cleans up after itself)
+                unanswered = [item for item, f in zip(items, futures) if f.cancelled() or not f.done()]
+                if unanswered or saved:
+                    await inference_executor.run(self._cleanup_remote, unanswered, saved)
+
+        results = []
+        for reply in replies:
+            if "error" in reply and item_errors:
+                results.append({"error": reply["error"]})
+            elif "error" in reply:
+                error_type = ValueError if reply.get("error_type") == "ValueError" else RuntimeError
+                raise error_type(reply["error"])
+            else:
+                results.append(base64.b64decode(reply["audio"]) if "audio" in reply else reply["result"])
+        return results
+
+    def _submit_remote(self, operation: str, items: List[Dict[str, Any]]) -> List[str]:
+        """Check that a worker serves the lane, stage uploaded bytes and enqueue. Returns the staged file ids."""
+        from app.services.worker_registry import worker_registry, WorkerUnavailableError
+        lane = lane_for(operation) or SHARED_LANE
+        if not any(lane in w.get("lanes", [SHARED_LANE]) for w in worker_registry.workers()):
+            raise WorkerUnavailableError(f"No GPU worker process serves the '{lane}' lane")
+
+        saved = []
+        try:
+            for item in items:
+                # Uploaded bytes reach the worker through the (shared) file store
+                if isinstance(item.get("ref_audio"), (bytes, bytearray)):
+                    item["ref_audio"] = file_store.save(item["ref_audio"], f"sync_{item['item_id']}.wav")
+                    saved.append(item["ref_audio"])
+            queue_service.submit_sync(items)
+        except Exception:
+            for file_id in saved:
+                file_store.delete(file_id)
+            raise
+        return saved
+
+    def _cleanup_remote(self, unanswered: List[Dict[str, Any]], saved: List[str]):
+        try:
+            if unanswered:
+                withdrawn = queue_service.cancel_sync(unanswered)
+                logger.warning(f"GPU Worker: {len(unanswered)} remote items unanswered, {withdrawn} withdrawn from the queue")
+            for file_id in saved:
+                file_store.delete(file_id)
+        except Exception as e:
+            logger.error(f"GPU Worker: Remote request cleanup failed: {e}")
+
+    def local_depth(self) -> Dict[str, int]:
+        """Synchronous-request items waiting per operation."""
+        with self._local_cond:
+            return dict(collections.Counter(item["operation"] for item in self._local))
+
+    def _expand(self, operation: str, fields: Dict[str, Any], local: bool = True) -> List[Dict[str, Any]]:
+        lengths = {len(v) for v in fields.values() if isinstance(v, list)}
+        if len(lengths) > 1:
+            raise ValueError(f"Batch fields have mismatched lengths: {sorted(lengths)}")
+        count = lengths.pop() if lengths else 1
+
+        now = time.monotonic()
+        now_ns = time.time_ns()
+        trace_ctx = tracer.current() if tracer.enabled else None
+        items = []
+        for i in range(count):
+            item = {k: (v[i] if isinstance(v, list) else v) for k, v in fields.items()}
+            item.setdefault("text", "")
+            if local:
+                item.update(
+                    operation=operation,
+                    item_id=f"local-{uuid.uuid4().hex}",
+                    _future=concurrent.futures.Future(),
+                    _submitted=now,
+                    _submitted_ns=now_ns
+                )
+            else:
+                # JSON-safe payload for the Redis queue
+                item.update(operation=operation, item_id=f"sync-{uuid.uuid4().hex}", enqueued_at=now_ns / 1e9)
+            if trace_ctx:
+                item["trace_id"], item["parent_span_id"] = trace_ctx
+            items.append(item)
+        return items
+
+    def _run_direct(self, operation: str, items: List[Dict[str, Any]]):
+        groups = collections.defaultdict(list)
+        for item in self._serve_from_cache(items):
+            groups[self._batch_key(item)].append(item)
+        for group in groups.values():
+            metrics.observe_batch(operation, group)
+            self._trace_wait(group)
+            self._process_group(operation, group)
+
+    def _pop_local(self, limit: int) -> List[Dict[str, Any]]:
+        """
+        Take up to 'limit' in-process items, holding the oldest one for at most
+        SYNC_COALESCE_MAX_WAIT_MS so concurrent requests can join its batch.
+        """
+        window = settings.SYNC_COALESCE_MAX_WAIT_MS / 1000.0
+        with self._local_cond:
+            if not self._local:
+                return []
+            deadline = self._local[0]["_submitted"] + window
+            while len(self._local) < limit and not self._stop_event.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._local_cond.wait(remaining)
+            return [self._local.popleft() for _ in range(min(limit, len(self._local)))]
+
+    def _wait_for_work(self, timeout: float):
+        """Idle sleep that wakes up early when a synchronous request arrives."""
+        with self._local_cond:
+            if not self._local and not self._stop_event.is_set():
+                self._local_cond.wait(timeout)
+
+    def _batch_key(self, item: Dict[str, Any]) -> Tuple:
+        key = (item["operation"],) + tuple(item.get(f) for f in BATCH_KEY_FIELDS)
+        return key + (item["item_id"],) if item.get("seed") is not None else key
+
+    def _bind_device(self):
+        """Implicit CUDA allocations of this thread (library scratch buffers, streams) go to its device."""
+        if not (self.device or "").startswith("cuda"):
+            return
+        try:
+            import torch
+            if torch.cuda.is_available():
+                torch.cuda.set_device(torch.device(self.device))
+        except Exception as e:
+            logger.warning(f"GPU Worker: Could not bind thread to {self.device}: {e}")
+
     def _run_loop(self):
+        self._bind_device()
         logger.info(f"GPU Worker Loop active (Max Batch: {settings.QUEUE_MAX_BATCH_SIZE})")
         while not self._stop_event.is_set():
             try:
-                # 1. Fetch items from queue
-                batch_items = queue_service.pop_items(settings.QUEUE_MAX_BATCH_SIZE)
+                # 1. Fetch items: synchronous requests first, then fill up from the Redis queue
+                max_batch = settings.QUEUE_MAX_BATCH_SIZE
+                batch_items = self._pop_local(max_batch)
+                if len(batch_items) < max_batch:
+                    batch_items += queue_service.pop_items(max_batch - len(batch_items), self.lanes)
                 
                 if not batch_items:
                     # Sleep if nothing to do
-                    time.sleep(settings.QUEUE_POLL_INTERVAL)
+                    self._wait_for_work(settings.QUEUE_POLL_INTERVAL)
                     continue
 
-                # 2. Group items by operation type
+                # Answer repeated ASR / diarization requests before they reach the GPU
+                batch_items = self._serve_from_cache(batch_items)
+                if not batch_items:
+                    continue
+
+                # 2. Group items by operation type (and the parameters shared by a model call)
                 groups = {}
                 for item in batch_items:
-                    op = item["operation"]
-                    if op not in groups:
-                        groups[op] = []
-                    groups[op].append(item)
+                    key = self._batch_key(item)
+                    if key not in groups:
+                        groups[key] = []
+                    groups[key].append(item)
 
-                # Prioritize operation that matches the currently active engine to avoid swapping
+                # Prioritize operations whose model is already resident to avoid swapping
                 from app.services.model_manager import model_manager
-                active = model_manager.active_engine
-                
-                tts_ops = {"voice_design", "custom_voice", "voice_clone", "voice_clone_enhanced"}
-                asr_ops = {"transcribe"}
+                candidate_keys = [
+                    key for key in groups
+                    if model_manager.is_resident(OPERATION_MODELS.get(key[0], ""))
+                ]
                 
-                preferred_op = None
-                if active == "tts":
-                    # Pick largest TTS group available
-                    candidate_ops = [op for op in groups if op in tts_ops]
-                    if candidate_ops:
-                        preferred_op = max(candidate_ops, key=lambda k: len(groups[k]))
-                elif active == "asr":
-                    # Pick largest ASR group (currently only transcribe)
-                    candidate_ops = [op for op in groups if op in asr_ops]
-                    if candidate_ops:
-                        preferred_op = max(candidate_ops, key=lambda k: len(groups[k]))
+                preferred_key = None
+                if candidate_keys:
+                    preferred_key = max(candidate_keys, key=lambda k: len(groups[k]))
 
                 # 3. Find the best group to process
-                largest_op = preferred_op or max(groups, key=lambda k: len(groups[k]))
-                items_to_process = groups.pop(largest_op)
+                largest_key = preferred_key or max(groups, key=lambda k: len(groups[k]))
+                largest_op = largest_key[0]
+                items_to_process = groups.pop(largest_key)
                 
-                # Push deferred groups back to Redis (front of queue)
+                # Push deferred groups back (front of their queue)
                 if groups:
                     logger.info(f"GPU Worker: Deferring {sum(len(v) for v in groups.values())} mixed-type items to avoid model swap")
-                    for op, deferred_items in groups.items():
-                        queue_service.push_to_front(deferred_items)
+                    deferred = [item for group in groups.values() for item in group]
+                    self._defer(deferred)
+
+                # Decode this batch's audio in parallel, and the next batch's while the GPU works
+                self._prefetch(items_to_process)
+                self._prefetch(self._upcoming(max_batch))
 
                 # 3. Process the largest group
                 logger.info(f"GPU Worker: Processing {len(items_to_process)} items for operation '{largest_op}'")
+                metrics.observe_batch(largest_op, items_to_process)
+                self._trace_wait(items_to_process)
                 self._process_group(largest_op, items_to_process)
+                self.batches_processed += 1
+                self.items_processed += len(items_to_process)
 
             except Exception as e:
                 logger.error(f"Error in GPU Worker Loop: {e}")
                 logger.error(traceback.format_exc())
                 time.sleep(1) # Back off on error
 
+    def _upcoming(self, count: int) -> List[Dict[str, Any]]:
+        """Items likely to form the next batch: waiting sync requests, then the Redis head."""
+        with self._local_cond:
+            upcoming = list(self._local)[:count]
+        if len(upcoming) < count:
+            upcoming += queue_service.peek_items(count - len(upcoming), self.lanes)
+        return upcoming
+
+    def _prefetch(self, items: List[Dict[str, Any]]):
+        try:
+            paths = []
+            for item in items:
+                if item.get("operation") not in PREFETCH_OPERATIONS:
+                    continue
+                path = self._resolve_audio(item.get("ref_audio"))
+                result_cache.prefetch_digests([path])
+                if (item.get("operation") in ("diarize", "analyze") and isinstance(path, str)
+                        and audio_loader.is_longer_than(path, settings.DIARIZATION_LONG_FORM_THRESHOLD_S)):
+                    continue  # Decoded window by window, never whole
+                paths.append(path)
+            audio_loader.prefetch(paths, PREFETCH_SR)
+        except Exception as e:
+            logger.error(f"GPU Worker: Prefetch failed: {e}")
+
+    def _trace_wait(self, items: List[Dict[str, Any]]):
+        """queue.wait span: submission until this batch picked the item up."""
+        if not tracer.enabled:
+            return
+        now = time.time_ns()
+        for item in items:
+            start = item.get("_submitted_ns") or int(item.get("enqueued_at", 0) * 1e9) or now
+            tracer.record("queue.wait", item, start, now)
+
+    def _trace_stage(self, name: str, items: List[Dict[str, Any]], start_ns: int, **attributes):
+        if not tracer.enabled:
+            return
+        end = time.time_ns()
+        for item in items:
+            tracer.record(name, item, start_ns, end, **attributes)
+
+    def _await_audio(self, items: List[Dict[str, Any]]):
+        """Wait for this batch's prefetched decodes so audio loading shows up as its own span."""
+        if not tracer.enabled or not any(item.get("operation") in PREFETCH_OPERATIONS for item in items):
+            return
+        t0 = time.time_ns()
+        for item in items:
+            path = self._resolve_audio(item.get("ref_audio"))
+            if not isinstance(path, str) or not os.path.exists(path) or audio_loader.is_longer_than(path, settings.DIARIZATION_LONG_FORM_THRESHOLD_S):
+                continue
+            try:
+                audio_loader.submit(path, PREFETCH_SR).result()
+            except Exception:
+                pass  # Reported by the engine on its own load
+        self._trace_stage("load", items, t0)
+
+    def _defer(self, items: List[Dict[str, Any]]):
+        local = [item for item in items if "_future" in item]
+        remote = [item for item in items if "_future" not in item]
+        if local:
+            with self._local_cond:
+                self._local.extendleft(reversed(local))
+        if remote:
+            queue_service.push_to_front(remote)
+
+    def _resolve_audio(self, ref: Optional[str]) -> Optional[str]:
+        """Resolve a file_id to a path, falling back to the raw value (absolute path)."""
+        resolved = file_store.get_path(ref)
+        return str(resolved) if resolved else ref
+
+    def _asr_language(self, item: Dict[str, Any]) -> Optional[str]:
+        """Map a queue language code (e.g. "en") to the ASR model's language name."""
+        from app.api.v1.endpoints.asr import ASR_LANGUAGE_MAP
+        from app.models.asr_models import ASRLanguageEnum
+
+        lang_code = item.get("language", "auto")
+        if lang_code == "auto":
+            return None
+        try:
+            # Try mapping from ISO code
+            return ASR_LANGUAGE_MAP.get(ASRLanguageEnum(lang_code))
+        except ValueError:
+            # Fallback: check if it's already a full name like "English"
+            return lang_code
+
+    def _result_cache_key(self, item: Dict[str, Any]) -> Optional[str]:
+        """
+        Only from digests already hashed by _prefetch (or at submission): the
+        scheduler thread never reads whole files. Not hashed yet = cache miss.
+        """
+        operation = item["operation"]
+        if operation == "transcribe":
+            return result_cache.asr_key(
+                self._resolve_audio(item.get("ref_audio")),
+                self._asr_language(item),
+                item.get("return_timestamps", False),
+                item.get("long_form"),
+                memo_only=True
+            )
+        if operation == "diarize":
+            return result_cache.diarization_key(
+                self._resolve_audio(item.get("ref_audio")),
+                item.get("num_speakers"),
+                item.get("min_speakers"),
+                item.get("max_speakers"),
+                memo_only=True
+            )
+        return None
+
+    def _cached_or_run(self, items: List[Dict[str, Any]], run) -> List[Dict[str, Any]]:
+        """Result-cache lookup per item; run(misses) computes and returns the missing dicts."""
+        keys = [self._result_cache_key(item) for item in items]
+        results = [result_cache.get(k) for k in keys]
+        missing = [i for i, res in enumerate(results) if res is None]
+        if missing:
+            for i, out in zip(missing, run([items[i] for i in missing])):
+                result_cache.put(keys[i], out)
+                results[i] = out
+        return results
+
+    def _analyze(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Smart transcript: timestamped ASR + diarization of the same files, aligned
+        into speaker turns. Both engines read the decode shared through the audio
+        loader cache, and each half is cached like a plain transcribe / diarize.
+        In 'speaker_turns' mode diarization runs first and each turn is
+        transcribed on its own (see _transcribe_turns).
+        """
+        from app.services.asr_engine import asr_engine, asr_result_to_dict
+        from app.services.diarization_engine import diarization_engine, diarization_result_to_dict
+        from app.services.alignment import build_turns
+
+        asr_items = [dict(item, operation="transcribe", return_timestamps=True) for item in items]
+        diarize_items = [dict(item, operation="diarize") for item in items]
+
+        def _transcribe(batch):
+            languages = [self._asr_language(item) for item in batch]
+            res = asr_engine.transcribe(
+                audio=[self._resolve_audio(item.get("ref_audio")) for item in batch],
+                language=languages if any(languages) else None,
+                return_timestamps=True,
+                long_form=batch[0].get("long_form")
+            )
+            return [asr_result_to_dict(r) for r in res]
+
+        def _diarize(batch):
+            res = diarization_engine.diarize(
+                audio_paths=[self._resolve_audio(item.get("ref_audio")) for item in batch],
+                num_speakers=[item.get("num_speakers") for item in batch],
+                min_speakers=[item.get("min_speakers") for item in batch],
+                max_speakers=[item.get("max_speakers") for item in batch]
+            )
+            return [diarization_result_to_dict(r) for r in res]
+
+        # analyze_mode is part of the batch key, so the whole group shares it
+        if items[0].get("analyze_mode") == "speaker_turns":
+            return self._transcribe_turns(items, self._cached_or_run(diarize_items, _diarize))
+
+        transcripts = self._cached_or_run(asr_items, _transcribe)
+        diarizations = self._cached_or_run(diarize_items, _diarize)
+
+        results = []
+        for item, asr_out, dia_out in zip(items, transcripts, diarizations):
+            out = {
+                "text": asr_out["text"],
+                "language": asr_out.get("language") or "",
+                "num_speakers": dia_out["num_speakers"],
+                "turns": build_turns(asr_out, dia_out["segments"], item.get("alignment") or "midpoint")
+            }
+            if "error" in dia_out:
+                out["error"] = dia_out["error"]
+            results.append(out)
+        return results
+
+    def _transcribe_turns(self, items: List[Dict[str, Any]], diarizations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Cut every file into speaker turns and transcribe all turns of the group
+        as one padded ASR batch. Each turn's text belongs to its speaker by
+        construction, so no timestamp alignment is needed. Turns longer than
+        ASR_CHUNK_MAX_SECONDS are split at VAD pauses and re-joined afterwards.
+        """
+        from collections import Counter
+        from app.services.alignment import speaker_turn_spans
+        from app.services.asr_engine import asr_engine, ASR_SR, UNSPACED_LANGUAGES
+        from app.services.vad import speech_chunks
+
+        max_len = int(settings.ASR_CHUNK_MAX_SECONDS * ASR_SR)
+        waveforms, languages, owners = [], [], []   # owners: (item index, turn index) per waveform
+        turns_per_item: List[List[Dict[str, Any]]] = []
+
+        for n, (item, dia_out) in enumerate(zip(items, diarizations)):
+            spans = speaker_turn_spans(
+                dia_out["segments"], settings.ANALYZE_TURN_MERGE_GAP_S,
+                settings.ANALYZE_TURN_MIN_SECONDS, settings.ASR_CHUNK_MAX_SECONDS
+            )
+            turns_per_item.append([dict(span, text=[]) for span in spans])
+            if not spans:
+                continue
+
+            audio, _ = audio_loader.load(self._resolve_audio(item.get("ref_audio")), ASR_SR)
+            language = self._asr_language(item)
+            for t, span in enumerate(spans):
+                start = int(span["start"] * ASR_SR)
+                end = min(len(audio), int(span["end"] * ASR_SR))
+                pieces = [(start, end)]
+                if end - start > max_len:
+                    pieces = [
+                        (start + s, start + e) for s, e in
+                        speech_chunks(audio[start:end], ASR_SR, settings.ASR_CHUNK_MAX_SECONDS, settings.ASR_VAD_MIN_SILENCE_MS)
+                    ] or [(s, min(end, s + max_len)) for s in range(start, end, max_len)]
+                for s, e in pieces:
+                    if e > s:
+                        waveforms.append(audio[s:e])
+                        languages.append(language)
+                        owners.append((n, t))
+
+        logger.info(f"GPU Worker: Transcribing {len(waveforms)} speaker turns from {len(items)} files")
+        asr_results = asr_engine.transcribe_waveforms(waveforms, languages, False)
+
+        detected: List[List[str]] = [[] for _ in items]
+        for (n, t), res in zip(owners, asr_results):
+            if res.text and res.text.strip():
+                turns_per_item[n][t]["text"].append(res.text.strip())
+            if getattr(res, "language", None):
+                detected[n].append(res.language)
+
+        results = []
+        for n, dia_out in enumerate(diarizations):
+            language = Counter(detected[n]).most_common(1)[0][0] if detected[n] else ""
+            sep = "" if language in UNSPACED_LANGUAGES else " "
+            turns = []
+            for turn in turns_per_item[n]:
+                text = sep.join(turn["text"])
+                if text:
+                    turns.append({"speaker": turn["speaker"], "start": turn["start"], "end": turn["end"], "text": text})
+            out = {
+                "text": sep.join(turn["text"] for turn in turns),
+                "language": language,
+                "num_speakers": dia_out["num_speakers"],
+                "turns": turns
+            }
+            if "error" in dia_out:
+                out["error"] = dia_out["error"]
+            results.append(out)
+        return results
+
+    def _serve_from_cache(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Complete cache hits immediately and return the items that still need the GPU."""
+        if not result_cache.enabled:
+            return items
+
+        pending = []
+        for item in items:
+            cached = None
+            try:
+                cached = result_cache.get(self._result_cache_key(item))
+            except Exception as e:
+                logger.error(f"GPU Worker: Result cache lookup failed for {item['item_id']}: {e}")
+
+            if cached is None:
+                pending.append(item)
+            else:
+                self._save_result(item["operation"], item, cached)
+
+        if len(pending) < len(items):
+            logger.info(f"GPU Worker: Served {len(items) - len(pending)} items from result cache")
+        return pending
+
+    def _save_result(self, operation: str, item: Dict[str, Any], content: Any):
+        """Hand a result to its waiting request (in-process future or Redis reply), or persist it for a queued item."""
+        future = item.get("_future")
+        if future is not None:
+            metrics.ITEMS.labels(operation, "done").inc()
+            if not future.done():
+                future.set_result(content)
+            return
+        if item.get("reply"):
+            metrics.ITEMS.labels(operation, "done").inc()
+            try:
+                queue_service.send_reply(item["item_id"], content)
+            except Exception as e:
+                logger.error(f"Error replying to item {item['item_id']}: {e}")
+            return
+
+        if isinstance(content, dict):
+            t0 = time.time_ns()
+            payload = json.dumps(content).encode('utf-8')
+            tracer.record("postprocess", item, t0, format="json")
+            self._store_result(operation, item, payload, ".json")
+            return
+
+        # Compressed codecs are encoded in the process pool; the GPU thread moves on
+        fmt = item.get("output_format") or "wav"
+        if fmt == "wav":
+            self._store_result(operation, item, content, ".wav")
+            return
+        t0 = time.time_ns()
+        try:
+            encoded = audio_encoder.submit(content, fmt)
+        except Exception as e:
+            self._fail(item, e)
+            return
+
+        def _on_encoded(f):
+            if f.exception() is not None:
+                tracer.record("postprocess", item, t0, error=str(f.exception()), format=fmt)
+                self._fail(item, f.exception())
+            else:
+                tracer.record("postprocess", item, t0, format=fmt)
+                self._store_result(operation, item, f.result(), CODECS[fmt][2])
+        encoded.add_done_callback(_on_encoded)
+
+    def _store_result(self, operation: str, item: Dict[str, Any], content: bytes, ext: str):
+        item_id = item["item_id"]
+        t0 = time.time_ns()
+        try:
+            filename = f"queue_{operation}_{item_id}{ext}"
+            file_id = file_store.save(content, filename)
+            url = f"/api/v1/files/{file_id}"
+            queue_service.mark_done(item_id, url)
+            metrics.ITEMS.labels(operation, "done").inc()
+            tracer.record("persist", item, t0, bytes=len(content))
+        except Exception as e:
+            logger.error(f"Error saving item {item_id}: {e}")
+            tracer.record("persist", item, t0, error=str(e))
+            queue_service.mark_error(item_id, str(e))
+
+    def _fail(self, item: Dict[str, Any], error: Exception):
+        metrics.ITEMS.labels(item.get("operation", "unknown"), "error").inc()
+        future = item.get("_future")
+        if future is not None:
+            if not future.done():
+                future.set_exception(error)
+            return
+        if item.get("reply"):
+            queue_service.send_reply(item["item_id"], error=error)
+            return
+        queue_service.mark_error(item["item_id"], str(error))
+
     def _process_group(self, operation: str, items: List[Dict[str, Any]]):
+        self._await_audio(items)
+        t_inference = time.time_ns()
+        error = None
         try:
             # Common parameters
             texts = [item["text"] for item in items]
             temperature = items[0].get("temperature", 1.0)
+            seed = items[0].get("seed")
             
             # Map the language code (e.g. "en") to model supported string (e.g. "English")
             languages = []
@@ -108,15 +690,18 @@ class GPUWorker:
             results = []
 
             if operation == "voice_design":
+                from app.services.tts_engine import tts_engine
                 instructs = [item.get("instruct", "Happy") for item in items]
                 results = tts_engine.generate_voice_design(
                     text=texts,
                     instruct=instructs,
                     language=languages,
-                    temperature=temperature
+                    temperature=temperature,
+                    seed=seed
                 )
 
             elif operation == "custom_voice":
+                from app.services.tts_engine import tts_engine
                 speakers = [item.get("speaker", "Speaker_001") for item in items]
                 instructs = [item.get("instruct") for item in items]
                 results = tts_engine.generate_custom_voice(
@@ -124,10 +709,12 @@ class GPUWorker:
                     speaker=speakers,
                     language=languages,
                     instruct=instructs,
-                    temperature=temperature
+                    temperature=temperature,
+                    seed=seed
                 )
 
             elif operation == "voice_clone":
+                from app.services.tts_engine import tts_engine
                 ref_audios = [item.get("ref_audio") for item in items]
                 ref_texts = [item.get("ref_text") for item in items]
                 results = tts_engine.generate_voice_clone(
@@ -135,7 +722,8 @@ class GPUWorker:
                     ref_audio=ref_audios,
                     ref_text=ref_texts,
                     language=languages,
-                    temperature=temperature
+                    temperature=temperature,
+                    seed=seed
                 )
 
             elif operation == "voice_clone_enhanced":
@@ -156,7 +744,7 @@ class GPUWorker:
                         resolved_refs.append(str(resolved))
                     else:
                         logger.error(f"GPU Worker: Missing reference audio for item {item['item_id']}: {ref}")
-                        queue_service.mark_error(item["item_id"], f"Reference audio not found: {ref}")
+                        self._fail(item, ValueError(f"Reference audio not found: {ref}"))
 
                 if not valid_items:
                     return
@@ -167,65 +755,38 @@ class GPUWorker:
                 ref_texts = [item.get("ref_text") for item in items]
                 languages = [LANGUAGE_MAP.get(item.get("language", "Auto"), "Auto") for item in items]
 
+                from app.services.audio_pipeline import audio_pipeline
                 results = audio_pipeline.process_voice_clone_enhanced(
                     text=texts,
                     ref_audio=resolved_refs,
                     ref_text=ref_texts,
                     language=languages,
-                    temperature=temperature
+                    temperature=temperature,
+                    seed=seed
                 )
             elif operation == "transcribe":
-                ref_audios = []
-                for item in items:
-                    path = item.get("ref_audio")
-                    # Try to resolve file_id
-                    resolved = file_store.get_path(path)
-                    ref_audios.append(str(resolved) if resolved else path)
-                
-                # Use asr language mapping
-                from app.api.v1.endpoints.asr import ASR_LANGUAGE_MAP
-                from app.models.asr_models import ASRLanguageEnum
-
-                mapped_languages = []
-                for item in items:
-                    lang_code = item.get("language", "auto")
-                    lang_name = None
-                    if lang_code != "auto":
-                        try:
-                            # Try mapping from ISO code
-                            enum_val = ASRLanguageEnum(lang_code)
-                            lang_name = ASR_LANGUAGE_MAP.get(enum_val)
-                        except ValueError:
-                            # Fallback: check if it's already a full name like "English"
-                            lang_name = lang_code
-                    mapped_languages.append(lang_name)
+                from app.services.asr_engine import asr_engine, asr_result_to_dict
+                ref_audios = [self._resolve_audio(item.get("ref_audio")) for item in items]
+                mapped_languages = [self._asr_language(item) for item in items]
                 
                 # ASR engine handles list of languages if needed, but here we pass the resolved names
                 asr_results = asr_engine.transcribe(
                     audio=ref_audios,
                     language=mapped_languages if any(mapped_languages) else None,
-                    return_timestamps=items[0].get("return_timestamps", False)
+                    return_timestamps=items[0].get("return_timestamps", False),
+                    long_form=items[0].get("long_form")
                 )
                 
                 # Convert results to a serializable format for storage
                 results = []
-                for res in asr_results:
-                    out = {"text": res.text, "language": res.language}
-                    if hasattr(res, 'time_stamps') and res.time_stamps:
-                        out["timestamps"] = [
-                            {"start": ts.start_time, "end": ts.end_time, "text": ts.text}
-                            for ts in res.time_stamps
-                        ]
-                    results.append(json.dumps(out).encode('utf-8'))
+                for item, res in zip(items, asr_results):
+                    out = asr_result_to_dict(res)
+                    result_cache.put(self._result_cache_key(item), out)
+                    results.append(out)
             elif operation == "diarize":
-                from app.services.diarization_engine import diarization_engine
-                
-                ref_audios = []
-                for item in items:
-                    path = item.get("ref_audio")
-                    resolved = file_store.get_path(path)
-                    ref_audios.append(str(resolved) if resolved else path)
+                from app.services.diarization_engine import diarization_engine, diarization_result_to_dict
                 
+                ref_audios = [self._resolve_audio(item.get("ref_audio")) for item in items]
                 num_speakers = [item.get("num_speakers") for item in items]
                 min_speakers = [item.get("min_speakers") for item in items]
                 max_speakers = [item.get("max_speakers") for item in items]
@@ -238,35 +799,165 @@ class GPUWorker:
                 )
                 
                 results = []
-                for res in diarize_results:
-                    # Convert Pydantic models to dict for JSON serialization
-                    segments = [s.model_dump() for s in res["segments"]]
-                    out = {
-                        "segments": segments,
-                        "num_speakers": res["num_speakers"]
-                    }
-                    if "error" in res:
-                        out["error"] = res["error"]
-                    results.append(json.dumps(out).encode('utf-8'))
+                for item, res in zip(items, diarize_results):
+                    out = diarization_result_to_dict(res)
+                    result_cache.put(self._result_cache_key(item), out)
+                    results.append(out)
+            elif operation == "analyze":
+                results = self._analyze(items)
+
+            if len(results) != len(items):
+                # Unknown operation or an engine that dropped outputs: positions cannot be trusted,
+                # and an item left without a result would hang its waiting request (split below)
+                raise RuntimeError(f"{operation} returned {len(results)} results for {len(items)} items")
             
-            # Save results and update status
-            for i, item in enumerate(items):
-                item_id = item["item_id"]
-                try:
-                    audio_content = results[i]
-                    ext = ".json" if operation in ["transcribe", "diarize"] else ".wav"
-                    filename = f"queue_{operation}_{item_id}{ext}"
-                    file_id = file_store.save(audio_content, filename)
-                    url = f"/api/v1/files/{file_id}"
-                    queue_service.mark_done(item_id, url)
-                except Exception as e:
-                    logger.error(f"Error saving item {item_id}: {e}")
-                    queue_service.mark_error(item_id, str(e))
+            self._trace_stage("inference", items, t_inference, batch_size=len(items))
 
         except Exception as e:
-            logger.error(f"Group processing failed for {operation}: {e}")
+            logger.error(f"Group processing failed for {operation} ({len(items)} items): {e}")
             logger.error(traceback.format_exc())
-            for item in items:
-                queue_service.mark_error(item["item_id"], str(e))
+            self._trace_stage("inference", items, t_inference, batch_size=len(items), error=str(e))
+            error = e
+
+        if error is not None:
+            if len(items) == 1:
+                self._fail(items[0], error)
+                return
+            # Coalesced requests must not share one client's bad input: retry each
+            # half as its own batch until the failing items are isolated
+            mid = len(items) // 2
+            logger.info(f"GPU Worker: Splitting failed {operation} group into {mid} + {len(items) - mid} items")
+            self._process_group(operation, items[:mid])
+            self._process_group(operation, items[mid:])
+            return
+
+        # Save results and update status
+        for item, result in zip(items, results):
+            self._save_result(operation, item, result)
+
+class RemoteReplies:
+    """
+    Collects worker replies for this process's in-flight remote requests on
+    one thread: every SYNC_REMOTE_POLL_MS it pops all pending reply keys in a
+    single pipeline and resolves the waiting futures, so the event loop never
+    blocks on Redis and the round trips do not grow with the request count.
+    Idle (nothing pending) it sleeps until the next expect().
+    """
+    def __init__(self):
+        self._pending: Dict[str, concurrent.futures.Future] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def expect(self, item_ids: List[str]) -> List[concurrent.futures.Future]:
+        futures = [concurrent.futures.Future() for _ in item_ids]
+        with self._lock:
+            self._pending.update(zip(item_ids, futures))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="RemoteReplyThread", daemon=True)
+                self._thread.start()
+        self._wake.set()
+        return futures
+
+    def forget(self, item_ids: List[str]):
+        with self._lock:
+            for item_id in item_ids:
+                self._pending.pop(item_id, None)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                item_ids = list(self._pending)
+                if not item_ids:
+                    self._wake.clear()
+            if not item_ids:
+                self._wake.wait()
+                continue
+            try:
+                replies = queue_service.pop_replies(item_ids)
+            except Exception as e:
+                logger.error(f"Remote replies: Poll failed: {e}")
+                replies = {}
+            with self._lock:
+                for item_id, reply in replies.items():
+                    future = self._pending.pop(item_id, None)
+                    if future is not None and not future.cancelled():
+                        try:
+                            future.set_result(reply)
+                        except concurrent.futures.InvalidStateError:
+                            pass  # Cancelled by a timed-out request in the meantime
+            time.sleep(settings.SYNC_REMOTE_POLL_MS / 1000.0)
+
+remote_replies = RemoteReplies()
+
+class GPUWorkerPool:
+    """
+    One GPUWorker per device in DEVICES, so operations pinned to different GPUs
+    by DEVICE_AFFINITY run concurrently instead of taking turns in one loop.
+    With a single device this is one worker draining every lane, as before.
+    Synchronous requests go to the worker that owns their operation's lane.
+    """
+    def __init__(self):
+        self.workers: List[GPUWorker] = [GPUWorker()]
+
+    def start(self, devices: Optional[List[str]] = None):
+        """
+        devices=None: the configured pool; pinned lanes of devices outside it
+        are adopted by the first worker. An explicit list (a worker process
+        started with --device) serves only its own lanes plus the shared one.
+        """
+        if self.is_alive():
+            return
+        explicit = devices is not None
+        devices = list(devices) if explicit else device_pool()
+        orphans = [] if explicit else [lane for lane in pinned_lanes() if lane not in devices]
+
+        self.workers = []
+        for i, device in enumerate(devices):
+            lanes = (device,) + (tuple(orphans) if i == 0 else ()) + (None,)
+            self.workers.append(GPUWorker(device if len(devices) > 1 or explicit else None, lanes))
+        for worker in self.workers:
+            worker.start()
+
+    def stop(self):
+        for worker in self.workers:
+            worker.stop()
+
+    def is_alive(self) -> bool:
+        return bool(self.workers) and all(worker.is_alive() for worker in self.workers)
+
+    def lanes(self) -> List[str]:
+        return sorted({lane or SHARED_LANE for worker in self.workers for lane in worker.lanes})
+
+    def serves(self, operation: str) -> bool:
+        """Whether one of this process's workers drains the lane the operation is queued on."""
+        lane = lane_for(operation)
+        return any(lane in worker.lanes for worker in self.workers)
+
+    def _worker_for(self, operation: str) -> GPUWorker:
+        lane = lane_for(operation)
+        if lane:
+            for worker in self.workers:
+                if lane in worker.lanes:
+                    return worker
+        # Shared lane: keep concurrent requests in one worker so they coalesce
+        return self.workers[0]
+
+    async def run_sync(self, operation: str, item_errors: bool = False, **fields) -> List[Any]:
+        return await self._worker_for(operation).run_sync(operation, item_errors, **fields)
+
+    def local_depth(self) -> Dict[str, int]:
+        depth = collections.Counter()
+        for worker in self.workers:
+            depth.update(worker.local_depth())
+        return dict(depth)
+
+    @property
+    def batches_processed(self) -> int:
+        return sum(worker.batches_processed for worker in self.workers)
+
+    @property
+    def items_processed(self) -> int:
+        return sum(worker.items_processed for worker in self.workers)
 
-gpu_worker = GPUWorker()
+gpu_worker = GPUWorkerPool()
@@ -0,0 +1,31 @@
+import asyncio
+import logging
+import functools
+import concurrent.futures
+from typing import Callable, Any
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class InferenceExecutor:
+    """
+    Bounded thread pool for blocking engine calls made from async endpoints.
+    Keeps the uvicorn event loop free to serve /health, file downloads and
+    queue polls while the GPU is busy. Engines still serialize GPU access
+    through their own locks; this pool only bounds how many requests wait on them.
+    """
+    def __init__(self):
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=settings.INFERENCE_MAX_WORKERS,
+            thread_name_prefix="inference"
+        )
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+        logger.info("Inference executor shut down.")
+
+inference_executor = InferenceExecutor()
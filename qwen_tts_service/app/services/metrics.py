@@ -0,0 +1,116 @@
+import sys
+import time
+import logging
+from contextlib import contextmanager
+from typing import Iterator
+from prometheus_client import Counter, Histogram, REGISTRY, CONTENT_TYPE_LATEST, generate_latest
+from prometheus_client.core import GaugeMetricFamily
+
+# --- Metrics Tuning ---
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+WAIT_BUCKETS = (0.005, 0.015, 0.05, 0.1, 0.5, 1, 5, 15, 60, 300, 900, 3600)
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+# ----------------------
+
+logger = logging.getLogger(__name__)
+
+QUEUE_WAIT = Histogram(
+    "qwen_queue_wait_seconds", "Time from submission until a GPU batch picks the item up",
+    ["operation", "source"], buckets=WAIT_BUCKETS
+)
+BATCH_SIZE = Histogram(
+    "qwen_batch_size", "Items per GPU worker batch", ["operation"], buckets=BATCH_BUCKETS
+)
+STAGE_LATENCY = Histogram(
+    "qwen_stage_seconds", "Latency of one engine call (a whole batch)", ["stage"], buckets=LATENCY_BUCKETS
+)
+ITEMS = Counter(
+    "qwen_items_total", "Items completed by the GPU worker", ["operation", "status"]
+)
+MODEL_SWAP = Histogram(
+    "qwen_model_swap_seconds", "Model load / warm-tier offload / restore time", ["model", "kind"],
+    buckets=LATENCY_BUCKETS
+)
+MODEL_EVICTIONS = Counter(
+    "qwen_model_evictions_total", "Models moved off their device to make room", ["model"]
+)
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time an engine call into qwen_stage_seconds{stage=name}."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_LATENCY.labels(name).observe(time.perf_counter() - t0)
+
+def observe_batch(operation: str, items) -> None:
+    """Batch size plus the queue wait of each item (local items carry a monotonic timestamp)."""
+    BATCH_SIZE.labels(operation).observe(len(items))
+    now, wall = time.monotonic(), time.time()
+    for item in items:
+        if "_submitted" in item:
+            QUEUE_WAIT.labels(operation, "sync").observe(max(0.0, now - item["_submitted"]))
+        elif item.get("enqueued_at"):
+            QUEUE_WAIT.labels(operation, "queue").observe(max(0.0, wall - item["enqueued_at"]))
+
+class ServiceCollector:
+    """Gauges read at scrape time: queue depth, GPU memory, file store and loader cache size."""
+
+    def describe(self):
+        # Without it the registry calls collect() on register(), i.e. while gpu_worker
+        # (which imports this module) is still initializing, and on a live Redis
+        return []
+
+    def collect(self):
+        from app.services.queue_service import queue_service
+        from app.services.gpu_worker import gpu_worker
+        from app.services.file_store import file_store
+        from app.services.audio_loader import audio_loader
+        from app.core.config import settings
+
+        depth = GaugeMetricFamily("qwen_queue_depth", "Items waiting per operation", labels=["operation", "source"])
+        try:
+            for operation, count in queue_service.depth_by_operation().items():
+                depth.add_metric([operation, "queue"], count)
+        except Exception as e:
+            logger.error(f"Metrics: Queue depth unavailable: {e}")
+        for operation, count in gpu_worker.local_depth().items():
+            depth.add_metric([operation, "sync"], count)
+        yield depth
+
+        if not settings.RUN_GPU_WORKER_IN_API:
+            from app.services.worker_registry import worker_registry
+            try:
+                yield GaugeMetricFamily("qwen_gpu_workers", "Standalone GPU worker processes with a live heartbeat",
+                                        value=len(worker_registry.workers()))
+            except Exception as e:
+                logger.error(f"Metrics: Worker registry unavailable: {e}")
+
+        store = file_store.stats()
+        yield GaugeMetricFamily("qwen_file_store_bytes", "Bytes held in the file store", value=store["bytes"])
+        yield GaugeMetricFamily("qwen_file_store_files", "Files held in the file store", value=store["files"])
+
+        loader = audio_loader.stats()
+        yield GaugeMetricFamily("qwen_audio_loader_cache_bytes", "Decoded audio held in the loader cache", value=loader["size_bytes"])
+
+        # Only report GPU memory when torch is already loaded (never import it for a scrape).
+        # The warm-up thread may still be importing it: a partly initialized module has no .cuda yet
+        cuda = getattr(sys.modules.get("torch"), "cuda", None)
+        try:
+            available = cuda is not None and cuda.is_available()
+        except (AttributeError, ImportError):
+            available = False
+        if available:
+            peak = GaugeMetricFamily("qwen_gpu_memory_peak_bytes", "High-water mark of allocated GPU memory", labels=["device"])
+            allocated = GaugeMetricFamily("qwen_gpu_memory_allocated_bytes", "Currently allocated GPU memory", labels=["device"])
+            for i in range(cuda.device_count()):
+                peak.add_metric([f"cuda:{i}"], cuda.max_memory_allocated(i))
+                allocated.add_metric([f"cuda:{i}"], cuda.memory_allocated(i))
+            yield peak
+            yield allocated
+
+REGISTRY.register(ServiceCollector())
+
+def render() -> bytes:
+    return generate_latest(REGISTRY)
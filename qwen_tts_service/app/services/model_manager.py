@@ -1,56 +1,415 @@
+import gc
+import time
 import logging
 import threading
-from typing import Optional
+from pathlib import Path
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Optional, Callable, Dict, List, Any
+from app.core.config import settings
+from app.services import metrics
 
 logger = logging.getLogger(__name__)
 
+# --- Residency Tuning ---
+GB = 1024 ** 3
+# First-load footprint guesses, replaced by the measured value after the first load
+DEFAULT_FOOTPRINTS = {
+    "tts": 4.5 * GB,         # Qwen3-TTS 1.7B (bf16) + codec
+    "asr": 5.0 * GB,         # Qwen3-ASR 1.7B + ForcedAligner 0.6B (bf16)
+    "diarization": 0.5 * GB, # pyannote segmentation + embedding
+    "denoiser": 0.2 * GB,    # DNS48
+    "super_res": 0.1 * GB,   # NovaSR
+}
+MODULE_SEARCH_DEPTH = 3 # How deep to look for nn.Modules inside model wrappers
+MAX_CONTAINER_SCAN = 64 # Skip large lists/dicts (vocabularies, configs) while searching
+# -------------------------
+
+@dataclass
+class ResidentModel:
+    name: str
+    device: str
+    unload: Callable[[], None]
+    target: Optional[Callable[[], Any]] = None # Returns the loaded object (for the warm tier)
+    footprint_bytes: int = 0
+    host_bytes: int = 0
+    load_seconds: float = 0.0
+    last_used: float = field(default_factory=time.monotonic)
+    state: str = "device" # "device" or "host" (warm tier)
+
+def _family(name: str) -> str:
+    """'tts:VoiceClone' -> 'tts'"""
+    return name.split(":", 1)[0]
+
+def _is_cuda(device: Any) -> bool:
+    return str(device).startswith("cuda")
+
+def collect_modules(obj: Any, depth: int = MODULE_SEARCH_DEPTH) -> List[Any]:
+    """
+    Find the top-level torch.nn.Modules held by a model wrapper
+    (Qwen3TTSModel, Qwen3ASRModel, pyannote Pipeline, FastSR...).
+    """
+    import torch
+
+    found, seen = [], set()
+
+    def _walk(value, level):
+        if value is None or id(value) in seen or level < 0:
+            return
+        seen.add(id(value))
+        if isinstance(value, torch.nn.Module):
+            found.append(value)
+            return
+        if isinstance(value, (list, tuple)) and len(value) <= MAX_CONTAINER_SCAN:
+            for v in value:
+                _walk(v, level - 1)
+        elif isinstance(value, dict) and len(value) <= MAX_CONTAINER_SCAN:
+            for v in value.values():
+                _walk(v, level - 1)
+        elif hasattr(value, "__dict__") and not isinstance(value, type):
+            for v in vars(value).values():
+                _walk(v, level - 1)
+
+    _walk(obj, depth)
+    return found
+
+def _module_tensors(module) -> Dict[str, Any]:
+    """Unique parameters and buffers of a module, keyed by qualified name."""
+    tensors = {}
+    for name, p in module.named_parameters(remove_duplicate=True):
+        tensors[name] = p
+    for name, b in module.named_buffers(remove_duplicate=True):
+        tensors[name] = b
+    return tensors
+
 class ModelManager:
+    """
+    VRAM residency planner.
+    Engines load models through `loading()` so the manager can measure each
+    model's footprint and load time, and make room by evicting idle models
+    (LRU or cheapest-to-reload first) until the new one fits the budget.
+    Models wrapped in `using()` are pinned and never evicted mid-inference.
+
+    With MODEL_WARM_TIER enabled, evicted models are parked in host memory
+    (pinned RAM or a memory-mapped file cache) instead of being deleted, and
+    `using()` brings them back with a host-to-device copy.
+    """
     _instance = None
     _lock = threading.Lock()
-    
+
     def __new__(cls):
         with cls._lock:
             if cls._instance is None:
                 cls._instance = super(ModelManager, cls).__new__(cls)
                 cls._instance._initialize()
             return cls._instance
-    
+
     def _initialize(self):
-        self.active_engine: Optional[str] = None # 'tts' or 'asr'
-        self.engines = {} # Registry for engines to facilitate cross-unloading
-        self.PERSISTENT_ENGINES = {"diarization"} # Engines that stay in VRAM
-        
+        self.engines = {} # Registry of engine instances (informational / preload)
+        self.residents: Dict[str, ResidentModel] = {}
+        self.warm: Dict[str, ResidentModel] = {}
+        self._measured: Dict[str, int] = {} # Last measured footprint per model, survives eviction
+        self._pins: Dict[str, int] = {}
+        self._mmap_written = set()
+        self._residency_lock = threading.RLock()
+        self.evictions = 0
+        self.swaps = {"offload": 0, "restore": 0}
+        self.swap_seconds = {"offload": 0.0, "restore": 0.0}
+
     def register_engine(self, name: str, engine_instance):
-        """Register an engine instance (must have an unload() method)."""
+        """Register an engine instance."""
         self.engines[name] = engine_instance
         logger.info(f"ModelManager: Registered engine '{name}'")
-        
-    def acquire(self, name: str):
+
+    # --- Budget ---
+
+    def budget_bytes(self, device: Any) -> Optional[int]:
+        """VRAM available for model weights on `device`, or None when unbounded (CPU)."""
+        if not _is_cuda(device):
+            return None
+        if settings.MODEL_VRAM_BUDGET_GB > 0:
+            return int(settings.MODEL_VRAM_BUDGET_GB * GB)
+
+        import torch
+        if not torch.cuda.is_available():
+            return None
+        total = torch.cuda.get_device_properties(torch.device(device)).total_memory
+        return int(total * settings.MODEL_VRAM_BUDGET_FRACTION)
+
+    def used_bytes(self, device: Any) -> int:
+        with self._residency_lock:
+            return sum(r.footprint_bytes for r in self.residents.values() if r.device == str(device))
+
+    def host_used_bytes(self) -> int:
+        with self._residency_lock:
+            return sum(r.host_bytes for r in self.warm.values())
+
+    def estimate_bytes(self, name: str) -> int:
+        if name in self._measured:
+            return self._measured[name]
+        return int(DEFAULT_FOOTPRINTS.get(_family(name), 1 * GB))
+
+    # --- Residency ---
+
+    def is_resident(self, name: str) -> bool:
+        return name in self.residents
+
+    def is_warm(self, name: str) -> bool:
+        return name in self.warm
+
+    def resident_names(self) -> List[str]:
+        return list(self.residents.keys())
+
+    def _pick_victim(self, device: str, exclude: str) -> Optional[ResidentModel]:
+        candidates = [
+            r for r in self.residents.values()
+            if r.device == device and r.name != exclude and not self._pins.get(r.name)
+        ]
+        if not candidates:
+            return None
+        if settings.MODEL_EVICTION_POLICY == "cost":
+            # Cheapest to bring back first; LRU breaks ties
+            return min(candidates, key=lambda r: (r.load_seconds, r.last_used))
+        return min(candidates, key=lambda r: r.last_used)
+
+    def reserve(self, name: str, device: Any):
+        """Evict idle models on `device` until `name` is expected to fit the budget."""
+        device = str(device)
+        budget = self.budget_bytes(device)
+        if budget is None:
+            return
+
+        needed = self.estimate_bytes(name)
+        with self._residency_lock:
+            while self.used_bytes(device) + needed > budget:
+                victim = self._pick_victim(device, exclude=name)
+                if victim is None:
+                    logger.warning(
+                        f"ModelManager: Cannot fit '{name}' ({needed / GB:.2f}GB) in budget "
+                        f"{budget / GB:.2f}GB on {device}; all other models are in use. Loading anyway."
+                    )
+                    return
+                logger.info(f"ModelManager: Evicting '{victim.name}' to make room for '{name}'")
+                self.evict(victim.name)
+
+    def evict(self, name: str, allow_warm: bool = True) -> bool:
+        """Move a resident model off the device: to the warm tier if possible, otherwise unload it."""
+        with self._residency_lock:
+            record = self.residents.pop(name, None)
+            if record is None:
+                return False
+            self.evictions += 1
+            metrics.MODEL_EVICTIONS.labels(name).inc()
+
+            if allow_warm and self._offload(record):
+                self.warm[name] = record
+            else:
+                record.unload()
+
+        gc.collect()
+        if _is_cuda(record.device):
+            import torch
+            torch.cuda.empty_cache()
+        logger.info(f"ModelManager: '{name}' evicted ({record.footprint_bytes / GB:.2f}GB freed)")
+        return True
+
+    def _drop_warm(self, name: str):
+        record = self.warm.pop(name, None)
+        if record is not None:
+            record.unload()
+            logger.info(f"ModelManager: '{name}' dropped from warm tier")
+
+    def unloaded(self, name: str):
+        """Called by engines that unload a model on their own."""
+        with self._residency_lock:
+            self.residents.pop(name, None)
+            self.warm.pop(name, None)
+
+    @contextmanager
+    def loading(self, name: str, unload: Callable[[], None], device: Any, target: Optional[Callable[[], Any]] = None):
         """
-        Coordinate model swapping. Persistent engines stay loaded.
-        Non-persistent engines (TTS/ASR) unload each other.
+        Wrap a model load: make room first, then record the measured footprint
+        and load time once the body completes. `target` returns the loaded
+        object and enables the warm tier for this model.
         """
-        # If the requested engine is persistent, just return. 
-        # We don't track it as 'active' for swapping purposes.
-        if name in self.PERSISTENT_ENGINES:
-            logger.info(f"ModelManager: '{name}' is a persistent engine. No swap needed.")
-            return
+        device = str(device)
+        self.reserve(name, device)
+
+        measure = _is_cuda(device)
+        if measure:
+            import torch
+            torch.cuda.synchronize(torch.device(device))
+            mem_before = torch.cuda.memory_allocated(torch.device(device))
+        t0 = time.perf_counter()
+
+        yield
+
+        load_seconds = time.perf_counter() - t0
+        footprint = self.estimate_bytes(name)
+        if measure:
+            torch.cuda.synchronize(torch.device(device))
+            footprint = max(torch.cuda.memory_allocated(torch.device(device)) - mem_before, 0)
+
+        with self._residency_lock:
+            self._measured[name] = footprint
+            self._mmap_written.discard(name) # Fresh weights: rewrite the mmap cache on next offload
+            self.residents[name] = ResidentModel(
+                name=name,
+                device=device,
+                unload=unload,
+                target=target,
+                footprint_bytes=footprint,
+                load_seconds=load_seconds
+            )
+        metrics.MODEL_SWAP.labels(name, "load").observe(load_seconds)
+        logger.info(f"ModelManager: '{name}' resident on {device} ({footprint / GB:.2f}GB, loaded in {load_seconds:.2f}s)")
+
+    @contextmanager
+    def using(self, name: str):
+        """
+        Pin a model for the duration of an inference so it cannot be evicted.
+        A model parked in the warm tier is restored to its device first.
+        """
+        with self._residency_lock:
+            self._pins[name] = self._pins.get(name, 0) + 1
+            if name in self.warm:
+                self._restore(name)
+        try:
+            yield
+        finally:
+            with self._residency_lock:
+                self._pins[name] -= 1
+                record = self.residents.get(name)
+                if record is not None:
+                    record.last_used = time.monotonic()
+
+    # --- Warm tier ---
+
+    def _mmap_path(self, name: str, index: int) -> Path:
+        safe_name = name.replace(":", "_").replace("/", "_")
+        return Path(settings.MODEL_MMAP_CACHE_DIR) / f"{safe_name}_{index}.pt"
 
-        if self.active_engine == name:
+    def _offload(self, record: ResidentModel) -> bool:
+        """Park a model in host memory. Returns False if the warm tier cannot take it."""
+        mode = settings.MODEL_WARM_TIER
+        if mode not in ("pinned", "mmap") or record.target is None:
+            return False
+
+        import torch
+        obj = record.target()
+        modules = collect_modules(obj) if obj is not None else []
+        if not modules:
+            return False
+
+        size = sum(t.numel() * t.element_size() for m in modules for t in _module_tensors(m).values())
+        if mode == "pinned":
+            # Make room in host RAM by dropping the oldest warm models
+            host_budget = int(settings.MODEL_HOST_CACHE_GB * GB)
+            if size > host_budget:
+                return False
+            while self.host_used_bytes() + size > host_budget and self.warm:
+                oldest = min(self.warm.values(), key=lambda r: r.last_used)
+                self._drop_warm(oldest.name)
+
+        t0 = time.perf_counter()
+        try:
+            with torch.no_grad():
+                rewrite = record.name not in self._mmap_written
+                for i, module in enumerate(modules):
+                    if mode == "pinned":
+                        module.to("cpu")
+                        if torch.cuda.is_available():
+                            for t in _module_tensors(module).values():
+                                t.data = t.data.pin_memory()
+                    else:
+                        self._offload_mmap(record.name, i, module, rewrite)
+                if mode == "mmap":
+                    self._mmap_written.add(record.name)
+        except Exception as e:
+            logger.error(f"ModelManager: Warm-tier offload of '{record.name}' failed, unloading instead: {e}")
+            return False
+
+        elapsed = time.perf_counter() - t0
+        record.state = "host"
+        record.host_bytes = size if mode == "pinned" else 0
+        self.swaps["offload"] += 1
+        self.swap_seconds["offload"] += elapsed
+        metrics.MODEL_SWAP.labels(record.name, "offload").observe(elapsed)
+        logger.info(f"ModelManager: '{record.name}' offloaded to {mode} host memory in {elapsed:.2f}s ({size / GB:.2f}GB)")
+        return True
+
+    def _offload_mmap(self, name: str, index: int, module, rewrite: bool):
+        """Swap a module's tensors for file-backed ones (pages are reclaimable by the OS)."""
+        import torch
+
+        path = self._mmap_path(name, index)
+        if rewrite or not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            torch.save({k: t.detach().cpu() for k, t in _module_tensors(module).items()}, path)
+
+        mapped = torch.load(path, mmap=True, weights_only=True)
+        for key, tensor in _module_tensors(module).items():
+            # In-place .data swap keeps Parameter identity (and weight tying) intact
+            tensor.data = mapped[key]
+
+    def _restore(self, name: str):
+        """Host-to-device copy of a warm model back onto its device."""
+        import torch
+
+        record = self.warm.pop(name)
+        self.reserve(name, record.device)
+
+        t0 = time.perf_counter()
+        try:
+            obj = record.target()
+            with torch.no_grad():
+                for module in collect_modules(obj):
+                    module.to(record.device, non_blocking=True)
+            if _is_cuda(record.device):
+                torch.cuda.synchronize(torch.device(record.device))
+        except Exception as e:
+            logger.error(f"ModelManager: Restoring '{name}' from warm tier failed, reloading from disk: {e}")
+            record.unload()
             return
-            
-        with self._lock:
-            # Check other engines
-            for engine_name, engine_instance in self.engines.items():
-                # Only unload if it's NOT the target AND it's NOT a persistent engine
-                if engine_name != name and engine_name not in self.PERSISTENT_ENGINES:
-                    logger.info(f"ModelManager: Mutual engine '{name}' acquiring GPU. Unloading '{engine_name}'...")
-                    if hasattr(engine_instance, "unload"):
-                        engine_instance.unload()
-                    elif hasattr(engine_instance, "_unload_all_models"):
-                         engine_instance._unload_all_models()
-                         
-            self.active_engine = name
-            logger.info(f"ModelManager: '{name}' is now the active mutual engine.")
+
+        elapsed = time.perf_counter() - t0
+        record.state = "device"
+        record.host_bytes = 0
+        record.last_used = time.monotonic()
+        self.residents[name] = record
+        self.swaps["restore"] += 1
+        self.swap_seconds["restore"] += elapsed
+        metrics.MODEL_SWAP.labels(name, "restore").observe(elapsed)
+        logger.info(f"ModelManager: '{name}' restored to {record.device} in {elapsed:.2f}s (full load took {record.load_seconds:.2f}s)")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._residency_lock:
+            devices = {r.device for r in self.residents.values()}
+
+            def _describe(r: ResidentModel) -> Dict[str, Any]:
+                return {
+                    "name": r.name,
+                    "device": r.device,
+                    "state": r.state,
+                    "footprint_bytes": r.footprint_bytes,
+                    "host_bytes": r.host_bytes,
+                    "load_seconds": r.load_seconds,
+                    "in_use": self._pins.get(r.name, 0)
+                }
+
+            return {
+                "policy": settings.MODEL_EVICTION_POLICY,
+                "warm_tier": settings.MODEL_WARM_TIER,
+                "evictions": self.evictions,
+                "swaps": dict(self.swaps),
+                "swap_seconds": dict(self.swap_seconds),
+                "host_used_bytes": self.host_used_bytes(),
+                "devices": {
+                    d: {"used_bytes": self.used_bytes(d), "budget_bytes": self.budget_bytes(d)}
+                    for d in devices
+                },
+                "residents": [_describe(r) for r in self.residents.values()],
+                "warm": [_describe(r) for r in self.warm.values()]
+            }
 
 model_manager = ModelManager()
@@ -1,9 +1,13 @@
 import json
+import base64
+import time
 import uuid
-import redis
 import logging
 from typing import List, Optional, Dict, Any, Tuple
 from app.core.config import settings
+from app.services import redis_client
+from app.services.devices import lane_for
+from app.services.tracing import tracer, Span, new_trace_id, new_span_id
 from app.models.queue_models import (
     QueueItemRequest, 
     QueueBatchSubmitRequest, 
@@ -14,14 +18,28 @@ from app.models.queue_models import (
 
 logger = logging.getLogger(__name__)
 
+REPLY_TTL_S = 3600 # Replies nobody collected (request timed out) expire
+
 class QueueService:
     def __init__(self):
-        self.redis = redis.from_url(settings.REDIS_URL, decode_responses=True)
-        self.queue_key = "gpu_queue"
+        self.redis = redis_client.connect()
+        self.queue_key = "gpu_queue"  # Shared lane; "gpu_queue:<device>" for operations pinned by DEVICE_AFFINITY
+        self.depth_key = "gpu_queue_depth"  # Per-operation item counts (for /metrics)
         
+    def lane_key(self, lane: Optional[str]) -> str:
+        return f"{self.queue_key}:{lane}" if lane else self.queue_key
+
     def submit_batch(self, request: QueueBatchSubmitRequest) -> QueueBatchSubmitResponse:
         batch_id = str(uuid.uuid4())
         item_ids = []
+
+        # Items continue the submitting request's trace; the worker's spans hang off queue.submit
+        trace_id = submit_span_id = parent_id = None
+        if tracer.enabled:
+            submit_start = time.time_ns()
+            ctx = tracer.current()
+            trace_id, parent_id = ctx if ctx else (new_trace_id(), None)
+            submit_span_id = new_span_id()
         
         # Initialize batch metadata in Redis
         batch_data = {
@@ -45,6 +63,10 @@ class QueueService:
             item_payload = item.model_dump()
             item_payload["item_id"] = item_id
             item_payload["batch_id"] = batch_id
+            item_payload["enqueued_at"] = time.time()
+            if trace_id:
+                item_payload["trace_id"] = trace_id
+                item_payload["parent_span_id"] = submit_span_id
             
             # Store item metadata/status
             item_data = {
@@ -52,6 +74,7 @@ class QueueService:
                 "batch_id": batch_id,
                 "status": "queued",
                 "custom_id": item.custom_id or "",
+                "trace_id": trace_id or "",
                 "payload": json.dumps(item_payload)
             }
             pipe.hset(f"item:{item_id}", mapping=item_data)
@@ -59,10 +82,17 @@ class QueueService:
             # Track items belonging to this batch
             pipe.rpush(f"batch_items:{batch_id}", item_id)
             
-            # Push to GPU queue
-            pipe.rpush(self.queue_key, json.dumps(item_payload))
+            # Push to the GPU queue lane of the item's device
+            pipe.rpush(self.lane_key(lane_for(item.operation)), json.dumps(item_payload))
+            pipe.hincrby(self.depth_key, item.operation, 1)
             
         pipe.execute()
+
+        if trace_id:
+            tracer.export(Span(
+                "queue.submit", trace_id, submit_span_id, parent_id, submit_start, time.time_ns(),
+                attributes={"batch_id": batch_id, "items": len(request.items)}
+            ))
         
         return QueueBatchSubmitResponse(
             batch_id=batch_id,
@@ -70,23 +100,29 @@ class QueueService:
             item_ids=item_ids
         )
         
-    def pop_items(self, count: int) -> List[Dict[str, Any]]:
-        """Atomic pop of up to 'count' items from the queue."""
+    def pop_items(self, count: int, lanes: Tuple[Optional[str], ...] = (None,)) -> List[Dict[str, Any]]:
+        """Atomic pop of up to 'count' items, draining the given lanes in order."""
         items = []
         try:
-            # redis-py lpop with count returns a list if count > 1
-            raw_items = self.redis.lpop(self.queue_key, count)
+            raw_items = []
+            for lane in lanes:
+                if len(raw_items) >= count:
+                    break
+                # redis-py lpop with count returns a list if count > 1
+                popped = self.redis.lpop(self.lane_key(lane), count - len(raw_items))
+                if isinstance(popped, str):
+                    popped = [popped]
+                raw_items += popped or []
             if raw_items:
-                if isinstance(raw_items, str):
-                    raw_items = [raw_items]
-                
                 pipe = self.redis.pipeline()
                 for raw in raw_items:
                     item = json.loads(raw)
-                    # Update status to processing
-                    pipe.hset(f"item:{item['item_id']}", "status", "processing")
-                    # Update batch status if it was 'queued'
-                    pipe.hset(f"batch:{item['batch_id']}", "status", "processing")
+                    if item.get("batch_id"):
+                        # Update status to processing
+                        pipe.hset(f"item:{item['item_id']}", "status", "processing")
+                        # Update batch status if it was 'queued'
+                        pipe.hset(f"batch:{item['batch_id']}", "status", "processing")
+                    pipe.hincrby(self.depth_key, item["operation"], -1)
                     items.append(item)
                 pipe.execute()
         except Exception as e:
@@ -94,6 +130,19 @@ class QueueService:
             
         return items
 
+    def peek_items(self, count: int, lanes: Tuple[Optional[str], ...] = (None,)) -> List[Dict[str, Any]]:
+        """Look at the next 'count' queued items without popping them (used for prefetching)."""
+        try:
+            raw_items = []
+            for lane in lanes:
+                if len(raw_items) >= count:
+                    break
+                raw_items += self.redis.lrange(self.lane_key(lane), 0, count - len(raw_items) - 1)
+            return [json.loads(raw) for raw in raw_items]
+        except Exception as e:
+            logger.error(f"Error peeking queue: {e}")
+            return []
+
     def push_to_front(self, items: List[Dict[str, Any]]):
         """Push items back to the front of the queue (e.g. if deferred)."""
         if not items:
@@ -101,10 +150,75 @@ class QueueService:
         pipe = self.redis.pipeline()
         for item in reversed(items):
             # Reset status to queued
-            pipe.hset(f"item:{item['item_id']}", "status", "queued")
-            pipe.lpush(self.queue_key, json.dumps(item))
+            if item.get("batch_id"):
+                pipe.hset(f"item:{item['item_id']}", "status", "queued")
+            pipe.lpush(self.lane_key(lane_for(item["operation"])), json.dumps(item))
+            pipe.hincrby(self.depth_key, item["operation"], 1)
+        pipe.execute()
+
+    def submit_sync(self, items: List[Dict[str, Any]]):
+        """
+        Queue synchronous-endpoint items for a standalone worker process. They
+        carry no batch: the worker answers each one with send_reply().
+        """
+        pipe = self.redis.pipeline()
+        for item in items:
+            pipe.rpush(self.lane_key(lane_for(item["operation"])), self._sync_payload(item))
+            pipe.hincrby(self.depth_key, item["operation"], 1)
+        pipe.execute()
+
+    def cancel_sync(self, items: List[Dict[str, Any]]) -> int:
+        """
+        Withdraw synchronous items nobody waits for any more (the request timed
+        out): those still queued are removed from their lane so no worker runs
+        them, and replies that already arrived are dropped. Returns how many
+        items were still queued.
+        """
+        pipe = self.redis.pipeline()
+        for item in items:
+            pipe.lrem(self.lane_key(lane_for(item["operation"])), 1, self._sync_payload(item))
+        removed = pipe.execute()
+
+        pipe = self.redis.pipeline()
+        for item, count in zip(items, removed):
+            if count:
+                pipe.hincrby(self.depth_key, item["operation"], -1)
+            pipe.delete(f"reply:{item['item_id']}")
+        pipe.execute()
+        return sum(1 for count in removed if count)
+
+    @staticmethod
+    def _sync_payload(item: Dict[str, Any]) -> str:
+        return json.dumps({**item, "reply": True})
+
+    def send_reply(self, item_id: str, content: Any = None, error: Optional[Exception] = None):
+        """Result (WAV bytes or a result dict) or error for a synchronous item."""
+        if error is not None:
+            message = {"error": str(error), "error_type": type(error).__name__}
+        elif isinstance(content, (bytes, bytearray)):
+            message = {"audio": base64.b64encode(content).decode("ascii")}
+        else:
+            message = {"result": content}
+        key = f"reply:{item_id}"
+        pipe = self.redis.pipeline()
+        pipe.rpush(key, json.dumps(message))
+        pipe.expire(key, REPLY_TTL_S)
         pipe.execute()
 
+    def pop_replies(self, item_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Replies that have arrived for these items (one round trip)."""
+        pipe = self.redis.pipeline()
+        for item_id in item_ids:
+            pipe.lpop(f"reply:{item_id}")
+        return {
+            item_id: json.loads(raw)
+            for item_id, raw in zip(item_ids, pipe.execute()) if raw
+        }
+
+    def depth_by_operation(self) -> Dict[str, int]:
+        """Queued items per operation (counters kept in step with push / pop)."""
+        return {op: max(0, int(count)) for op, count in self.redis.hgetall(self.depth_key).items()}
+
     def mark_done(self, item_id: str, url: str):
         item_data = self.redis.hgetall(f"item:{item_id}")
         if not item_data:
@@ -169,7 +283,8 @@ class QueueService:
                     custom_id=item_data.get("custom_id") or None,
                     status=item_data.get("status", "queued"),
                     url=item_data.get("url") or None,
-                    error=item_data.get("error") or None
+                    error=item_data.get("error") or None,
+                    trace_id=item_data.get("trace_id") or None
                 ))
         
         return QueueBatchStatusResponse(
@@ -0,0 +1,205 @@
+import time
+import logging
+import threading
+from collections import deque
+from typing import Optional, Dict, Any, List
+from app.core.config import settings
+
+MEMORY_SCHEME = "memory://"
+
+logger = logging.getLogger(__name__)
+
+class MemoryRedis:
+    """
+    In-process stand-in for the subset of Redis the service uses (hashes,
+    lists, strings with TTL, pipelines), with decode_responses=True semantics.
+    Selected with REDIS_URL=memory:// for laptops and CI load tests. State
+    lives in one process only: a separate GPU worker process cannot see it.
+    """
+    def __init__(self):
+        self._data: Dict[str, Any] = {}
+        self._expires: Dict[str, float] = {}
+        self._lock = threading.RLock()
+
+    # --- Keys ---
+
+    def _live(self, name: str) -> Optional[Any]:
+        deadline = self._expires.get(name)
+        if deadline is not None and deadline <= time.monotonic():
+            self._data.pop(name, None)
+            self._expires.pop(name, None)
+        return self._data.get(name)
+
+    def _typed(self, name: str, kind: type) -> Any:
+        value = self._live(name)
+        if value is None:
+            value = self._data[name] = kind()
+        elif not isinstance(value, kind):
+            raise TypeError("WRONGTYPE Operation against a key holding the wrong kind of value")
+        return value
+
+    def ping(self) -> bool:
+        return True
+
+    def exists(self, *names: str) -> int:
+        with self._lock:
+            return sum(1 for name in names if self._live(name) is not None)
+
+    def delete(self, *names: str) -> int:
+        with self._lock:
+            removed = 0
+            for name in names:
+                if self._live(name) is not None:
+                    removed += 1
+                self._data.pop(name, None)
+                self._expires.pop(name, None)
+            return removed
+
+    def expire(self, name: str, seconds: int) -> bool:
+        with self._lock:
+            if self._live(name) is None:
+                return False
+            self._expires[name] = time.monotonic() + seconds
+            return True
+
+    # --- Strings ---
+
+    def get(self, name: str) -> Optional[str]:
+        with self._lock:
+            value = self._live(name)
+            return value if isinstance(value, str) else None
+
+    def set(self, name: str, value: Any, ex: Optional[int] = None) -> bool:
+        with self._lock:
+            self._data[name] = str(value)
+            if ex:
+                self._expires[name] = time.monotonic() + ex
+            else:
+                self._expires.pop(name, None)
+            return True
+
+    # --- Hashes ---
+
+    def hset(self, name: str, key: Optional[str] = None, value: Any = None,
+             mapping: Optional[Dict[str, Any]] = None) -> int:
+        fields = dict(mapping or {})
+        if key is not None:
+            fields[key] = value
+        with self._lock:
+            h = self._typed(name, dict)
+            added = sum(1 for k in fields if k not in h)
+            h.update({str(k): str(v) for k, v in fields.items()})
+            return added
+
+    def hget(self, name: str, key: str) -> Optional[str]:
+        with self._lock:
+            return (self._live(name) or {}).get(key)
+
+    def hgetall(self, name: str) -> Dict[str, str]:
+        with self._lock:
+            return dict(self._live(name) or {})
+
+    def hincrby(self, name: str, key: str, amount: int = 1) -> int:
+        with self._lock:
+            h = self._typed(name, dict)
+            h[key] = str(int(h.get(key, 0)) + amount)
+            return int(h[key])
+
+    def hdel(self, name: str, *keys: str) -> int:
+        with self._lock:
+            h = self._live(name) or {}
+            return sum(1 for k in keys if h.pop(k, None) is not None)
+
+    # --- Lists ---
+
+    def rpush(self, name: str, *values: Any) -> int:
+        with self._lock:
+            lst = self._typed(name, deque)
+            lst.extend(str(v) for v in values)
+            return len(lst)
+
+    def lpush(self, name: str, *values: Any) -> int:
+        with self._lock:
+            lst = self._typed(name, deque)
+            lst.extendleft(str(v) for v in values)
+            return len(lst)
+
+    def lpop(self, name: str, count: Optional[int] = None):
+        with self._lock:
+            lst = self._live(name)
+            if not lst:
+                return None
+            if count is None:
+                return lst.popleft()
+            return [lst.popleft() for _ in range(min(count, len(lst)))]
+
+    def lrem(self, name: str, count: int, value: Any) -> int:
+        """Remove up to |count| occurrences of value (from the tail if count < 0, all if 0)."""
+        with self._lock:
+            lst = self._live(name)
+            if not lst:
+                return 0
+            value = str(value)
+            items = list(lst)
+            positions = range(len(items) - 1, -1, -1) if count < 0 else range(len(items))
+            limit = abs(count) or len(items)
+            drop = set()
+            for i in positions:
+                if len(drop) >= limit:
+                    break
+                if items[i] == value:
+                    drop.add(i)
+            if drop:
+                lst.clear()
+                lst.extend(v for i, v in enumerate(items) if i not in drop)
+            return len(drop)
+
+    def lrange(self, name: str, start: int, end: int) -> List[str]:
+        with self._lock:
+            items = list(self._live(name) or ())
+            stop = len(items) if end == -1 else end + 1
+            return items[start:stop]
+
+    def llen(self, name: str) -> int:
+        with self._lock:
+            return len(self._live(name) or ())
+
+    def pipeline(self, transaction: bool = True) -> "MemoryPipeline":
+        return MemoryPipeline(self)
+
+class MemoryPipeline:
+    """Buffers commands and runs them atomically on execute(), like a MULTI/EXEC pipeline."""
+    def __init__(self, client: MemoryRedis):
+        self._client = client
+        self._commands = []
+
+    def __getattr__(self, command: str):
+        method = getattr(self._client, command)
+
+        def queue(*args, **kwargs):
+            self._commands.append((method, args, kwargs))
+            return self
+        return queue
+
+    def execute(self) -> List[Any]:
+        with self._client._lock:
+            results = [method(*args, **kwargs) for method, args, kwargs in self._commands]
+        self._commands = []
+        return results
+
+_memory: Optional[MemoryRedis] = None
+_memory_lock = threading.Lock()
+
+def connect(url: Optional[str] = None):
+    """Redis client for REDIS_URL; "memory://" returns the process-wide in-memory stand-in."""
+    global _memory
+    url = url or settings.REDIS_URL
+    if url.startswith(MEMORY_SCHEME):
+        with _memory_lock:
+            if _memory is None:
+                logger.warning("Using the in-process Redis stand-in (memory://): state is not shared or persisted")
+                _memory = MemoryRedis()
+            return _memory
+
+    import redis
+    return redis.from_url(url, decode_responses=True)
@@ -0,0 +1,159 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+import concurrent.futures
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Iterable
+from app.core.config import settings
+from app.services import redis_client
+
+# --- Result Cache Tuning ---
+HASH_CHUNK_SIZE = 1024 * 1024
+DIGEST_MEMO_SIZE = 1024 # (path, mtime, size) -> sha256 entries kept in RAM
+DIGEST_WORKERS = 2 # Background hashing of queued inputs (disk bound)
+# ---------------------------
+
+logger = logging.getLogger(__name__)
+
+class ResultCache:
+    """
+    Redis-backed cache for ASR and diarization outputs.
+    Keys combine the SHA-256 of the audio content with the parameters that
+    influence the result, so re-uploads of identical audio hit the cache.
+    Entries expire after RESULT_CACHE_TTL seconds and the TTL is refreshed on
+    every hit (least-recently-used entries age out first).
+    """
+    def __init__(self):
+        self.redis = redis_client.connect()
+        self.prefix = "result_cache"
+        self._digests = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=DIGEST_WORKERS, thread_name_prefix="audio-digest")
+        self._inflight: Dict[str, concurrent.futures.Future] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return settings.RESULT_CACHE_ENABLED
+
+    def _memo_key(self, path: str) -> Optional[tuple]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (str(path), stat.st_mtime_ns, stat.st_size)
+
+    def memoized_digest(self, path: str) -> Optional[str]:
+        """The digest if it has already been computed (a stat, never a read)."""
+        memo_key = self._memo_key(path)
+        if memo_key is None:
+            return None
+        with self._lock:
+            digest = self._digests.get(memo_key)
+            if digest is not None:
+                self._digests.move_to_end(memo_key)
+            return digest
+
+    def prefetch_digests(self, paths: Iterable[Optional[str]]):
+        """Hash upcoming inputs in the background so the GPU worker's lookups only read the memo."""
+        if not self.enabled:
+            return
+        for path in paths:
+            if not isinstance(path, str) or self.memoized_digest(path) is not None:
+                continue
+            with self._lock:
+                if path in self._inflight:
+                    continue
+                future = self._inflight[path] = self._pool.submit(self.audio_digest, path)
+            future.add_done_callback(lambda _, path=path: self._forget_inflight(path))
+
+    def _forget_inflight(self, path: str):
+        with self._lock:
+            self._inflight.pop(path, None)
+
+    def audio_digest(self, path: str) -> Optional[str]:
+        """SHA-256 of the file content, memoized on (path, mtime, size)."""
+        memo_key = self._memo_key(path)
+        if memo_key is None:
+            return None
+        with self._lock:
+            digest = self._digests.get(memo_key)
+            if digest is not None:
+                self._digests.move_to_end(memo_key)
+                return digest
+
+        sha = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+
+        with self._lock:
+            self._digests[memo_key] = digest
+            if len(self._digests) > DIGEST_MEMO_SIZE:
+                self._digests.popitem(last=False)
+        return digest
+
+    def make_key(self, operation: str, audio_path: str, memo_only: bool = False, **params) -> Optional[str]:
+        """
+        Build a cache key, or None if caching is disabled / the audio is unreadable.
+        memo_only never hashes: None until prefetch_digests() has done it.
+        """
+        if not self.enabled or not audio_path:
+            return None
+        digest = self.memoized_digest(audio_path) if memo_only else self.audio_digest(audio_path)
+        if digest is None:
+            return None
+        param_str = json.dumps(params, sort_keys=True, default=str)
+        param_hash = hashlib.sha1(param_str.encode("utf-8")).hexdigest()[:16]
+        return f"{self.prefix}:{operation}:{digest}:{param_hash}"
+
+    def asr_key(self, audio_path: str, language: Optional[str], return_timestamps: bool,
+                long_form: Optional[bool] = None, memo_only: bool = False) -> Optional[str]:
+        from app.services.asr_engine import ASR_MODEL_ID, DENOISE_ASR_INPUT
+        return self.make_key(
+            "transcribe", audio_path, memo_only,
+            language=language,
+            return_timestamps=bool(return_timestamps),
+            long_form=long_form,
+            model=ASR_MODEL_ID,
+            denoise=DENOISE_ASR_INPUT
+        )
+
+    def diarization_key(self, audio_path: str, num_speakers: Optional[int] = None,
+                        min_speakers: Optional[int] = None, max_speakers: Optional[int] = None,
+                        memo_only: bool = False) -> Optional[str]:
+        return self.make_key(
+            "diarize", audio_path, memo_only,
+            num_speakers=num_speakers,
+            min_speakers=min_speakers,
+            max_speakers=max_speakers,
+            model=settings.DIARIZATION_MODEL
+        )
+
+    def get(self, key: Optional[str]) -> Optional[Dict[str, Any]]:
+        if key is None:
+            return None
+        try:
+            pipe = self.redis.pipeline()
+            pipe.get(key)
+            pipe.expire(key, settings.RESULT_CACHE_TTL)
+            raw, _ = pipe.execute()
+            if raw is None:
+                return None
+            logger.info(f"ResultCache: Hit for {key}")
+            return json.loads(raw)
+        except Exception as e:
+            logger.error(f"ResultCache: Lookup failed for {key}: {e}")
+            return None
+
+    def put(self, key: Optional[str], value: Dict[str, Any]):
+        if key is None or value is None or "error" in value:
+            return
+        try:
+            self.redis.set(key, json.dumps(value), ex=settings.RESULT_CACHE_TTL)
+        except Exception as e:
+            logger.error(f"ResultCache: Store failed for {key}: {e}")
+
+result_cache = ResultCache()
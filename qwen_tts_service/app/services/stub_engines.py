@@ -0,0 +1,263 @@
+import io
+import os
+import time
+import zlib
+import logging
+import threading
+import numpy as np
+import soundfile as sf
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Dict, Optional, Union, Any
+from app.core.config import settings
+from app.services.model_manager import model_manager
+from app.services import metrics
+from app.services.audio_loader import audio_loader
+from app.models.diarization_models import DiarizationSegment
+
+# --- Stub Tuning ---
+TTS_SR = 24000
+ASR_SR = 16000
+WORDS_PER_SECOND = 2.5
+TTS_MIN_SECONDS = 0.5
+TTS_MAX_SECONDS = 30.0
+WORDS_PER_SENTENCE = 8
+TURN_SECONDS = 4.0          # Synthetic speaker turn length
+TURN_GAP_SECONDS = 0.3      # Silence between turns
+DEFAULT_SPEAKERS = 2
+VOCABULARY = ("alpha bravo charlie delta echo foxtrot golf hotel india juliet kilo lima "
+              "mike november oscar papa quebec romeo sierra tango uniform victor whiskey").split()
+# -------------------
+
+logger = logging.getLogger(__name__)
+
+def _seed(*parts: Any) -> int:
+    return zlib.crc32("|".join(str(p) for p in parts).encode("utf-8"))
+
+def _wav_bytes(wav: np.ndarray, sr: int) -> bytes:
+    buffer = io.BytesIO()
+    sf.write(buffer, wav, sr, format="WAV")
+    return buffer.getvalue()
+
+def _speech(text: str) -> np.ndarray:
+    """Deterministic tone whose length follows the word count and whose pitch follows the text."""
+    seconds = min(TTS_MAX_SECONDS, max(TTS_MIN_SECONDS, len(text.split()) / WORDS_PER_SECOND))
+    t = np.arange(int(seconds * TTS_SR)) / TTS_SR
+    f0 = 110 + _seed(text) % 220
+    envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 3.0 * t) ** 2
+    return (0.2 * envelope * np.sin(2 * np.pi * f0 * t)).astype(np.float32)
+
+@dataclass
+class StubTimestamp:
+    text: str
+    start_time: float
+    end_time: float
+
+@dataclass
+class StubTranscript:
+    """Same attributes as a Qwen3-ASR result (text, language, time_stamps)."""
+    text: str
+    language: str
+    time_stamps: List[StubTimestamp] = field(default_factory=list)
+
+def _transcript(seconds: float, language: Optional[str], timestamps: bool, seed: int) -> StubTranscript:
+    n = max(1, int(seconds * WORDS_PER_SECOND))
+    rng = np.random.default_rng(seed)
+    words = [str(w) for w in rng.choice(VOCABULARY, n)]
+    sentences = [" ".join(words[i:i + WORDS_PER_SENTENCE]) for i in range(0, n, WORDS_PER_SENTENCE)]
+    text = " ".join(s.capitalize() + "." for s in sentences)
+    step = seconds / n if seconds > 0 else 1.0 / WORDS_PER_SECOND
+    stamps = [StubTimestamp(w, round(k * step, 3), round((k + 1) * step, 3)) for k, w in enumerate(words)] if timestamps else []
+    return StubTranscript(text, language or "English", stamps)
+
+class StubEngine:
+    """
+    Model-free engine for load tests: same public interface as the real one,
+    deterministic output, and a cost of STUB_CALL_LATENCY_MS per call plus
+    STUB_ITEM_LATENCY_MS per item plus STUB_REALTIME_FACTOR x audio seconds.
+    Stub "models" go through the ModelManager (on CPU) and hold STUB_MODEL_MB of
+    host memory each, so residency and /health report as with real models.
+    """
+    name = ""
+
+    def __init__(self):
+        model_manager.register_engine(self.name, self)
+        self.device = "cpu"
+        self._lock = threading.Lock()
+        self._models: Dict[str, np.ndarray] = {}
+
+    def _ensure(self, model: str):
+        if model in self._models:
+            return
+        with model_manager.loading(model, lambda: self._release(model), self.device):
+            time.sleep(settings.STUB_LOAD_MS / 1000.0)
+            self._models[model] = np.ones(settings.STUB_MODEL_MB * 2**20, dtype=np.uint8)
+        logger.info(f"Stub model '{model}' loaded")
+
+    def _release(self, model: str):
+        self._models.pop(model, None)
+
+    def _simulate(self, items: int, audio_seconds: float = 0.0):
+        time.sleep(
+            (settings.STUB_CALL_LATENCY_MS + settings.STUB_ITEM_LATENCY_MS * items) / 1000.0
+            + settings.STUB_REALTIME_FACTOR * audio_seconds
+        )
+
+    def unload(self):
+        for model in list(self._models):
+            self._release(model)
+            model_manager.unloaded(model)
+
+class StubTTSEngine(StubEngine):
+    name = "tts"
+
+    def load(self, model_key: str):
+        with self._lock, model_manager.using(f"tts:{model_key}"):
+            self._ensure(f"tts:{model_key}")
+
+    def _generate(self, variant: str, text: Union[str, List[str]]) -> List[bytes]:
+        texts = text if isinstance(text, list) else [text]
+        with self._lock, model_manager.using(f"tts:{variant}"), metrics.stage("tts"):
+            self._ensure(f"tts:{variant}")
+            wavs = [_speech(t) for t in texts]
+            self._simulate(len(texts), sum(len(w) for w in wavs) / TTS_SR)
+            return [_wav_bytes(w, TTS_SR) for w in wavs]
+
+    def generate_voice_design(self, text, instruct, language="Auto", temperature: float = 1.0, seed: Optional[int] = None) -> List[bytes]:
+        return self._generate("VoiceDesign", text)
+
+    def generate_custom_voice(self, text, speaker, language="Auto", instruct=None, temperature: float = 1.0, seed: Optional[int] = None) -> List[bytes]:
+        return self._generate("CustomVoice", text)
+
+    def generate_voice_clone(self, text, ref_audio, ref_text=None, language="Auto", temperature: float = 1.0, seed: Optional[int] = None) -> List[bytes]:
+        return self._generate("VoiceClone", text)
+
+class StubASREngine(StubEngine):
+    name = "asr"
+
+    def load(self):
+        with self._lock, model_manager.using("asr"):
+            self._ensure("asr")
+
+    def _run(self, durations: List[float], languages: List[Optional[str]], seeds: List[int],
+             return_timestamps: bool) -> List[StubTranscript]:
+        with self._lock, model_manager.using("asr"), metrics.stage("asr"):
+            self._ensure("asr")
+            self._simulate(len(durations), sum(durations))
+            return [_transcript(d, lang, return_timestamps, s) for d, lang, s in zip(durations, languages, seeds)]
+
+    def transcribe(self, audio: Union[str, List[str]], language: Optional[Union[str, List[str]]] = None,
+                   return_timestamps: bool = False, long_form: Optional[bool] = None) -> List[StubTranscript]:
+        paths = [audio] if isinstance(audio, str) else audio
+        languages = language if isinstance(language, list) else [language] * len(paths)
+        durations = [audio_loader.duration(p) or 0.0 for p in paths]
+        seeds = [_seed(os.path.getsize(p) if os.path.exists(p) else 0, d) for p, d in zip(paths, durations)]
+        return self._run(durations, languages, seeds, return_timestamps)
+
+    def transcribe_waveforms(self, waveforms: List[np.ndarray], language: Optional[Union[str, List[str]]] = None,
+                             return_timestamps: bool = False) -> List[StubTranscript]:
+        if not waveforms:
+            return []
+        languages = language if isinstance(language, list) else [language] * len(waveforms)
+        durations = [len(w) / ASR_SR for w in waveforms]
+        return self._run(durations, languages, [_seed(len(w)) for w in waveforms], return_timestamps)
+
+class StubDiarizationEngine(StubEngine):
+    name = "diarization"
+
+    def load(self):
+        with self._lock, model_manager.using("diarization"):
+            self._ensure("diarization")
+
+    def is_long_form(self, path: str) -> bool:
+        return False
+
+    def diarize(self, audio_paths: Union[str, List[str]],
+                num_speakers: Optional[Union[int, List[Optional[int]]]] = None,
+                min_speakers: Optional[Union[int, List[Optional[int]]]] = None,
+                max_speakers: Optional[Union[int, List[Optional[int]]]] = None) -> List[Dict[str, Any]]:
+        if isinstance(audio_paths, str):
+            audio_paths, num_speakers, min_speakers, max_speakers = (
+                [audio_paths], [num_speakers], [min_speakers], [max_speakers]
+            )
+        n = len(audio_paths)
+        num_speakers = list(num_speakers or []) + [None] * n
+        min_speakers = list(min_speakers or []) + [None] * n
+        max_speakers = list(max_speakers or []) + [None] * n
+
+        durations = [audio_loader.duration(p) for p in audio_paths]
+        with self._lock, model_manager.using("diarization"), metrics.stage("diarize"):
+            self._ensure("diarization")
+            self._simulate(n, sum(d or 0.0 for d in durations))
+
+            results = []
+            for i, duration in enumerate(durations):
+                if duration is None:
+                    results.append({"segments": [], "num_speakers": 0, "error": "File not found"})
+                    continue
+                speakers = num_speakers[i] or max(min_speakers[i] or 1, min(DEFAULT_SPEAKERS, max_speakers[i] or DEFAULT_SPEAKERS))
+                segments, start, k = [], 0.0, 0
+                while start < duration:
+                    end = min(duration, start + TURN_SECONDS)
+                    segments.append(DiarizationSegment(speaker=f"SPEAKER_{k % speakers:02d}", start=round(start, 3), end=round(end, 3)))
+                    start = end + TURN_GAP_SECONDS
+                    k += 1
+                results.append({"segments": segments, "num_speakers": len({s.speaker for s in segments})})
+            return results
+
+def _resample(wav, sr: int, target_sr: int):
+    """Linear interpolation of a [1, T] tensor (stand-in for the model's resampling)."""
+    import torch.nn.functional as F
+    if sr == target_sr:
+        return wav.float().cpu()
+    length = max(1, -(-wav.shape[-1] * target_sr // sr))
+    return F.interpolate(wav.float().cpu()[None], size=length, mode="linear", align_corners=False)[0]
+
+class StubDenoiserService(StubEngine):
+    name = "denoiser"
+
+    def load(self):
+        with model_manager.using("denoiser"):
+            self._ensure("denoiser")
+
+    def process_batch_tensors(self, wav_tensors: List[Any], sr: Union[int, List[int]]) -> List[Any]:
+        sample_rates = sr if isinstance(sr, list) else [sr] * len(wav_tensors)
+        with model_manager.using("denoiser"), metrics.stage("denoise"):
+            self._ensure("denoiser")
+            self._simulate(len(wav_tensors), sum(w.shape[-1] / rate for w, rate in zip(wav_tensors, sample_rates)))
+            return [_resample(w, rate, 16000) for w, rate in zip(wav_tensors, sample_rates)]
+
+    def process_files(self, file_paths: List[str]) -> Dict[str, str]:
+        """Writes <stem>_clean_16k.wav next to each input and removes the input, like the real service."""
+        results = {}
+        if not file_paths:
+            return results
+        with model_manager.using("denoiser"), metrics.stage("denoise"):
+            self._ensure("denoiser")
+            for path in file_paths:
+                try:
+                    data, _ = audio_loader.load(path, 16000)
+                    self._simulate(1, len(data) / 16000)
+                    p = Path(path)
+                    new_path = str(p.parent / f"{p.stem}_clean_16k.wav")
+                    sf.write(new_path, data, 16000)
+                    if new_path != path and os.path.exists(path):
+                        os.remove(path)
+                    results[path] = new_path
+                except Exception as e:
+                    logger.error(f"Stub denoiser: Failed to process {path}: {e}")
+                    results[path] = path
+        return results
+
+class StubSuperResService(StubEngine):
+    name = "super_res"
+
+    def load(self):
+        with model_manager.using("super_res"):
+            self._ensure("super_res")
+
+    def process_batch_tensors(self, wav_tensors: List[Any], sr: int) -> List[Any]:
+        with model_manager.using("super_res"), metrics.stage("upsample"):
+            self._ensure("super_res")
+            self._simulate(len(wav_tensors), sum(w.shape[-1] for w in wav_tensors) / sr)
+            return [_resample(w, sr, 48000) for w in wav_tensors]
@@ -5,8 +5,10 @@ import threading
 import io
 from typing import List, Optional
 import soundfile as sf
-from NovaSR import FastSR
-from app.core.config import settings
+from app.services.model_manager import model_manager
+from app.services import metrics
+from app.services.engine_registry import create_engine
+from app.services.devices import device_for, cpu_map
 
 # --- SuperRes Tuning ---
 TARGET_SR = 48000
@@ -24,8 +26,9 @@ class SuperResService:
         return cls._instance
     
     def _initialize(self):
+        model_manager.register_engine("super_res", self)
         self.upsampler = None
-        self.device = torch.device(settings.DEVICE if torch.cuda.is_available() else "cpu")
+        self.device = torch.device(device_for("super_res") if torch.cuda.is_available() else "cpu")
         self._lock = threading.Lock()
 
     def _ensure_model(self):
@@ -39,34 +42,53 @@ class SuperResService:
 
             logger.info(f"Initializing NoVaSR Upsampler on {self.device}...")
             try:
-                self.upsampler = FastSR()
-                # Ensure model is on the correct device and float32
-                self.upsampler.model.to(self.device).float()
-                self.upsampler.model.eval()
+                with model_manager.loading("super_res", self._release_model, self.device, target=lambda: self.upsampler):
+                    from NovaSR import FastSR
+                    self.upsampler = FastSR()
+                    # Ensure model is on the correct device and float32
+                    self.upsampler.model.to(self.device).float()
+                    self.upsampler.model.eval()
                 logger.info("NoVaSR Upsampler initialized successfully.")
             except Exception as e:
                 logger.error(f"Failed to initialize NoVaSR Upsampler: {e}")
                 raise e
 
+    def unload(self):
+        self._release_model()
+        model_manager.unloaded("super_res")
+
+    def load(self):
+        """Eagerly load the model (used by startup preloading)."""
+        with model_manager.using("super_res"):
+            self._ensure_model()
+
+    def _release_model(self):
+        if self.upsampler is not None:
+            logger.info("Unloading NoVaSR Upsampler...")
+            self.upsampler = None
+
     def process_batch_tensors(self, wav_tensors: List[torch.Tensor], sr: int) -> List[torch.Tensor]:
         """
         Batched GPU inference for super-resolution.
         Expects a list of [1, T] tensors at 'sr' sampling rate (ideally 16kHz).
         Returns a list of [1, T] high-res tensors at 48kHz.
         """
-        self._ensure_model()
+        with model_manager.using("super_res"), metrics.stage("upsample"):
+            self._ensure_model()
         
-        final_tensors = []
-        with torch.no_grad():
-            for wav in wav_tensors:
-                # Ensure correct device and type
-                wav = wav.to(self.device).float()
-                
-                # NoVaSR expects [B, C, T] for F.interpolate(mode='linear')
-                # we add the extra dim [1, T] -> [1, 1, T]
-                highres = self.upsampler.infer(wav[None]) # returns [1, T_new]
-                final_tensors.append(highres.cpu())
-                
-        return final_tensors
+            def _upsample(wav: torch.Tensor) -> torch.Tensor:
+                with torch.no_grad():
+                    # Ensure correct device and type
+                    wav = wav.to(self.device).float()
+
+                    # NoVaSR expects [B, C, T] for F.interpolate(mode='linear')
+                    # we add the extra dim [1, T] -> [1, 1, T]
+                    highres = self.upsampler.infer(wav[None]) # returns [1, T_new]
+                    return highres.cpu()
+
+            if self.device.type == "cpu":
+                # CPU placement (DEVICE_AFFINITY): items run side by side on the CPU stage pool
+                return cpu_map(_upsample, wav_tensors)
+            return [_upsample(wav) for wav in wav_tensors]
 
-super_res = SuperResService()
+super_res = create_engine("super_res", SuperResService)
@@ -0,0 +1,222 @@
+import json
+import time
+import queue
+import logging
+import secrets
+import threading
+import contextvars
+import urllib.request
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, List, Iterator, Tuple
+from app.core.config import settings
+
+# --- Tracing Tuning ---
+EXPORT_BATCH_SIZE = 512      # Spans per file write / OTLP request
+EXPORT_INTERVAL_S = 2.0      # Max delay before buffered spans are flushed
+MAX_PENDING_SPANS = 50000    # Spans beyond this are dropped rather than blocking the GPU thread
+# ----------------------
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str] = None
+    start_ns: int = 0
+    end_ns: int = 0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_id,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "status": "error" if self.error else "ok",
+            "error": self.error
+        }
+
+# (trace_id, span_id) of the span active in the current request
+_current: contextvars.ContextVar[Optional[Tuple[str, str]]] = contextvars.ContextVar("trace_context", default=None)
+
+def new_trace_id() -> str:
+    return secrets.token_hex(16)
+
+def new_span_id() -> str:
+    return secrets.token_hex(8)
+
+def parse_traceparent(header: Optional[str]) -> Optional[Tuple[str, str]]:
+    """W3C 'traceparent' (00-<trace_id>-<span_id>-<flags>) -> (trace_id, parent span_id)."""
+    if not header:
+        return None
+    parts = header.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    return parts[1], parts[2]
+
+def format_traceparent(trace_id: str, span_id: str) -> str:
+    return f"00-{trace_id}-{span_id}-01"
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+class Tracer:
+    """
+    Minimal OpenTelemetry-style tracer. Spans carry W3C trace / span ids, are
+    propagated through queue item payloads (trace_id, parent_span_id) and
+    exported by a background thread to a JSONL file (TRACE_EXPORT_PATH) and/or
+    an OTLP/HTTP JSON collector endpoint (TRACE_OTLP_ENDPOINT).
+    Everything is a no-op while TRACING_ENABLED is off.
+    """
+    def __init__(self):
+        self._pending: "queue.Queue[Span]" = queue.Queue(maxsize=MAX_PENDING_SPANS)
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    @property
+    def enabled(self) -> bool:
+        return settings.TRACING_ENABLED
+
+    def current(self) -> Optional[Tuple[str, str]]:
+        return _current.get()
+
+    @contextmanager
+    def span(self, name: str, trace_id: Optional[str] = None, parent_id: Optional[str] = None,
+             **attributes) -> Iterator[Optional[Span]]:
+        """
+        Time a block as a span. Without explicit ids it continues the current
+        request's trace (or starts a new one) and becomes the current span.
+        """
+        if not self.enabled:
+            yield None
+            return
+
+        if trace_id is None:
+            ctx = _current.get()
+            trace_id, parent_id = ctx if ctx else (new_trace_id(), None)
+        span = Span(name, trace_id, new_span_id(), parent_id, time.time_ns(), attributes=attributes)
+        token = _current.set((trace_id, span.span_id))
+        try:
+            yield span
+        except Exception as e:
+            span.error = str(e)
+            raise
+        finally:
+            _current.reset(token)
+            span.end_ns = time.time_ns()
+            self.export(span)
+
+    def record(self, name: str, item: Dict[str, Any], start_ns: int, end_ns: Optional[int] = None,
+               error: Optional[str] = None, **attributes):
+        """Emit a finished span for a queue item (trace_id / parent_span_id from its payload)."""
+        if not self.enabled or not item.get("trace_id"):
+            return
+        attributes.setdefault("item_id", item.get("item_id"))
+        attributes.setdefault("operation", item.get("operation"))
+        self.export(Span(
+            name, item["trace_id"], new_span_id(), item.get("parent_span_id"),
+            start_ns, end_ns if end_ns is not None else time.time_ns(),
+            attributes=attributes, error=error
+        ))
+
+    def export(self, span: Span):
+        self._ensure_thread()
+        try:
+            self._pending.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._export_loop, name="TraceExporter", daemon=True)
+                self._thread.start()
+
+    def _export_loop(self):
+        while not self._stop.is_set() or not self._pending.empty():
+            batch: List[Span] = []
+            deadline = time.monotonic() + EXPORT_INTERVAL_S
+            while len(batch) < EXPORT_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+                if self._stop.is_set():
+                    # Drain without waiting on shutdown
+                    deadline = time.monotonic()
+            if batch:
+                self._write(batch)
+
+    def _write(self, spans: List[Span]):
+        if settings.TRACE_EXPORT_PATH:
+            try:
+                with open(settings.TRACE_EXPORT_PATH, "a", encoding="utf-8") as f:
+                    for span in spans:
+                        f.write(json.dumps(span.to_dict()) + "\n")
+            except Exception as e:
+                logger.error(f"Tracing: Writing {len(spans)} spans to {settings.TRACE_EXPORT_PATH} failed: {e}")
+
+        if settings.TRACE_OTLP_ENDPOINT:
+            try:
+                body = json.dumps(self._otlp_payload(spans)).encode("utf-8")
+                req = urllib.request.Request(
+                    settings.TRACE_OTLP_ENDPOINT, data=body,
+                    headers={"Content-Type": "application/json"}, method="POST"
+                )
+                urllib.request.urlopen(req, timeout=5).close()
+            except Exception as e:
+                logger.error(f"Tracing: OTLP export of {len(spans)} spans failed: {e}")
+
+    def _otlp_payload(self, spans: List[Span]) -> Dict[str, Any]:
+        """OTLP/HTTP JSON encoding (ExportTraceServiceRequest)."""
+        return {"resourceSpans": [{
+            "resource": {"attributes": [
+                {"key": "service.name", "value": {"stringValue": settings.TRACE_SERVICE_NAME}}
+            ]},
+            "scopeSpans": [{
+                "scope": {"name": "qwen_tts_service"},
+                "spans": [{
+                    "traceId": s.trace_id,
+                    "spanId": s.span_id,
+                    "parentSpanId": s.parent_id or "",
+                    "name": s.name,
+                    "kind": 1,
+                    "startTimeUnixNano": str(s.start_ns),
+                    "endTimeUnixNano": str(s.end_ns),
+                    "attributes": [
+                        {"key": k, "value": _otlp_value(v)} for k, v in s.attributes.items() if v is not None
+                    ],
+                    "status": {"code": 2, "message": s.error} if s.error else {"code": 1}
+                } for s in spans]
+            }]
+        }]}
+
+    def shutdown(self):
+        """Flush buffered spans (called on API shutdown)."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+
+tracer = Tracer()
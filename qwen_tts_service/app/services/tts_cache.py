@@ -0,0 +1,103 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Union
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class TTSCache:
+    """
+    In-process LRU cache of synthesized WAV bytes.
+    Only deterministic requests are cached (pinned seed or temperature 0),
+    bounded by TTS_CACHE_MAX_MB of audio.
+    """
+    def __init__(self):
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._size_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def max_bytes(self) -> int:
+        return settings.TTS_CACHE_MAX_MB * 1024 * 1024
+
+    def cacheable(self, temperature: float, seed: Optional[int]) -> bool:
+        return settings.TTS_CACHE_ENABLED and (seed is not None or temperature == 0)
+
+    def voice_digest(self, ref_audio: Union[str, bytes, None]) -> Optional[str]:
+        """Content hash for reference audio given as bytes, a file_id or a path."""
+        if ref_audio is None:
+            return None
+        if isinstance(ref_audio, bytes):
+            return hashlib.sha256(ref_audio).hexdigest()
+
+        from app.services.file_store import file_store
+        from app.services.result_cache import result_cache
+
+        path = file_store.get_path(ref_audio)
+        if path is None and os.path.exists(ref_audio):
+            path = ref_audio
+        # Unresolvable references (e.g. URLs) are keyed on the string itself
+        return result_cache.audio_digest(str(path)) if path else ref_audio
+
+    def make_key(self, mode: str, text: str, language: str, temperature: float, seed: Optional[int], **voice) -> str:
+        payload = json.dumps({
+            "mode": mode,
+            "text": text,
+            "language": language,
+            "temperature": temperature,
+            "seed": seed,
+            "voice": voice,
+            "max_new_tokens": settings.TTS_MAX_NEW_TOKENS
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            audio = self._entries.get(key)
+            if audio is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return audio
+
+    def put(self, key: str, audio: bytes):
+        if len(audio) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._size_bytes -= len(self._entries.pop(key))
+            self._entries[key] = audio
+            self._size_bytes += len(audio)
+            while self._size_bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._size_bytes -= len(evicted)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": settings.TTS_CACHE_ENABLED,
+                "entries": len(self._entries),
+                "size_bytes": self._size_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+tts_cache = TTSCache()
@@ -1,7 +1,11 @@
 import threading
-from typing import List, Optional, Union, Tuple
-from qwen_tts import Qwen3TTSModel
+from typing import List, Optional, Union, Tuple, Callable, Any
 from app.core.config import settings
+from app.services.tts_cache import tts_cache
+from app.services.model_manager import model_manager
+from app.services import metrics
+from app.services.engine_registry import create_engine
+from app.services.devices import device_for
 import torch
 import soundfile as sf
 import os
@@ -13,6 +17,21 @@ import shutil
 
 logger = logging.getLogger(__name__)
 
+def _broadcast(text: Union[str, List[str]], *fields: Any) -> Tuple[List[Any], ...]:
+    """Expand a (possibly single) request into per-item lists matching the text count."""
+    texts = text if isinstance(text, list) else [text]
+    count = len(texts)
+    expanded = [texts]
+    for value in fields:
+        if isinstance(value, list) and len(value) == count:
+            expanded.append(value)
+        else:
+            expanded.append([value] * count)
+    return tuple(expanded)
+
+def _pick(values: List[Any], indices: List[int]) -> List[Any]:
+    return [values[i] for i in indices]
+
 class TTSEngine:
     _instance = None
     _lock = threading.Lock()
@@ -24,11 +43,10 @@ class TTSEngine:
         return cls._instance
 
     def _initialize(self):
-        from app.services.model_manager import model_manager
         model_manager.register_engine("tts", self)
 
         # Robust device detection
-        requested_device = settings.DEVICE
+        requested_device = device_for("tts")
         has_cuda = torch.cuda.is_available() and torch.cuda.device_count() > 0
         
         if requested_device.startswith("cuda") and not has_cuda:
@@ -48,15 +66,15 @@ class TTSEngine:
         """Public interface for ModelManager."""
         self._unload_all_models()
 
+    def load(self, model_key: str):
+        """Eagerly load a TTS variant (used by startup preloading)."""
+        with self._lock, model_manager.using(f"tts:{model_key}"):
+            self._get_model(model_key)
+
     def _get_model(self, model_key: str):
-        # Single Active Model Policy:
-        # If the requested model is not loaded, unload everything else first.
+        # Residency is delegated to the ModelManager: other TTS variants stay
+        # loaded as long as they fit the VRAM budget.
         if model_key not in self.models:
-            from app.services.model_manager import model_manager
-            model_manager.acquire("tts")
-            
-            self._unload_all_models()
-            
             # Check if model type is enabled in config
             enabled_flag = getattr(settings, f"ENABLE_{model_key.upper().replace(' ', '_')}", True)
             if not enabled_flag:
@@ -65,25 +83,35 @@ class TTSEngine:
             model_id = self.model_configs.get(model_key)
             if not model_id:
                 raise ValueError(f"Unknown model key: {model_key}")
-                
-            self._load_model(model_key, model_id)
+
+            with model_manager.loading(
+                f"tts:{model_key}",
+                lambda: self._unload_model(model_key),
+                self.device,
+                target=lambda: self.models.get(model_key)
+            ):
+                self._load_model(model_key, model_id)
             
         return self.models[model_key]
 
+    def _unload_model(self, model_key: str):
+        """Drop a single TTS variant (invoked by the ModelManager on eviction)."""
+        if self.models.pop(model_key, None) is None:
+            return
+        logger.info(f"Unloaded TTS model {model_key}.")
+        gc.collect()
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
     def _unload_all_models(self):
         """Unload all models to free VRAM."""
         if not self.models:
             return
             
         logger.info("Unloading existing models to free VRAM...")
-        keys = list(self.models.keys())
-        for key in keys:
-            del self.models[key]
-        
-        self.models = {}
-        gc.collect()
-        if torch.cuda.is_available():
-            torch.cuda.empty_cache()
+        for key in list(self.models.keys()):
+            self._unload_model(key)
+            model_manager.unloaded(f"tts:{key}")
         logger.info("Memory cleared.")
 
     def _load_model(self, model_key: str, model_id: str):
@@ -102,6 +130,7 @@ class TTSEngine:
             model_source = local_path if os.path.exists(local_path) else model_id
             
             logger.info(f"Loading {model_key} model from {model_source}...")
+            from qwen_tts import Qwen3TTSModel
             # Use torch_dtype correctly to avoid the Flash Attention warning
             self.models[model_key] = Qwen3TTSModel.from_pretrained(
                 model_source,
@@ -114,9 +143,48 @@ class TTSEngine:
             logger.error(f"Failed to load {model_key}: {e}")
             raise e
 
-    def generate_voice_design(self, text: Union[str, List[str]], instruct: Union[str, List[str]], language: Union[str, List[str]] = "Auto", temperature: float = 1.0) -> List[bytes]:
-        with self._lock:
+    def _seed(self, seed: Optional[int]):
+        """Pin RNG state so a request with a fixed seed is reproducible."""
+        if seed is None:
+            return
+        torch.manual_seed(seed)
+        if torch.cuda.is_available():
+            torch.cuda.manual_seed_all(seed)
+
+    def _generate_cached(self, keys: List[str], run: Callable[[List[int]], List[bytes]]) -> List[bytes]:
+        """
+        Serve cached items and run the model only for the missing indices.
+        Only an item generated alone is stored: inside a larger batch the same
+        seed yields output that depends on its batch mates (the GPU worker runs
+        seeded items one by one; direct multi-item calls are served, not stored).
+        """
+        results = [tts_cache.get(k) for k in keys]
+        missing = [i for i, audio in enumerate(results) if audio is None]
+        if missing:
+            logger.info(f"TTS Cache: {len(keys) - len(missing)}/{len(keys)} hits, generating {len(missing)}")
+            for i, audio in zip(missing, run(missing)):
+                results[i] = audio
+                if len(missing) == 1:
+                    tts_cache.put(keys[i], audio)
+        return results
+
+    def generate_voice_design(self, text: Union[str, List[str]], instruct: Union[str, List[str]], language: Union[str, List[str]] = "Auto", temperature: float = 1.0, seed: Optional[int] = None) -> List[bytes]:
+        if not tts_cache.cacheable(temperature, seed):
+            return self._voice_design(text, instruct, language, temperature, seed)
+
+        texts, instructs, languages = _broadcast(text, instruct, language)
+        keys = [
+            tts_cache.make_key("VoiceDesign", texts[i], languages[i], temperature, seed, instruct=instructs[i])
+            for i in range(len(texts))
+        ]
+        return self._generate_cached(keys, lambda idx: self._voice_design(
+            _pick(texts, idx), _pick(instructs, idx), _pick(languages, idx), temperature, seed
+        ))
+
+    def _voice_design(self, text, instruct, language, temperature: float, seed: Optional[int]) -> List[bytes]:
+        with self._lock, model_manager.using("tts:VoiceDesign"), metrics.stage("tts"):
             model = self._get_model("VoiceDesign")
+            self._seed(seed)
             wavs, sr = model.generate_voice_design(
                 text=text,
                 language=language,
@@ -126,9 +194,23 @@ class TTSEngine:
             )
             return self._process_output(wavs, sr)
 
-    def generate_custom_voice(self, text: Union[str, List[str]], speaker: Union[str, List[str]], language: Union[str, List[str]] = "Auto", instruct: Optional[Union[str, List[str]]] = None, temperature: float = 1.0) -> List[bytes]:
-        with self._lock:
+    def generate_custom_voice(self, text: Union[str, List[str]], speaker: Union[str, List[str]], language: Union[str, List[str]] = "Auto", instruct: Optional[Union[str, List[str]]] = None, temperature: float = 1.0, seed: Optional[int] = None) -> List[bytes]:
+        if not tts_cache.cacheable(temperature, seed):
+            return self._custom_voice(text, speaker, language, instruct, temperature, seed)
+
+        texts, speakers, languages, instructs = _broadcast(text, speaker, language, instruct)
+        keys = [
+            tts_cache.make_key("CustomVoice", texts[i], languages[i], temperature, seed, speaker=speakers[i], instruct=instructs[i])
+            for i in range(len(texts))
+        ]
+        return self._generate_cached(keys, lambda idx: self._custom_voice(
+            _pick(texts, idx), _pick(speakers, idx), _pick(languages, idx), _pick(instructs, idx), temperature, seed
+        ))
+
+    def _custom_voice(self, text, speaker, language, instruct, temperature: float, seed: Optional[int]) -> List[bytes]:
+        with self._lock, model_manager.using("tts:CustomVoice"), metrics.stage("tts"):
             model = self._get_model("CustomVoice")
+            self._seed(seed)
             wavs, sr = model.generate_custom_voice(
                 text=text,
                 language=language,
@@ -139,8 +221,24 @@ class TTSEngine:
             )
             return self._process_output(wavs, sr)
 
-    def generate_voice_clone(self, text: Union[str, List[str]], ref_audio: Union[str, List[str], bytes], ref_text: Optional[Union[str, List[str]]] = None, language: Union[str, List[str]] = "Auto", temperature: float = 1.0) -> List[bytes]:
-        with self._lock:
+    def generate_voice_clone(self, text: Union[str, List[str]], ref_audio: Union[str, List[str], bytes], ref_text: Optional[Union[str, List[str]]] = None, language: Union[str, List[str]] = "Auto", temperature: float = 1.0, seed: Optional[int] = None) -> List[bytes]:
+        if not tts_cache.cacheable(temperature, seed):
+            return self._voice_clone(text, ref_audio, ref_text, language, temperature, seed)
+
+        texts, ref_audios, ref_texts, languages = _broadcast(text, ref_audio, ref_text, language)
+        keys = [
+            tts_cache.make_key(
+                "VoiceClone", texts[i], languages[i], temperature, seed,
+                ref_audio=tts_cache.voice_digest(ref_audios[i]), ref_text=ref_texts[i] or ""
+            )
+            for i in range(len(texts))
+        ]
+        return self._generate_cached(keys, lambda idx: self._voice_clone(
+            _pick(texts, idx), _pick(ref_audios, idx), _pick(ref_texts, idx), _pick(languages, idx), temperature, seed
+        ))
+
+    def _voice_clone(self, text, ref_audio, ref_text, language, temperature: float, seed: Optional[int]) -> List[bytes]:
+        with self._lock, model_manager.using("tts:VoiceClone"), metrics.stage("tts"):
             model = self._get_model("VoiceClone")
             
             # Resolve file IDs if present
@@ -215,6 +313,7 @@ class TTSEngine:
 
                 logger.info(f"Generating voice clone batch of size {len(text) if isinstance(text, list) else 1}")
                 
+                self._seed(seed)
                 wavs, sr = model.generate_voice_clone(
                     text=text,
                     language=language,
@@ -252,4 +351,4 @@ class TTSEngine:
             audio_bytes_list.append(buffer.getvalue())
         return audio_bytes_list
 
-tts_engine = TTSEngine()
+tts_engine = create_engine("tts", TTSEngine)
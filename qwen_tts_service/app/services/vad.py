@@ -0,0 +1,93 @@
+import numpy as np
+from typing import List, Tuple
+from app.core.config import settings
+
+# --- VAD Tuning ---
+FRAME_MS = 30
+NOISE_PERCENTILE = 10     # Frame energy percentile taken as the noise floor
+ENERGY_MARGIN_DB = 12.0   # Speech must be this far above the noise floor
+MIN_SPEECH_MS = 150       # Shorter bursts are treated as noise
+PAD_MS = 100              # Context kept around each speech segment
+# ------------------
+
+def frame_energy_db(audio: np.ndarray, sr: int, frame_ms: int = FRAME_MS) -> Tuple[np.ndarray, int]:
+    """Per-frame RMS energy in dB and the frame hop in samples."""
+    hop = max(1, int(sr * frame_ms / 1000))
+    n_frames = len(audio) // hop
+    if n_frames == 0:
+        return np.zeros(0, dtype=np.float32), hop
+    frames = audio[:n_frames * hop].reshape(n_frames, hop)
+    rms = np.sqrt(np.mean(frames.astype(np.float32) ** 2, axis=1) + 1e-12)
+    return 20.0 * np.log10(rms), hop
+
+def speech_segments(audio: np.ndarray, sr: int, min_silence_ms: int = 300,
+                    energy_db: np.ndarray = None, hop: int = None) -> List[Tuple[int, int]]:
+    """
+    Energy-based voice activity detection.
+    Returns [start, end) sample ranges of speech, with gaps shorter than
+    min_silence_ms bridged and PAD_MS of context on each side. Audio without
+    frames ENERGY_MARGIN_DB above its floor (steady noise, silence) has none.
+    """
+    if energy_db is None:
+        energy_db, hop = frame_energy_db(audio, sr)
+    if energy_db.size == 0:
+        return []
+
+    floor = np.percentile(energy_db, NOISE_PERCENTILE)
+    peak = np.percentile(energy_db, 99)
+    if peak - floor < ENERGY_MARGIN_DB:
+        return []
+    # Cap the threshold halfway to the peak so low-dynamic-range audio still splits,
+    # but never below ASR_VAD_MIN_DB (a near-silent floor would make hiss "speech")
+    threshold = max(min(floor + ENERGY_MARGIN_DB, (floor + peak) / 2.0), settings.ASR_VAD_MIN_DB)
+    voiced = energy_db > threshold
+
+    # Run boundaries of the voiced mask
+    edges = np.diff(np.concatenate(([0], voiced.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+
+    frame_ms = hop * 1000.0 / sr
+    max_gap = int(min_silence_ms / frame_ms)
+    min_len = int(MIN_SPEECH_MS / frame_ms)
+    pad = int(PAD_MS / frame_ms)
+
+    merged: List[List[int]] = []
+    for s, e in zip(starts, ends):
+        if merged and s - merged[-1][1] <= max_gap:
+            merged[-1][1] = e
+        else:
+            merged.append([s, e])
+
+    total = len(audio)
+    return [
+        (max(0, (s - pad) * hop), min(total, (e + pad) * hop))
+        for s, e in merged if e - s >= min_len
+    ]
+
+def speech_chunks(audio: np.ndarray, sr: int, max_chunk_s: float, min_silence_ms: int = 300) -> List[Tuple[int, int]]:
+    """
+    Pack VAD segments into [start, end) chunks no longer than max_chunk_s.
+    Consecutive segments share a chunk while they fit; a single segment that
+    is too long is cut at its quietest frame in the second half of the window.
+    """
+    energy_db, hop = frame_energy_db(audio, sr)
+    max_len = int(max_chunk_s * sr)
+
+    pieces: List[Tuple[int, int]] = []
+    for start, end in speech_segments(audio, sr, min_silence_ms, energy_db, hop):
+        while end - start > max_len:
+            lo = (start + max_len // 2) // hop
+            hi = min(len(energy_db), max(lo + 1, (start + max_len) // hop))
+            cut = (lo + int(np.argmin(energy_db[lo:hi]))) * hop if lo < hi else start + max_len
+            pieces.append((start, cut))
+            start = cut
+        pieces.append((start, end))
+
+    chunks: List[Tuple[int, int]] = []
+    for start, end in pieces:
+        if chunks and end - chunks[-1][0] <= max_len:
+            chunks[-1] = (chunks[-1][0], end)
+        else:
+            chunks.append((start, end))
+    return chunks
@@ -0,0 +1,191 @@
+import os
+import time
+import logging
+import tempfile
+import threading
+import traceback
+import numpy as np
+import soundfile as sf
+from typing import Callable, Dict, Any, List, Optional
+from app.core.config import settings
+from app.services.devices import OPERATION_ENGINES
+
+# --- Warm-up Tuning ---
+WARMUP_TEXT = "Warm-up sentence for kernel autotuning."
+WARMUP_AUDIO_SECONDS = 3.0
+WARMUP_SR = 16000
+# ----------------------
+
+# Stages without operations of their own run inside these engines' operations
+STAGE_ENGINES = {"denoiser": ("asr", "tts"), "super_res": ("tts",)}
+
+logger = logging.getLogger(__name__)
+
+class WarmupService:
+    """
+    Loads the models listed in PRELOAD_MODELS at startup and runs a dummy
+    inference on each one (kernel autotuning, allocator growth), tracking a
+    per-model state for the /ready probe.
+    States: pending -> loading -> warming -> ready | failed
+    """
+    def __init__(self):
+        self.states: Dict[str, Dict[str, Any]] = {}
+        self._thread = None
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+
+    def targets(self, serves: Optional[Callable[[str], bool]] = None) -> List[str]:
+        """
+        PRELOAD_MODELS entries, keeping only the engines whose operations this
+        process runs when 'serves' (operation -> bool) is given: a worker for
+        one device must not load models pinned to another.
+        """
+        names = [name.strip() for name in settings.PRELOAD_MODELS.split(",") if name.strip()]
+        if serves is None:
+            return names
+
+        def served(engine: str) -> bool:
+            if engine in STAGE_ENGINES:
+                return any(served(user) for user in STAGE_ENGINES[engine])
+            operations = [op for op, owner in OPERATION_ENGINES.items() if owner == engine]
+            # Unknown names are kept so _load() reports them
+            return not operations or any(serves(op) for op in operations)
+
+        kept = [name for name in names if served(name.partition(":")[0])]
+        if len(kept) < len(names):
+            logger.info(f"Warm-up: Skipping {[n for n in names if n not in kept]} (served by other workers)")
+        return kept
+
+    def start(self, serves: Optional[Callable[[str], bool]] = None):
+        targets = self.targets(serves)
+        with self._lock:
+            for name in targets:
+                self.states[name] = {"state": "pending"}
+
+        if not targets:
+            self._done.set()
+            return
+
+        self._thread = threading.Thread(target=self._run, args=(targets,), name="WarmupThread", daemon=True)
+        self._thread.start()
+        logger.info(f"Warm-up: Preloading {targets}")
+
+    def _set(self, name: str, **fields):
+        with self._lock:
+            self.states.setdefault(name, {}).update(fields)
+
+    def _run(self, targets: List[str]):
+        t_start = time.perf_counter()
+        for name in targets:
+            t0 = time.perf_counter()
+            try:
+                self._set(name, state="loading")
+                self._load(name)
+                self._set(name, load_seconds=round(time.perf_counter() - t0, 3))
+
+                if settings.WARMUP_ENABLED:
+                    self._set(name, state="warming")
+                    t1 = time.perf_counter()
+                    self._warm(name)
+                    self._set(name, warmup_seconds=round(time.perf_counter() - t1, 3))
+
+                self._set(name, state="ready")
+                logger.info(f"Warm-up: '{name}' ready in {time.perf_counter() - t0:.2f}s")
+            except Exception as e:
+                logger.error(f"Warm-up: '{name}' failed: {e}")
+                logger.error(traceback.format_exc())
+                self._set(name, state="failed", error=str(e))
+
+        self._done.set()
+        logger.info(f"Warm-up: Finished in {time.perf_counter() - t_start:.2f}s")
+
+    def _load(self, name: str):
+        family, _, variant = name.partition(":")
+        if family == "tts":
+            from app.services.tts_engine import tts_engine
+            tts_engine.load(variant or "VoiceClone")
+        elif family == "asr":
+            from app.services.asr_engine import asr_engine
+            asr_engine.load()
+        elif family == "diarization":
+            from app.services.diarization_engine import diarization_engine
+            diarization_engine.load()
+        elif family == "denoiser":
+            from app.services.fb_denoiser import fb_denoiser
+            fb_denoiser.load()
+        elif family == "super_res":
+            from app.services.super_res import super_res
+            super_res.load()
+        else:
+            raise ValueError(f"Unknown preload target: {name}")
+
+    def _synthetic_wav(self) -> str:
+        """A short tone + noise clip so VAD/segmentation stages have something to chew on."""
+        t = np.arange(int(WARMUP_AUDIO_SECONDS * WARMUP_SR)) / WARMUP_SR
+        audio = 0.2 * np.sin(2 * np.pi * 220 * t) + 0.01 * np.random.randn(t.size)
+        fd, path = tempfile.mkstemp(suffix=".wav", prefix="warmup_")
+        os.close(fd)
+        sf.write(path, audio.astype(np.float32), WARMUP_SR)
+        return path
+
+    def _warm(self, name: str):
+        family, _, variant = name.partition(":")
+        batch = max(1, settings.WARMUP_BATCH_SIZE)
+        texts = [WARMUP_TEXT] * batch
+
+        if family in ("denoiser", "super_res"):
+            import torch
+            wavs = [torch.zeros(1, int(WARMUP_AUDIO_SECONDS * WARMUP_SR)) for _ in range(batch)]
+            if family == "denoiser":
+                from app.services.fb_denoiser import fb_denoiser
+                fb_denoiser.process_batch_tensors(wavs, WARMUP_SR)
+            else:
+                from app.services.super_res import super_res
+                super_res.process_batch_tensors(wavs, WARMUP_SR)
+            return
+
+        path = self._synthetic_wav()
+        try:
+            if family == "tts":
+                from app.services.tts_engine import tts_engine
+                variant = variant or "VoiceClone"
+                if variant == "VoiceDesign":
+                    tts_engine.generate_voice_design(text=texts, instruct=["Neutral"] * batch, language=["English"] * batch)
+                elif variant == "CustomVoice":
+                    speaker = settings.WARMUP_TTS_SPEAKER
+                    tts_engine.generate_custom_voice(text=texts, speaker=[speaker] * batch, language=["English"] * batch)
+                else:
+                    tts_engine.generate_voice_clone(text=texts, ref_audio=[path] * batch, language=["English"] * batch)
+            elif family == "asr":
+                from app.services.asr_engine import asr_engine
+                asr_engine.transcribe(audio=[path] * batch)
+            elif family == "diarization":
+                from app.services.diarization_engine import diarization_engine
+                diarization_engine.diarize(
+                    audio_paths=[path] * batch,
+                    num_speakers=[None] * batch,
+                    min_speakers=[None] * batch,
+                    max_speakers=[None] * batch
+                )
+        finally:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def is_ready(self) -> bool:
+        if not self._done.is_set():
+            return False
+        with self._lock:
+            return all(s.get("state") == "ready" for s in self.states.values())
+
+    def report(self) -> Dict[str, Any]:
+        ready = self.is_ready()
+        with self._lock:
+            return {
+                "ready": ready,
+                "warmup_complete": self._done.is_set(),
+                "engines": {name: dict(state) for name, state in self.states.items()}
+            }
+
+warmup_service = WarmupService()
@@ -0,0 +1,96 @@
+import os
+import json
+import time
+import socket
+import logging
+import threading
+from typing import Callable, Dict, Any, List, Optional
+from app.core.config import settings
+from app.services import redis_client
+
+logger = logging.getLogger(__name__)
+
+class WorkerUnavailableError(RuntimeError):
+    """No live worker process serves the lane a request needs (the endpoints answer 503)."""
+
+class WorkerRegistry:
+    """
+    Standalone GPU worker processes announce themselves in the "gpu_workers"
+    hash (worker id -> JSON status), refreshed every WORKER_HEARTBEAT_INTERVAL_S.
+    Entries older than WORKER_HEARTBEAT_TTL_S belong to workers that died
+    without unregistering and are pruned when the registry is read.
+    """
+    def __init__(self):
+        self.redis = redis_client.connect()
+        self.key = "gpu_workers"
+        self.worker_id: Optional[str] = None
+        self._status: Callable[[], Dict[str, Any]] = dict
+        self._started_at = 0.0
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def default_id() -> str:
+        return f"{socket.gethostname()}-{os.getpid()}"
+
+    def start(self, worker_id: str, status: Callable[[], Dict[str, Any]]):
+        """Register this process and keep its entry fresh from a background thread."""
+        self.worker_id = worker_id
+        self._status = status
+        self._started_at = time.time()
+        self._stop_event.clear()
+        self.beat()
+        self._thread = threading.Thread(target=self._run, name="WorkerHeartbeatThread", daemon=True)
+        self._thread.start()
+        logger.info(f"Worker registry: Registered '{worker_id}'")
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        if self.worker_id:
+            try:
+                self.redis.hdel(self.key, self.worker_id)
+            except Exception as e:
+                logger.error(f"Worker registry: Unregister failed: {e}")
+            logger.info(f"Worker registry: Unregistered '{self.worker_id}'")
+
+    def beat(self):
+        entry = {
+            "worker_id": self.worker_id,
+            "host": socket.gethostname(),
+            "pid": os.getpid(),
+            "started_at": self._started_at,
+            "last_seen": time.time(),
+        }
+        entry.update(self._status())
+        self.redis.hset(self.key, self.worker_id, json.dumps(entry))
+
+    def _run(self):
+        while not self._stop_event.wait(settings.WORKER_HEARTBEAT_INTERVAL_S):
+            try:
+                self.beat()
+            except Exception as e:
+                logger.error(f"Worker registry: Heartbeat failed: {e}")
+
+    def workers(self) -> List[Dict[str, Any]]:
+        """Live workers, oldest registration first; stale entries are removed."""
+        now = time.time()
+        live, stale = [], []
+        for worker_id, raw in self.redis.hgetall(self.key).items():
+            try:
+                entry = json.loads(raw)
+            except ValueError:
+                stale.append(worker_id)
+                continue
+            if now - entry.get("last_seen", 0) > settings.WORKER_HEARTBEAT_TTL_S:
+                stale.append(worker_id)
+            else:
+                entry["age_s"] = round(now - entry["last_seen"], 3)
+                live.append(entry)
+        if stale:
+            self.redis.hdel(self.key, *stale)
+            logger.warning(f"Worker registry: Pruned stale workers {stale}")
+        return sorted(live, key=lambda w: w.get("started_at", 0))
+
+worker_registry = WorkerRegistry()
@@ -0,0 +1,98 @@
+"""
+Standalone GPU worker process (run from qwen_tts_service/):
+
+    RUN_GPU_WORKER_IN_API=false uvicorn app.main:app --workers 4
+    python -m app.worker                          # one process per node (a thread per DEVICES entry)
+    python -m app.worker --device cuda:1 --id node1-gpu1 --metrics-port 9101   # one process per GPU
+
+Consumes the shared Redis queue (batch items and the API's synchronous
+requests), preloads the PRELOAD_MODELS engines of the lanes it serves and
+keeps a heartbeat in the worker registry until it is stopped with SIGINT / SIGTERM.
+"""
+import os
+import sys
+import signal
+import logging
+import argparse
+import threading
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.worker", description="Qwen-TTS GPU worker")
+    parser.add_argument("--id", default=None, help="Worker id in the registry (default: <host>-<pid>)")
+    parser.add_argument("--device", default=None,
+                        help="Serve only this device (its pinned lane + the shared lane) and place unpinned engines on it")
+    parser.add_argument("--preload", default=None, help="Overrides PRELOAD_MODELS for this process")
+    parser.add_argument("--metrics-port", type=int, default=0, help="Serve Prometheus metrics on this port (0 = off)")
+    return parser.parse_args(argv)
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    # Settings are read at import: apply overrides before any app module loads
+    if args.device:
+        os.environ["DEVICE"] = args.device
+    if args.preload is not None:
+        os.environ["PRELOAD_MODELS"] = args.preload
+    os.environ["RUN_GPU_WORKER_IN_API"] = "true"  # This process *is* the worker: never route to itself
+
+    from app.core.config import settings
+    from app.services.redis_client import MEMORY_SCHEME
+    if settings.REDIS_URL.startswith(MEMORY_SCHEME):
+        logging.error("A standalone worker needs a shared Redis: REDIS_URL=memory:// is in-process only")
+        return 2
+
+    from app.services.devices import affinity
+    try:
+        affinity()
+    except ValueError as e:
+        logging.error(str(e))
+        return 2
+
+    from app.services.gpu_worker import gpu_worker
+    from app.services.warmup import warmup_service
+    from app.services.worker_registry import worker_registry
+    from app.services.model_manager import model_manager
+    from app.services.inference_executor import inference_executor
+    from app.services.audio_encoder import audio_encoder
+    from app.services.tracing import tracer
+
+    if args.metrics_port:
+        from prometheus_client import start_http_server
+        from app.services import metrics  # noqa: F401 (registers the service collector)
+        start_http_server(args.metrics_port)
+
+    def status():
+        return {
+            "devices": [w.device or settings.DEVICE for w in gpu_worker.workers],
+            "lanes": gpu_worker.lanes(),
+            "alive": gpu_worker.is_alive(),
+            "ready": warmup_service.is_ready(),
+            "resident": model_manager.resident_names(),
+            "batches": gpu_worker.batches_processed,
+            "items": gpu_worker.items_processed,
+        }
+
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+
+    gpu_worker.start([args.device] if args.device else None)
+    warmup_service.start(gpu_worker.serves)  # Only the engines of the lanes this process drains
+    worker_registry.start(args.id or worker_registry.default_id(), status)
+    try:
+        while not stop.wait(1.0):
+            if not gpu_worker.is_alive():
+                logging.error("GPU worker thread exited; shutting down")
+                return 1
+    finally:
+        # Unregister first so the API stops counting on this worker while it drains
+        worker_registry.stop()
+        gpu_worker.stop()
+        inference_executor.shutdown()
+        audio_encoder.shutdown()
+        tracer.shutdown()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
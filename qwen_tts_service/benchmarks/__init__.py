@@ -0,0 +1 @@
+"""Synthetic-workload benchmarks for the engines, pipeline, queue and file store (python -m benchmarks)."""
@@ -0,0 +1,114 @@
+"""
+Benchmark suite entry point (run from qwen_tts_service/):
+
+    python -m benchmarks --mock --output bench.json
+    python -m benchmarks --only asr,diarize --sizes 1,4,8 --lengths 10,60
+    python -m benchmarks --mock --baseline benchmarks/baselines/ci-mock.json --fail-on-regression
+"""
+import os
+import sys
+import json
+import logging
+import argparse
+import functools
+
+from benchmarks.harness import DEFAULT_ITERATIONS, DEFAULT_TOLERANCE
+
+def _floats(value: str):
+    return [float(v) for v in value.split(",") if v]
+
+def _ints(value: str):
+    return [int(v) for v in value.split(",") if v]
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Qwen-TTS service benchmarks")
+    parser.add_argument("--mock", action="store_true", help="CPU-only fake models (CI hosts without GPU or weights)")
+    parser.add_argument("--only", default="", help="Comma-separated groups (default: all)")
+    parser.add_argument("--sizes", type=_ints, default=[1, 4, 8], help="Batch sizes")
+    parser.add_argument("--lengths", type=_floats, default=[5.0, 30.0], help="Audio / text lengths in seconds")
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS)
+    parser.add_argument("--no-memory", action="store_true", help="Skip the peak-memory run")
+    parser.add_argument("--redis-url", default=None, help="Real Redis for the queue group (default: in-process memory://)")
+    parser.add_argument("--output", default=None, help="Write the JSON report here (default: stdout)")
+    parser.add_argument("--baseline", default=None, help="Compare against this report")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Allowed relative slowdown")
+    parser.add_argument("--save-baseline", default=None, help="Also store this run as a baseline file")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit 1 when a result regresses")
+    return parser.parse_args(argv)
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(name)s: %(message)s")
+
+    # Settings are read at import: configure before any app module loads.
+    # Output caches would turn repeated iterations into cache hits.
+    os.environ["TTS_CACHE_ENABLED"] = "false"
+    os.environ["RESULT_CACHE_ENABLED"] = "false"
+    if args.mock:
+        os.environ["DEVICE"] = "cpu"
+        os.environ.setdefault("DIARIZATION_LONG_FORM_THRESHOLD_S", "0")
+        from benchmarks import mocks
+        mocks.install()
+
+    from benchmarks import workloads
+    from benchmarks.harness import run_benchmark, environment, report, compare
+
+    groups = dict(workloads.GROUPS)
+    groups["queue"] = functools.partial(workloads.queue, redis_url=args.redis_url)
+    selected = [g.strip() for g in args.only.split(",") if g.strip()] or list(groups)
+    unknown = [g for g in selected if g not in groups]
+    if unknown:
+        print(f"Unknown groups: {', '.join(unknown)} (available: {', '.join(groups)})", file=sys.stderr)
+        return 2
+
+    files = workloads.AudioFiles()
+    results, skipped = [], {}
+    try:
+        for group in selected:
+            try:
+                benches = groups[group](args.sizes, args.lengths, files)
+            except ImportError as e:
+                skipped[group] = f"missing dependency: {e}"
+                print(f"[skip] {group}: {skipped[group]}", file=sys.stderr)
+                continue
+            for bench in benches:
+                result = run_benchmark(bench, args.iterations, memory=not args.no_memory)
+                results.append(result)
+                if result.error:
+                    print(f"[error] {result.key}: {result.error}", file=sys.stderr)
+                else:
+                    print(f"[ok] {result.key}: p50 {result.latency_ms['p50']:.1f} ms, "
+                          f"{result.throughput:.2f} items/s", file=sys.stderr)
+    finally:
+        files.cleanup()
+
+    meta = environment(args.mock)
+    meta["skipped"] = skipped
+    output = report(results, meta)
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            rows = compare(output, json.load(f), args.tolerance)
+        output["comparison"] = {"baseline": args.baseline, "tolerance": args.tolerance, "results": rows}
+        regressions = [r for r in rows if r["regression"]]
+        for r in regressions:
+            print(f"[regression] {r['name']} {r.get('params', '')}: "
+                  f"p50 {r.get('p50_change', 0):+.1%}, throughput {r.get('throughput_change', 0):+.1%}"
+                  + (f" ({r['error']})" if "error" in r else ""), file=sys.stderr)
+        if regressions and args.fail_on_regression:
+            exit_code = 1
+
+    text = json.dumps(output, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            f.write(json.dumps(report(results, meta), indent=2) + "\n")
+    return exit_code
+
+if __name__ == "__main__":
+    sys.exit(main())
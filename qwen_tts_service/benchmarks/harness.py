@@ -0,0 +1,173 @@
+"""
+Timing, memory and baseline comparison for the benchmark suite.
+"""
+import gc
+import sys
+import json
+import time
+import platform
+import tracemalloc
+from dataclasses import dataclass, field, asdict
+from typing import Callable, Dict, Any, List, Optional
+
+# --- Benchmark Tuning ---
+WARMUP_RUNS = 1
+DEFAULT_ITERATIONS = 5
+DEFAULT_TOLERANCE = 0.15   # Allowed relative slowdown before a result counts as a regression
+# ------------------------
+
+@dataclass
+class Benchmark:
+    """One workload at one parameter point. setup() returns the state run() consumes."""
+    name: str
+    params: Dict[str, Any]
+    items: int                                   # Items processed per run (for throughput)
+    run: Callable[[Any], Any]
+    setup: Optional[Callable[[], Any]] = None
+    teardown: Optional[Callable[[Any], None]] = None
+    details: Optional[Callable[[Any], Dict[str, Any]]] = None  # Extra report fields, read after the timed runs
+    memory: bool = True                          # False when the work happens outside this process
+
+@dataclass
+class Result:
+    name: str
+    params: Dict[str, Any]
+    items: int
+    iterations: int
+    throughput: float = 0.0                      # Items per second (median run)
+    latency_ms: Dict[str, float] = field(default_factory=dict)
+    peak_memory_mb: Dict[str, float] = field(default_factory=dict)
+    details: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def key(self) -> str:
+        return result_key(self.name, self.params)
+
+def result_key(name: str, params: Dict[str, Any]) -> str:
+    return name + json.dumps(params, sort_keys=True)
+
+def percentile(values: List[float], q: float) -> float:
+    """Linear-interpolated percentile (numpy's default method) without needing numpy."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    pos = (len(ordered) - 1) * q / 100.0
+    lo = int(pos)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+def _cuda():
+    """torch.cuda when torch is already imported and a GPU is present."""
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.cuda.is_available():
+        return torch.cuda
+    return None
+
+def _measure_peak(bench: Benchmark, state: Any) -> Dict[str, float]:
+    """
+    Peak memory of one extra run: Python heap (tracemalloc, includes numpy
+    buffers) and the CUDA allocator high-water mark. Kept out of the timed runs
+    because tracemalloc slows allocation-heavy code down.
+    """
+    cuda = _cuda()
+    if cuda is not None:
+        cuda.synchronize()
+        cuda.reset_peak_memory_stats()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        bench.run(state)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    peak_mb = {"host": round(peak / 2**20, 2)}
+    if cuda is not None:
+        cuda.synchronize()
+        peak_mb["cuda"] = round(cuda.max_memory_allocated() / 2**20, 2)
+    return peak_mb
+
+def run_benchmark(bench: Benchmark, iterations: int = DEFAULT_ITERATIONS, memory: bool = True) -> Result:
+    result = Result(bench.name, bench.params, bench.items, iterations)
+    state = None
+    try:
+        state = bench.setup() if bench.setup else None
+        for _ in range(WARMUP_RUNS):
+            bench.run(state)
+
+        cuda = _cuda()
+        timings = []
+        for _ in range(iterations):
+            t0 = time.perf_counter()
+            bench.run(state)
+            if cuda is not None:
+                cuda.synchronize()
+            timings.append(time.perf_counter() - t0)
+
+        median = percentile(timings, 50)
+        result.throughput = round(bench.items / median, 3) if median > 0 else 0.0
+        result.latency_ms = {
+            "p50": round(median * 1000, 3),
+            "p95": round(percentile(timings, 95) * 1000, 3),
+            "p99": round(percentile(timings, 99) * 1000, 3),
+            "mean": round(sum(timings) / len(timings) * 1000, 3),
+            "min": round(min(timings) * 1000, 3),
+        }
+        if bench.details:
+            result.details = bench.details(state)
+        if memory and bench.memory:
+            result.peak_memory_mb = _measure_peak(bench, state)
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+    finally:
+        if bench.teardown:
+            try:
+                bench.teardown(state)
+            except Exception:
+                pass
+    return result
+
+def environment(mock: bool) -> Dict[str, Any]:
+    meta = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "mock": mock,
+    }
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        meta["torch"] = torch.__version__
+        meta["device"] = torch.cuda.get_device_name(0) if torch.cuda.is_available() else "cpu"
+    return meta
+
+def report(results: List[Result], meta: Dict[str, Any]) -> Dict[str, Any]:
+    return {"meta": meta, "results": [asdict(r) for r in results]}
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = DEFAULT_TOLERANCE) -> List[Dict[str, Any]]:
+    """
+    Per benchmark present in both reports: relative change of p50 latency and
+    throughput. A result regresses when p50 grows or throughput drops by more
+    than 'tolerance'. Baselines are only meaningful on the same host class,
+    so a mock/real mismatch is reported as an error entry instead.
+    """
+    if current["meta"].get("mock") != baseline["meta"].get("mock"):
+        return [{"name": "*", "regression": True, "error": "Baseline was recorded in a different mode (mock vs real models)"}]
+
+    previous = {result_key(r["name"], r["params"]): r for r in baseline["results"] if not r.get("error")}
+    rows = []
+    for r in current["results"]:
+        old = previous.get(result_key(r["name"], r["params"]))
+        if old is None or r.get("error"):
+            continue
+        p50_change = r["latency_ms"]["p50"] / old["latency_ms"]["p50"] - 1 if old["latency_ms"]["p50"] else 0.0
+        tput_change = r["throughput"] / old["throughput"] - 1 if old["throughput"] else 0.0
+        rows.append({
+            "name": r["name"],
+            "params": r["params"],
+            "p50_ms": [old["latency_ms"]["p50"], r["latency_ms"]["p50"]],
+            "throughput": [old["throughput"], r["throughput"]],
+            "p50_change": round(p50_change, 4),
+            "throughput_change": round(tput_change, 4),
+            "regression": p50_change > tolerance or tput_change < -tolerance,
+        })
+    return rows
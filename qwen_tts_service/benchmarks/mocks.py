@@ -0,0 +1,163 @@
+"""
+Stand-ins for the model libraries (qwen_tts, qwen_asr, pyannote.audio,
+denoiser, NovaSR) so the real engines, ModelManager and pipeline code can be
+benchmarked on CPU-only hosts without weights. Each fake does a small amount of
+work proportional to its input so batch size and length still matter.
+install() must run before any app module is imported.
+"""
+import sys
+import types
+import numpy as np
+
+TTS_SR = 24000
+TTS_SECONDS_PER_CHAR = 0.06   # Fake speech rate for synthesized clips
+ASR_WORD_SECONDS = 0.4        # One fake word per 0.4 s of input
+DIAR_TURN_SECONDS = 4.0       # Fake speaker turn length
+DIAR_SPEAKERS = 2
+
+def _work(samples: int):
+    """CPU cost proportional to the signal length (stands in for the forward pass)."""
+    if samples > 0:
+        np.sin(np.arange(samples, dtype=np.float32) * 1e-3).sum()
+
+# --- qwen_tts ---
+
+class FakeTTSModel:
+    @classmethod
+    def from_pretrained(cls, *args, **kwargs):
+        return cls()
+
+    def _generate(self, text):
+        texts = text if isinstance(text, list) else [text]
+        wavs = []
+        for t in texts:
+            n = max(TTS_SR // 4, int(len(t) * TTS_SECONDS_PER_CHAR * TTS_SR))
+            _work(n)
+            wavs.append((0.1 * np.sin(np.arange(n) * 2 * np.pi * 220 / TTS_SR)).astype(np.float32))
+        return wavs, TTS_SR
+
+    def generate_voice_design(self, text, **kwargs):
+        return self._generate(text)
+
+    def generate_custom_voice(self, text, **kwargs):
+        return self._generate(text)
+
+    def generate_voice_clone(self, text, **kwargs):
+        return self._generate(text)
+
+# --- qwen_asr ---
+
+class _Stamp:
+    def __init__(self, text, start_time, end_time):
+        self.text, self.start_time, self.end_time = text, start_time, end_time
+
+class _ASRResult:
+    def __init__(self, text, language, time_stamps):
+        self.text, self.language, self.time_stamps = text, language, time_stamps
+
+class FakeASRModel:
+    @classmethod
+    def from_pretrained(cls, *args, **kwargs):
+        return cls()
+
+    def transcribe(self, audio, language=None, return_time_stamps=False):
+        results = []
+        for i, (wav, sr) in enumerate(audio):
+            _work(len(wav))
+            seconds = len(wav) / sr
+            n_words = max(1, int(seconds / ASR_WORD_SECONDS))
+            words = [f"word{k}" for k in range(n_words)]
+            stamps = [
+                _Stamp(w, k * ASR_WORD_SECONDS, (k + 1) * ASR_WORD_SECONDS) for k, w in enumerate(words)
+            ] if return_time_stamps else None
+            lang = language[i] if isinstance(language, list) and language[i] else "English"
+            results.append(_ASRResult(" ".join(words) + ".", lang, stamps))
+        return results
+
+# --- pyannote.audio ---
+
+class _Turn:
+    def __init__(self, start, end):
+        self.start, self.end = start, end
+
+class _Annotation:
+    def __init__(self, turns):
+        self._turns = turns  # [(start, end, label)]
+
+    def itertracks(self, yield_label=False):
+        for k, (start, end, label) in enumerate(self._turns):
+            yield (_Turn(start, end), k, label) if yield_label else (_Turn(start, end), k)
+
+    def labels(self):
+        return sorted({label for _, _, label in self._turns})
+
+    def label_duration(self, label):
+        return sum(end - start for start, end, l in self._turns if l == label)
+
+class FakePipeline:
+    @classmethod
+    def from_pretrained(cls, *args, **kwargs):
+        return cls()
+
+    def to(self, device):
+        return self
+
+    def __call__(self, file, return_embeddings=False, **kwargs):
+        waveform = file["waveform"]
+        samples = int(waveform.shape[-1])
+        _work(samples)
+        seconds = samples / file["sample_rate"]
+        speakers = min(DIAR_SPEAKERS, kwargs.get("max_speakers") or DIAR_SPEAKERS)
+        turns, t, k = [], 0.0, 0
+        while t < seconds:
+            turns.append((t, min(seconds, t + DIAR_TURN_SECONDS), f"SPEAKER_{k % speakers:02d}"))
+            t += DIAR_TURN_SECONDS
+            k += 1
+        annotation = _Annotation(turns)
+        if return_embeddings:
+            rng = np.random.default_rng(0)
+            return annotation, rng.standard_normal((len(annotation.labels()), 192)).astype(np.float32)
+        return annotation
+
+# --- denoiser / NovaSR (real torch modules so residency accounting works) ---
+
+def _denoiser_module():
+    import torch
+
+    class FakeDenoiser(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.gain = torch.nn.Conv1d(1, 1, kernel_size=1, bias=False)
+            torch.nn.init.ones_(self.gain.weight)
+            self.sample_rate = 16000
+
+        def forward(self, x):
+            return self.gain(x)
+
+    return FakeDenoiser()
+
+class FakeFastSR:
+    def __init__(self):
+        import torch
+        self.model = torch.nn.Conv1d(1, 1, kernel_size=1, bias=False)
+        torch.nn.init.ones_(self.model.weight)
+
+    def infer(self, wav):
+        import torch.nn.functional as F
+        return F.interpolate(self.model(wav), scale_factor=3, mode="linear")[0]
+
+def install():
+    """Register the fake libraries in sys.modules (idempotent)."""
+    def module(name, **attrs):
+        mod = types.ModuleType(name)
+        mod.__dict__.update(attrs)
+        sys.modules[name] = mod
+        return mod
+
+    module("qwen_tts", Qwen3TTSModel=FakeTTSModel)
+    module("qwen_asr", Qwen3ASRModel=FakeASRModel)
+    pyannote = module("pyannote")
+    pyannote.audio = module("pyannote.audio", Pipeline=FakePipeline)
+    pretrained = module("denoiser.pretrained", dns48=_denoiser_module)
+    module("denoiser", pretrained=pretrained)
+    module("NovaSR", FastSR=FakeFastSR)
@@ -0,0 +1,350 @@
+"""
+Synthetic workloads: each group builds one Benchmark per (batch size, length)
+point. App modules are imported inside the builders so '--only' never loads
+engines it does not measure (and mocks.install() can run first).
+"""
+import io
+import os
+import shutil
+import tempfile
+import numpy as np
+from typing import Callable, Dict, List, Optional, Any
+from benchmarks.harness import Benchmark
+
+SYNTH_SR = 24000
+WORDS_PER_SECOND = 2.5
+VOICE_INSTRUCT = "A calm, clear female voice speaking at a moderate pace."
+_WORDS = ("the quick brown fox jumps over a lazy dog while seven bright stars "
+          "slowly fade into the early morning sky above quiet hills").split()
+
+def synth_text(seconds: float, seed: int = 0) -> str:
+    """Roughly 'seconds' of speech worth of text."""
+    rng = np.random.default_rng(seed)
+    n = max(3, int(seconds * WORDS_PER_SECOND))
+    return " ".join(rng.choice(_WORDS, n)).capitalize() + "."
+
+def synth_audio(seconds: float, sr: int = SYNTH_SR, seed: int = 0) -> np.ndarray:
+    """
+    Speech-like signal: a pitch-wandering harmonic tone gated into ~4 s
+    'utterances' with short pauses, plus low-level noise, so VAD and the
+    segmentation models see activity changes.
+    """
+    rng = np.random.default_rng(seed)
+    n = int(seconds * sr)
+    t = np.arange(n) / sr
+    f0 = 140 + 40 * np.sin(2 * np.pi * 0.3 * t + seed)
+    phase = 2 * np.pi * np.cumsum(f0) / sr
+    voice = sum(np.sin(k * phase) / k for k in range(1, 5))
+    syllables = 0.5 + 0.5 * np.sin(2 * np.pi * 4.0 * t) ** 2
+    gate = (np.mod(t, 4.5) < 4.0).astype(np.float32)
+    wav = 0.2 * voice * syllables * gate + 0.005 * rng.standard_normal(n)
+    return wav.astype(np.float32)
+
+def wav_bytes(wav: np.ndarray, sr: int = SYNTH_SR) -> bytes:
+    import soundfile as sf
+    buffer = io.BytesIO()
+    sf.write(buffer, wav, sr, format="WAV")
+    return buffer.getvalue()
+
+class AudioFiles:
+    """Temporary WAV files: one per (batch index, length), reused across iterations."""
+    def __init__(self):
+        self.dir = tempfile.mkdtemp(prefix="qwen_bench_")
+        self._paths: Dict[tuple, str] = {}
+
+    def get(self, seconds: float, index: int = 0, sr: int = SYNTH_SR) -> str:
+        key = (seconds, index, sr)
+        if key not in self._paths:
+            import soundfile as sf
+            path = os.path.join(self.dir, f"synth_{seconds:g}s_{index}_{sr}.wav")
+            sf.write(path, synth_audio(seconds, sr, seed=index), sr)
+            self._paths[key] = path
+        return self._paths[key]
+
+    def batch(self, seconds: float, size: int, sr: int = SYNTH_SR) -> List[str]:
+        return [self.get(seconds, i, sr) for i in range(size)]
+
+    def cleanup(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+# --- Engines ---
+
+def tts_voice_design(sizes, lengths, files: AudioFiles) -> List[Benchmark]:
+    from app.services.tts_engine import tts_engine
+    return [
+        Benchmark(
+            "tts.voice_design", {"batch": n, "seconds": s}, n,
+            setup=lambda n=n, s=s: [synth_text(s, seed=i) for i in range(n)],
+            run=lambda texts: tts_engine.generate_voice_design(texts, [VOICE_INSTRUCT] * len(texts), temperature=0.9)
+        )
+        for n in sizes for s in lengths
+    ]
+
+def tts_voice_clone(sizes, lengths, files: AudioFiles) -> List[Benchmark]:
+    from app.services.tts_engine import tts_engine
+    return [
+        Benchmark(
+            "tts.voice_clone", {"batch": n, "seconds": s}, n,
+            setup=lambda n=n, s=s: [synth_text(s, seed=i) for i in range(n)],
+            run=lambda texts: tts_engine.generate_voice_clone(
+                texts, files.get(5.0), ref_text=synth_text(5.0), temperature=0.9
+            )
+        )
+        for n in sizes for s in lengths
+    ]
+
+def asr_transcribe(sizes, lengths, files: AudioFiles) -> List[Benchmark]:
+    from app.services.asr_engine import asr_engine
+    return [
+        Benchmark(
+            "asr.transcribe", {"batch": n, "seconds": s, "timestamps": True}, n,
+            setup=lambda n=n, s=s: files.batch(s, n),
+            run=lambda paths: asr_engine.transcribe(paths, return_timestamps=True)
+        )
+        for n in sizes for s in lengths
+    ]
+
+def asr_stream(sizes, lengths, files: AudioFiles) -> List[Benchmark]:
+    """
+    WebSocket session loop (feed + step every ASR_STREAM_STEP_MS of audio)
+    over a speech-like stream and over a noise-only one. The noise stream
+    doubles as a check: any partial or final event it emits fails the run.
+    """
+    from app.core.config import settings
+    from app.services.asr_stream import ASRStreamSession
+    from app.services.asr_engine import ASR_SR
+
+    step = settings.ASR_STREAM_STEP_MS * ASR_SR // 1000
+
+    def setup(signal, seconds):
+        if signal == "noise":
+            rng = np.random.default_rng(0)
+            return (0.001 * rng.standard_normal(int(seconds * ASR_SR))).astype(np.float32)
+        return synth_audio(seconds, ASR_SR)
+
+    def run(audio, signal):
+        session = ASRStreamSession(ASR_SR)
+        events = []
+        for start in range(0, len(audio), step):
+            session.feed_samples(audio[start:start + step])
+            if session.ready():
+                events += session.step()
+        events += session.step(final=True)
+        if signal == "noise" and events:
+            raise RuntimeError(f"Noise-only stream emitted {len(events)} events ({events[0]['type']}: {events[0]['text']!r})")
+        return events
+
+    return [
+        Benchmark(
+            "asr.stream", {"signal": signal, "seconds": s}, 1,
+            setup=lambda signal=signal, s=s: setup(signal, s),
+            run=lambda audio, signal=signal: run(audio, signal)
+        )
+        for signal in ("speech", "noise") for s in lengths
+    ]
+
+def diarize(sizes, lengths, files: AudioFiles) -> List[Benchmark]:
+    from app.services.diarization_engine import diarization_engine
+    return [
+        Benchmark(
+            "diarize", {"batch": n, "seconds": s}, n,
+            setup=lambda n=n, s=s: files.batch(s, n),
+            run=lambda paths: diarization_engine.diarize(paths)
+        )
+        for n in sizes for s in lengths
+    ]
+
+def _tensors(seconds: float, size: int, sr: int):
+    import torch
+    return [torch.from_numpy(synth_audio(seconds, sr, seed=i))[None, :] for i in range(size)]
+
+def denoise(sizes, lengths, files: AudioFiles) -> List[Benchmark]:
+    from app.services.fb_denoiser import fb_denoiser
+    return [
+        Benchmark(
+            "denoise.batch_tensors", {"batch": n, "seconds": s, "sr": SYNTH_SR}, n,
+            setup=lambda n=n, s=s: _tensors(s, n, SYNTH_SR),
+            run=lambda wavs: fb_denoiser.process_batch_tensors(wavs, SYNTH_SR)
+        )
+        for n in sizes for s in lengths
+    ]
+
+def super_resolution(sizes, lengths, files: AudioFiles) -> List[Benchmark]:
+    from app.services.super_res import super_res
+    return [
+        Benchmark(
+            "super_res.batch_tensors", {"batch": n, "seconds": s, "sr": 16000}, n,
+            setup=lambda n=n, s=s: _tensors(s, n, 16000),
+            run=lambda wavs: super_res.process_batch_tensors(wavs, 16000)
+        )
+        for n in sizes for s in lengths
+    ]
+
+def pipeline(sizes, lengths, files: AudioFiles) -> List[Benchmark]:
+    from app.services.audio_pipeline import audio_pipeline
+    return [
+        Benchmark(
+            "pipeline.voice_clone_enhanced", {"batch": n, "seconds": s}, n,
+            setup=lambda n=n, s=s: ([synth_text(s, seed=i) for i in range(n)], files.batch(5.0, n)),
+            run=lambda state: audio_pipeline.process_voice_clone_enhanced(
+                state[0], state[1], ref_text=[synth_text(5.0)] * len(state[0])
+            )
+        )
+        for n in sizes for s in lengths
+    ]
+
+# --- Service plumbing ---
+
+def queue(sizes, lengths, files: AudioFiles, redis_url: Optional[str] = None) -> List[Benchmark]:
+    """
+    submit_batch + pop_items + mark_done round trip. Runs against the
+    in-process stand-in unless redis_url is given (use a scratch database:
+    keys are not removed).
+    """
+    from app.services.queue_service import queue_service
+    from app.services import redis_client
+    from app.models.queue_models import QueueBatchSubmitRequest, QueueItemRequest
+
+    client = redis_client.connect(redis_url or redis_client.MEMORY_SCHEME)
+
+    def setup(n):
+        queue_service.redis = client
+        return QueueBatchSubmitRequest(label="benchmark", items=[
+            QueueItemRequest(text=synth_text(5.0, seed=i), operation="voice_design", instruct=VOICE_INSTRUCT)
+            for i in range(n)
+        ])
+
+    def run(request):
+        queue_service.submit_batch(request)
+        popped = queue_service.pop_items(len(request.items))
+        for item in popped:
+            queue_service.mark_done(item["item_id"], f"/api/v1/files/{item['item_id']}")
+
+    return [
+        Benchmark("queue.round_trip", {"batch": n, "backend": "redis" if redis_url else "memory"}, n,
+                  setup=lambda n=n: setup(n), run=run)
+        for n in sizes
+    ]
+
+def file_store(sizes, lengths, files: AudioFiles) -> List[Benchmark]:
+    from app.services.file_store import file_store as store
+
+    def run(state):
+        payloads, saved = state
+        for content in payloads:
+            file_id = store.save(content, "bench.wav")
+            saved.append(store.get_path(file_id))
+
+    def teardown(state):
+        for path in state[1]:
+            if path is not None and os.path.exists(path):
+                os.remove(path)
+
+    return [
+        Benchmark(
+            "file_store.save_get", {"batch": n, "seconds": s}, n,
+            setup=lambda n=n, s=s: ([wav_bytes(synth_audio(s, seed=i)) for i in range(n)], []),
+            run=run, teardown=teardown
+        )
+        for n in sizes for s in lengths
+    ]
+
+def audio_loader(sizes, lengths, files: AudioFiles) -> List[Benchmark]:
+    """Decode + resample to 16 kHz; encoded bytes bypass the cache so every run decodes."""
+    from app.services.audio_loader import audio_loader as loader
+    return [
+        Benchmark(
+            "audio_loader.load_many", {"batch": n, "seconds": s, "target_sr": 16000}, n,
+            setup=lambda n=n, s=s: [wav_bytes(synth_audio(s, seed=i)) for i in range(n)],
+            run=lambda sources: loader.load_many(sources, 16000)
+        )
+        for n in sizes for s in lengths
+    ]
+
+GROUPS: Dict[str, Callable[..., List[Benchmark]]] = {
+    "tts": lambda *a: tts_voice_design(*a) + tts_voice_clone(*a),
+    "asr": asr_transcribe,
+    "asr_stream": asr_stream,
+    "diarize": diarize,
+    "denoise": denoise,
+    "super_res": super_resolution,
+    "pipeline": pipeline,
+    "queue": queue,
+    "file_store": file_store,
+    "audio_loader": audio_loader,
+}
+
+# --- Startup ---
+
+HEAVY_MODULES = ("torch", "torchaudio", "transformers", "pyannote.audio", "denoiser", "NovaSR", "qwen_tts", "qwen_asr")
+IMPORT_TARGETS = ("app.main", "app.api.v1.endpoints.queue", "app.api.v1.endpoints.files")
+IMPORT_TOP_N = 10
+
+_IMPORT_PROBE = """
+import sys, json, time, resource
+t0 = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - t0
+print(json.dumps({{
+    "import_seconds": round(elapsed, 4),
+    "heavy_modules": sorted(m for m in {heavy!r} if m in sys.modules),
+    "modules_loaded": len(sys.modules),
+    "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+}}))
+"""
+
+def _parse_importtime(stderr: str, probed: str) -> List[Dict[str, Any]]:
+    """
+    Slowest imports below the probed module from 'python -X importtime' output:
+    one row per third-party package (its costliest import, usually the package
+    root) and per app module, by cumulative time.
+    """
+    slowest: Dict[str, Dict[str, Any]] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # Header row
+        self_us, cumulative_us, name = fields
+        name = name.strip()
+        if name == probed:
+            continue
+        key = name if name.startswith("app.") else name.split(".")[0]
+        row = {"module": name, "self_ms": int(self_us) / 1000, "cumulative_ms": int(cumulative_us) / 1000}
+        if key not in slowest or row["cumulative_ms"] > slowest[key]["cumulative_ms"]:
+            slowest[key] = row
+    return sorted(slowest.values(), key=lambda r: r["cumulative_ms"], reverse=True)[:IMPORT_TOP_N]
+
+def startup(sizes, lengths, files: AudioFiles) -> List[Benchmark]:
+    """
+    Cold import of the API (and of lightweight roles) in a fresh interpreter.
+    Latency is the whole child process (interpreter start included); details
+    hold the in-process import time, the slowest imports below the module from
+    -X importtime, and which heavy ML modules got pulled in (should be none).
+    """
+    import sys
+    import json
+    import subprocess
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    def run(state):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", _IMPORT_PROBE.format(module=state["module"], heavy=HEAVY_MODULES)],
+            cwd=root, capture_output=True, text=True, timeout=300
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "import failed")
+        state["probe"] = json.loads(proc.stdout.strip().splitlines()[-1])
+        state["stderr"] = proc.stderr
+
+    def details(state):
+        return dict(state["probe"], slowest_imports=_parse_importtime(state["stderr"], state["module"]))
+
+    return [
+        Benchmark("startup.import", {"module": module}, 1,
+                  setup=lambda module=module: {"module": module}, run=run, details=details, memory=False)
+        for module in IMPORT_TARGETS
+    ]
+
+GROUPS["startup"] = startup
@@ -145,6 +145,16 @@ const API = {
         return API.request('/diarize/file', 'POST', formData, true);
     },
 
+    // Smart Transcript (ASR + Diarization, aligned server-side)
+    analyzeBatch: (items, language, numSpeakers = null) => {
+        // items is array of { file_id: "...", custom_id: "..." }
+        if (numSpeakers) items.forEach(i => i.num_speakers = numSpeakers);
+        return API.request('/analyze', 'POST', {
+            files: items,
+            language: language
+        });
+    },
+
     // Queue Endpoints
     submitBatchToQueue: (items, label = null) => {
         return API.request('/queue/submit', 'POST', {
@@ -1,4 +1,4 @@
-// ui-analysis.js - Smart Transcript Logic (ASR + Diarization Alignment)
+// ui-analysis.js - Smart Transcript UI (alignment runs server-side in /analyze)
 
 UI.handleRunAnalysis = async () => {
     const btn = UI.elements.btnRunAnalysis;
@@ -17,23 +17,13 @@ UI.handleRunAnalysis = async () => {
         chat.innerHTML = '';
 
         // Step 1: Upload
-        status.textContent = "Step 1/3: Uploading audio...";
+        status.textContent = "Step 1/2: Uploading audio...";
         const uploaded = await API.uploadFile(file);
 
-        // Step 2: ASR with Timestamps
-        status.textContent = "Step 2/3: Transcribing (getting timestamps)...";
-        const asrRes = await API.transcribeBatch([{ file_id: uploaded.file_id, custom_id: 'analysis' }], lang, true);
-        const asrData = asrRes.items[0];
-
-        // Step 3: Diarization
-        status.textContent = "Step 3/3: Identifying speakers...";
-        const diarizeRes = await API.diarizeBatch([{ file_id: uploaded.file_id, custom_id: 'analysis' }]);
-        const diarizeData = diarizeRes.items[0];
-
-        // Step 4: Logic - Align and Merge
-        status.textContent = "Finalizing: Aligning text with speakers...";
-        const punctuatedWords = UI.alignPunctuation(asrData.timestamps, asrData.text);
-        const mergedTurns = UI.mergeSpeechAndSpeakers(punctuatedWords, diarizeData.segments);
+        // Step 2: Transcription, diarization and alignment in one server-side pass
+        status.textContent = "Step 2/2: Transcribing and identifying speakers...";
+        const res = await API.analyzeBatch([{ file_id: uploaded.file_id, custom_id: 'analysis' }], lang);
+        const mergedTurns = res.items[0].turns;
 
         // Render
         UI.renderAnalysisChat(mergedTurns);
@@ -48,107 +38,6 @@ UI.handleRunAnalysis = async () => {
     }
 };
 
-/**
- * Case-insensitive lookahead to find punctuation from fullText.
- * Uses a fuzzy search to tolerate minor ASR tokenization differences.
- */
-UI.alignPunctuation = (timedWords, fullText) => {
-    let result = [];
-    let currentPos = 0;
-    const lowerText = fullText.toLowerCase();
-
-    for (let i = 0; i < timedWords.length; i++) {
-        const word = timedWords[i];
-        const nextWord = timedWords[i + 1];
-
-        // Skip metadata tokens like <|en|>
-        if (word.text.startsWith('<|') && word.text.endsWith('|')) continue;
-
-        const cleanWord = word.text.toLowerCase().trim();
-        if (!cleanWord) continue;
-
-        // Find the start of this word in fullText (case-insensitive)
-        let wordStart = lowerText.indexOf(cleanWord, currentPos);
-
-        // If not found, try a small backtrack or skip
-        if (wordStart === -1) {
-            // Try to find it nearby if there was a slight drift
-            wordStart = lowerText.indexOf(cleanWord, Math.max(0, currentPos - 5));
-        }
-
-        if (wordStart === -1) {
-            // Fallback: push word with a default space
-            result.push({ ...word, punctuated: word.text + ' ' });
-            continue;
-        }
-
-        let wordWithSuffix = "";
-        let suffixEnd = wordStart + cleanWord.length;
-
-        // Look ahead for the next word to determine the junction (punctuation/spaces)
-        if (nextWord) {
-            const nextCleanWord = nextWord.text.toLowerCase().trim();
-            let nextWordStart = lowerText.indexOf(nextCleanWord, suffixEnd);
-
-            // Limit lookahead to prevent swallowing too much text if a word is missing
-            const maxLookahead = 50;
-            if (nextWordStart !== -1 && (nextWordStart - suffixEnd) < maxLookahead) {
-                wordWithSuffix = fullText.substring(wordStart, nextWordStart);
-                currentPos = nextWordStart;
-            } else {
-                // Next word not found or too far, just take the word and any immediately following punctuation
-                let searchRange = fullText.substring(wordStart, wordStart + cleanWord.length + 5);
-                let puncMatch = searchRange.match(/^.*?[.,!?;:\s]*/);
-                wordWithSuffix = puncMatch ? puncMatch[0] : fullText.substring(wordStart, wordStart + cleanWord.length);
-                if (!wordWithSuffix.endsWith(' ')) wordWithSuffix += ' ';
-                currentPos = wordStart + wordWithSuffix.length;
-            }
-        } else {
-            // Last word - take everything remaining
-            wordWithSuffix = fullText.substring(wordStart);
-            currentPos = fullText.length;
-        }
-
-        result.push({
-            ...word,
-            punctuated: wordWithSuffix
-        });
-    }
-    return result;
-};
-
-/**
- * Groups punctuated words into speaker turns based on Diorization segments
- */
-UI.mergeSpeechAndSpeakers = (punctuatedWords, diarizeSegments) => {
-    let turns = [];
-    let currentTurn = null;
-
-    punctuatedWords.forEach(word => {
-        const midpoint = (word.start_time + word.end_time) / 2;
-
-        // Find owner speaker
-        const segment = diarizeSegments.find(s => midpoint >= s.start && midpoint <= s.end)
-            || diarizeSegments.find(s => word.start_time >= s.start && word.start_time <= s.end)
-            || { speaker: "Unknown" };
-
-        if (!currentTurn || currentTurn.speaker !== segment.speaker) {
-            currentTurn = {
-                speaker: segment.speaker,
-                text: word.punctuated,
-                start: word.start_time,
-                end: word.end_time
-            };
-            turns.push(currentTurn);
-        } else {
-            currentTurn.text += word.punctuated;
-            currentTurn.end = word.end_time;
-        }
-    });
-
-    return turns;
-};
-
 UI.renderAnalysisChat = (turns) => {
     const chat = UI.elements.analysisResultChat;
     const audio = UI.elements.analysisPreview;